@@ -1,6 +1,6 @@
 """This file contains classes to configure admin panel"""
 from django.contrib import admin
-from bot.models import TgUser
+from bot.models import OutboxMessage, TgUser
 # -------------------------------------------------------------------------
 
 
@@ -12,3 +12,14 @@ class TgUserAdmin(admin.ModelAdmin):
     list_display = ("username", "bot_state", "user")
     search_fields = ("username", "user")
     readonly_fields = ("username", "tg_id")
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    """This class provides configuration for the outbox section of the admin
+    panel"""
+
+    list_display = ("chat_id", "status", "attempts", "next_attempt_at", "created")
+    list_filter = ("status",)
+    search_fields = ("chat_id", "text")
+    readonly_fields = ("created", "sent_at", "last_error")
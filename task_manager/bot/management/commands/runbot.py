@@ -1,8 +1,13 @@
 """This file contains a Command class to execute a custom command"""
 import os
-from django.core.management import BaseCommand
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from bot.tg.async_client import AsyncBotRunner
 from bot.tg.client import TgClient
 from bot.tg.bot_actions import BotActions
+from bot.tg.log import setup_logging
+from bot.tg.metrics import start_metrics_server
+from bot.tg.workers import PartitionedBotRunner
 # -------------------------------------------------------------------------
 
 token = os.environ.get('TG_TOKEN')
@@ -14,6 +19,52 @@ class Command(BaseCommand):
     """Command class representing a custom command to run a telegram bot"""
     help = 'Starts a telegram bot'
 
+    def add_arguments(self, parser) -> None:
+        """This method adds arguments of the command"""
+        parser.add_argument(
+            '--mode', choices=('polling', 'webhook'), default='polling',
+            help='Receive updates by long polling or register the webhook '
+                 'served by the web application')
+        parser.add_argument(
+            '--async', action='store_true', dest='use_async',
+            help='Handle updates of different chats concurrently')
+        parser.add_argument(
+            '--concurrency', type=int, default=8,
+            help='Maximum number of updates handled at the same time')
+        parser.add_argument(
+            '--workers', type=int, default=0,
+            help='Number of processes handling updates partitioned by chat')
+        parser.add_argument(
+            '--metrics-port', type=int, default=settings.TG_METRICS_PORT,
+            help='Port to serve metrics at /metrics, 0 disables them')
+        parser.add_argument(
+            '--log-sample-rate', type=float,
+            default=settings.TG_LOG_SAMPLE_RATE,
+            help='Share of info records about updates to log')
+
     def handle(self, *args, **options) -> None:
         """This method starts a telegram bot"""
-        client.start_bot()
+        if options['mode'] == 'webhook':
+            if not settings.TG_WEBHOOK_SECRET:
+                raise CommandError('TG_WEBHOOK_SECRET is not set')
+            client.set_webhook(
+                settings.TG_WEBHOOK_URL, settings.TG_WEBHOOK_SECRET)
+            self.stdout.write(f'Webhook is set to {settings.TG_WEBHOOK_URL}')
+            return
+
+        if options['use_async'] and options['workers']:
+            raise CommandError('--async and --workers can not be combined')
+
+        setup_logging(options['log_sample_rate'])
+        if options['metrics_port']:
+            start_metrics_server(options['metrics_port'])
+
+        client.delete_webhook()
+        if options['workers']:
+            PartitionedBotRunner(
+                client, options['workers'],
+                metrics_port=options['metrics_port']).start_bot()
+        elif options['use_async']:
+            AsyncBotRunner(client, options['concurrency']).start_bot()
+        else:
+            client.start_bot()
@@ -0,0 +1,55 @@
+"""This file contains a Command class to execute a custom command"""
+import os
+import time
+from django.core.management import BaseCommand
+from bot.tg.outbox import OutboxWorker
+from bot.tg.ratelimit import ChatRateLimiter
+from bot.tg.transport import TgTransport
+# -------------------------------------------------------------------------
+
+PRUNE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    """Command class representing a custom command to send queued messages
+    of the telegram bot"""
+    help = 'Sends queued messages of the telegram bot'
+
+    def add_arguments(self, parser) -> None:
+        """This method adds arguments of the command"""
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Maximum number of messages taken at once')
+        parser.add_argument(
+            '--interval', type=float, default=0.5,
+            help='Seconds to wait when there are no messages to send')
+        parser.add_argument(
+            '--global-rate', type=float, default=30,
+            help='Messages per second to all chats')
+        parser.add_argument(
+            '--chat-rate', type=float, default=1,
+            help='Messages per second to a single chat')
+        parser.add_argument(
+            '--max-attempts', type=int, default=5,
+            help='Attempts before a message is marked as dead')
+        parser.add_argument(
+            '--keep-days', type=int, default=7,
+            help='Days to keep sent messages')
+
+    def handle(self, *args, **options) -> None:
+        """This method sends queued messages in a loop"""
+        worker = OutboxWorker(
+            TgTransport(os.environ.get('TG_TOKEN')),
+            ChatRateLimiter(options['global_rate'], options['chat_rate']),
+            batch_size=options['batch_size'],
+            max_attempts=options['max_attempts'],
+        )
+        pruned_at = 0
+
+        while True:
+            if time.monotonic() - pruned_at > PRUNE_INTERVAL:
+                worker.prune(options['keep_days'])
+                pruned_at = time.monotonic()
+
+            if not worker.run_once():
+                time.sleep(options['interval'])
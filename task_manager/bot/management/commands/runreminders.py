@@ -0,0 +1,131 @@
+"""This file contains a Command class to execute a custom command"""
+import datetime
+import time
+from itertools import groupby
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from bot.models import DigestRun, TgUser
+from bot.tg.outbox import enqueue_messages
+from goals.models import Goal, Status
+# -------------------------------------------------------------------------
+
+TITLE_LENGTH = 100
+HEADERS = {
+    0: 'Сегодня последний день для целей:',
+    1: 'Завтра наступает срок целей:',
+}
+
+
+class Command(BaseCommand):
+    """Command class representing a custom command to send daily digests of
+    goals with close due dates to linked telegram users. Goals of all users
+    are loaded by a single streaming query ordered by telegram user, so
+    digests are rendered one by one and the memory usage doesn't depend on
+    the number of users"""
+    help = 'Queues daily digests of goals with close due dates'
+
+    def add_arguments(self, parser) -> None:
+        """This method adds arguments of the command"""
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Number of rows fetched and digests queued at once')
+        parser.add_argument(
+            '--max-goals', type=int, default=10,
+            help='Maximum number of goals listed in a group of a digest')
+        parser.add_argument(
+            '--not-before', type=int, default=9,
+            help='Hour of the day digests are sent after')
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Seconds between checks, the command runs once if it is 0')
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Send digests even if they were sent today')
+
+    def handle(self, *args, **options) -> None:
+        """This method queues digests once a day"""
+        while True:
+            now = timezone.localtime()
+            if options['force'] or self.is_due(now, options['not_before']):
+                queued = self.send_digests(
+                    now.date(), options['batch_size'], options['max_goals'])
+                self.stdout.write(f'Queued digests: {queued}')
+
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    @staticmethod
+    def is_due(now: datetime.datetime, not_before: int) -> bool:
+        """This method checks if digests weren't sent today yet
+        :param now: A current local datetime
+        :param not_before: An integer representing the hour to send after
+        :return: True if digests should be sent
+        """
+        if now.hour < not_before:
+            return False
+
+        return not DigestRun.objects.filter(date__gte=now.date()).exists()
+
+    def send_digests(
+            self, today: datetime.date, batch_size: int,
+            max_goals: int) -> int:
+        """This method queues digests of all linked users and records the
+        day in one transaction, so digests are queued once a day
+        :param today: A date to count due dates from
+        :param batch_size: An integer representing the size of a batch
+        :param max_goals: An integer representing the maximum number of goals
+        listed in a group
+        :return: An integer representing the number of queued digests
+        """
+        rows = Goal.objects.filter(
+            status__lt=Status.done,
+            due_date__in=[today + datetime.timedelta(days=days)
+                          for days in HEADERS],
+            board__participants__user__tguser__bot_state__gt=(
+                TgUser.BotStates.added),
+        ).order_by(
+            'board__participants__user__tguser__tg_id', 'due_date', 'id',
+        ).values_list(
+            'board__participants__user__tguser__tg_id', 'due_date', 'title',
+        ).iterator(chunk_size=batch_size)
+
+        queued = 0
+        batch = []
+        with transaction.atomic():
+            for tg_id, goals in groupby(rows, key=lambda row: row[0]):
+                batch.append((tg_id, self.render(goals, today, max_goals)))
+                if len(batch) >= batch_size:
+                    enqueue_messages(batch)
+                    queued += len(batch)
+                    batch = []
+
+            enqueue_messages(batch)
+            queued += len(batch)
+            DigestRun.objects.update_or_create(
+                date=today, defaults={'queued': queued})
+
+        return queued
+
+    @staticmethod
+    def render(goals, today: datetime.date, max_goals: int) -> str:
+        """This method renders a digest of a single user
+        :param goals: An iterable of rows with telegram ids, due dates and
+        titles of goals ordered by due dates
+        :param today: A date to count due dates from
+        :param max_goals: An integer representing the maximum number of goals
+        listed in a group
+        :return: A string representing the digest
+        """
+        parts = []
+        for due_date, group in groupby(goals, key=lambda row: row[1]):
+            titles = [title for _, _, title in group]
+            lines = [f'- {title[:TITLE_LENGTH]}' for title in titles[:max_goals]]
+            if len(titles) > max_goals:
+                lines.append(f'и еще {len(titles) - max_goals}')
+
+            parts.append('\n'.join(
+                [HEADERS[(due_date - today).days], *lines]))
+
+        return '\n\n'.join(parts)
@@ -0,0 +1,82 @@
+# Generated by Django 4.1.7 on 2026-10-18 19:12
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bot", "0006_alter_tguser_bot_state"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxMessage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("chat_id", models.BigIntegerField(verbose_name="Telegram chat")),
+                ("text", models.TextField(verbose_name="Text")),
+                (
+                    "status",
+                    models.PositiveSmallIntegerField(
+                        choices=[(1, "Pending"), (2, "Sent"), (3, "Dead")],
+                        default=1,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Attempts"
+                    ),
+                ),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="Next attempt"
+                    ),
+                ),
+                ("last_error", models.TextField(blank=True, verbose_name="Last error")),
+                (
+                    "created",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Created"),
+                ),
+                ("sent_at", models.DateTimeField(null=True, verbose_name="Sent")),
+            ],
+            options={
+                "verbose_name": "Outbox message",
+                "verbose_name_plural": "Outbox messages",
+            },
+        ),
+        migrations.AlterField(
+            model_name="tguser",
+            name="bot_state",
+            field=models.PositiveSmallIntegerField(
+                choices=[
+                    (1, "Added"),
+                    (2, "Confirmed"),
+                    (3, "Wait Category"),
+                    (4, "Wait Title"),
+                    (5, "Remove Goal"),
+                ],
+                default=1,
+                verbose_name="Bot State",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="outboxmessage",
+            index=models.Index(
+                condition=models.Q(("status", 1)),
+                fields=["next_attempt_at", "id"],
+                name="outbox_pending_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.1.7 on 2026-10-18 19:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bot", "0007_outboxmessage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TgConversationState",
+            fields=[
+                (
+                    "tg_user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="conversation_state",
+                        serialize=False,
+                        to="bot.tguser",
+                    ),
+                ),
+                ("data", models.JSONField(default=dict, verbose_name="Data")),
+                (
+                    "updated",
+                    models.DateTimeField(auto_now=True, verbose_name="Updated"),
+                ),
+            ],
+            options={
+                "verbose_name": "Conversation state",
+                "verbose_name_plural": "Conversation states",
+            },
+        ),
+    ]
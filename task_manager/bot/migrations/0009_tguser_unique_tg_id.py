@@ -0,0 +1,75 @@
+# Generated by Django 4.1.7 on 2026-10-18 19:15
+
+from django.db import migrations, models
+from django.db.models import Count, F
+
+
+def set_constraints_immediate(apps, schema_editor):
+    """Foreign keys of PostgreSQL are checked at the end of the transaction,
+    ALTER TABLE fails if checks of deleted rows are still pending, so they
+    are checked right after every statement in this migration"""
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+
+def remove_duplicates(apps, schema_editor):
+    """Only one record of a telegram user is kept, a linked and the latest
+    one is preferred"""
+    TgUser = apps.get_model("bot", "TgUser")
+    duplicated = (
+        TgUser.objects.values("tg_id")
+        .annotate(count=Count("id"))
+        .filter(count__gt=1)
+        .values_list("tg_id", flat=True)
+    )
+
+    for tg_id in duplicated:
+        ids = list(
+            TgUser.objects.filter(tg_id=tg_id)
+            .order_by(F("user_id").asc(nulls_last=True), "-id")
+            .values_list("id", flat=True)
+        )
+        TgUser.objects.filter(id__in=ids[1:]).delete()
+
+
+# tg_id was compared with the id of the chat of an update and it is compared
+# with the id of the sender now. Telegram gives a private chat the id of its
+# user, so records of private chats keep matching and are not converted.
+# Records created from group chats have negative ids, senders can't be found
+# for them, so they are kept as is: their users can still be linked again
+# from a private chat, and reminders of linked ones still go to the group
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bot", "0008_tgconversationstate"),
+    ]
+
+    operations = [
+        migrations.RunPython(set_constraints_immediate, set_constraints_immediate),
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="tguser",
+            name="tg_id",
+            field=models.BigIntegerField(unique=True, verbose_name="Telegram chat"),
+        ),
+        migrations.AlterField(
+            model_name="tguser",
+            name="username",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                max_length=50,
+                null=True,
+                verbose_name="Telegram user",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tguser",
+            name="verification_code",
+            field=models.CharField(
+                db_index=True,
+                max_length=15,
+                null=True,
+                verbose_name="Verification code",
+            ),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.1.7 on 2026-10-18 19:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bot", "0009_tguser_unique_tg_id"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProcessedUpdate",
+            fields=[
+                (
+                    "update_id",
+                    models.BigIntegerField(
+                        primary_key=True, serialize=False, verbose_name="Update"
+                    ),
+                ),
+                (
+                    "processed",
+                    models.DateTimeField(
+                        auto_now_add=True, db_index=True, verbose_name="Processed"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Processed update",
+                "verbose_name_plural": "Processed updates",
+            },
+        ),
+        migrations.CreateModel(
+            name="UpdateOffset",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(max_length=50, unique=True, verbose_name="Name"),
+                ),
+                ("offset", models.BigIntegerField(verbose_name="Offset")),
+                (
+                    "updated",
+                    models.DateTimeField(auto_now=True, verbose_name="Updated"),
+                ),
+            ],
+            options={
+                "verbose_name": "Update offset",
+                "verbose_name_plural": "Update offsets",
+            },
+        ),
+    ]
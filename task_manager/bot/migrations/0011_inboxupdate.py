@@ -0,0 +1,37 @@
+# Generated by Django 4.1.7 on 2026-10-18 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bot", "0010_processedupdate_updateoffset"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InboxUpdate",
+            fields=[
+                (
+                    "update_id",
+                    models.BigIntegerField(
+                        primary_key=True, serialize=False, verbose_name="Update"
+                    ),
+                ),
+                ("chat_id", models.BigIntegerField(verbose_name="Telegram chat")),
+                ("payload", models.JSONField(verbose_name="Payload")),
+                (
+                    "received",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Received"),
+                ),
+            ],
+            options={
+                "verbose_name": "Inbox update",
+                "verbose_name_plural": "Inbox updates",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="inboxupdate",
+            index=models.Index(fields=["chat_id", "update_id"], name="inbox_chat_idx"),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.1.7 on 2026-10-18 19:55
+
+from django.db import migrations, models
+
+WATERMARK_NAME = "goal_reminders"
+
+
+def move_watermark(apps, schema_editor):
+    """The day of the last digests was kept by a watermark of goals"""
+    Watermark = apps.get_model("goals", "Watermark")
+    DigestRun = apps.get_model("bot", "DigestRun")
+    watermark = Watermark.objects.filter(name=WATERMARK_NAME).first()
+    if watermark is not None and watermark.swept_until is not None:
+        DigestRun.objects.create(date=watermark.swept_until)
+    Watermark.objects.filter(name=WATERMARK_NAME).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bot", "0012_outbox_chat_pending_idx"),
+        ("goals", "0005_goal_due_date_index_watermark"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DigestRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(unique=True, verbose_name="Date")),
+                (
+                    "queued",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Queued digests"
+                    ),
+                ),
+                (
+                    "queued_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Queued at"),
+                ),
+            ],
+            options={
+                "verbose_name": "Digest run",
+                "verbose_name_plural": "Digest runs",
+            },
+        ),
+        migrations.RunPython(move_watermark, migrations.RunPython.noop),
+    ]
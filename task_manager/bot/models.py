@@ -1,5 +1,10 @@
-"""This file contains TgUser model to create and get telegram user records"""
+"""This file contains TgUser model to create and get telegram user records,
+TgConversationState model to keep state of a dialog with the bot,
+OutboxMessage model to queue messages sent by the telegram bot, InboxUpdate
+model to queue updates received by the webhook, DigestRun model to record
+days reminders were queued for and models to track received updates"""
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from core.models import User
 # -------------------------------------------------------------------------
@@ -15,12 +20,18 @@ class TgUser(models.Model):
         wait_title = 4, _('Wait Title')
         remove_goal = 5, _('Remove Goal')
 
-    tg_id = models.IntegerField(
-        verbose_name=_("Telegram chat")
+    # The id of the telegram user, it is also the id of the private chat of
+    # the user with the bot
+    tg_id = models.BigIntegerField(
+        verbose_name=_("Telegram chat"),
+        unique=True
     )
     username = models.CharField(
         verbose_name=_("Telegram user"),
-        max_length=50
+        max_length=50,
+        null=True,
+        blank=True,
+        db_index=True
     )
     bot_state = models.PositiveSmallIntegerField(
         choices=BotStates.choices,
@@ -35,7 +46,8 @@ class TgUser(models.Model):
     verification_code = models.CharField(
         verbose_name=_("Verification code"),
         null=True,
-        max_length=15
+        max_length=15,
+        db_index=True
     )
 
     class Meta:
@@ -43,4 +55,192 @@ class TgUser(models.Model):
         verbose_name_plural = _("Telegram users")
 
     def __str__(self):
-        return self.username
+        return self.username or str(self.tg_id)
+
+
+class TgConversationState(models.Model):
+    """TgConversationState model keeps data of an unfinished dialog of a
+    telegram user with the bot"""
+    tg_user = models.OneToOneField(
+        TgUser,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='conversation_state'
+    )
+    data = models.JSONField(
+        verbose_name=_("Data"),
+        default=dict
+    )
+    updated = models.DateTimeField(
+        verbose_name=_("Updated"),
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = _("Conversation state")
+        verbose_name_plural = _("Conversation states")
+
+    def __str__(self):
+        return f'{self.tg_user_id}: {self.data}'
+
+
+class OutboxMessage(models.Model):
+    """OutboxMessage model represents a message waiting to be sent to a
+    telegram chat by the outbox worker"""
+    class Statuses(models.IntegerChoices):
+        """This class provides statuses available for status field"""
+        pending = 1, _('Pending')
+        sent = 2, _('Sent')
+        dead = 3, _('Dead')
+
+    chat_id = models.BigIntegerField(
+        verbose_name=_("Telegram chat")
+    )
+    text = models.TextField(
+        verbose_name=_("Text")
+    )
+    status = models.PositiveSmallIntegerField(
+        choices=Statuses.choices,
+        verbose_name=_("Status"),
+        default=Statuses.pending
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name=_("Attempts"),
+        default=0
+    )
+    next_attempt_at = models.DateTimeField(
+        verbose_name=_("Next attempt"),
+        default=timezone.now
+    )
+    last_error = models.TextField(
+        verbose_name=_("Last error"),
+        blank=True
+    )
+    created = models.DateTimeField(
+        verbose_name=_("Created"),
+        auto_now_add=True
+    )
+    sent_at = models.DateTimeField(
+        verbose_name=_("Sent"),
+        null=True
+    )
+
+    class Meta:
+        verbose_name = _("Outbox message")
+        verbose_name_plural = _("Outbox messages")
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at", "id"],
+                name="outbox_pending_idx",
+                condition=models.Q(status=1),
+            ),
+            models.Index(
+                fields=["chat_id", "id"],
+                name="outbox_chat_pending_idx",
+                condition=models.Q(status=1),
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.chat_id}: {self.text[:30]}'
+
+
+class ProcessedUpdate(models.Model):
+    """ProcessedUpdate model represents an update handled by the bot, it
+    prevents handling of the same update twice"""
+    update_id = models.BigIntegerField(
+        verbose_name=_("Update"),
+        primary_key=True
+    )
+    processed = models.DateTimeField(
+        verbose_name=_("Processed"),
+        auto_now_add=True,
+        db_index=True
+    )
+
+    class Meta:
+        verbose_name = _("Processed update")
+        verbose_name_plural = _("Processed updates")
+
+    def __str__(self):
+        return str(self.update_id)
+
+
+class UpdateOffset(models.Model):
+    """UpdateOffset model keeps the offset of the next update to request
+    from telegram, so polling continues from it after a restart"""
+    name = models.CharField(
+        verbose_name=_("Name"),
+        max_length=50,
+        unique=True
+    )
+    offset = models.BigIntegerField(
+        verbose_name=_("Offset")
+    )
+    updated = models.DateTimeField(
+        verbose_name=_("Updated"),
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = _("Update offset")
+        verbose_name_plural = _("Update offsets")
+
+    def __str__(self):
+        return f'{self.name}: {self.offset}'
+
+
+class InboxUpdate(models.Model):
+    """InboxUpdate model represents an update received by the webhook and
+    waiting for handling. It is deleted when the update is handled"""
+    update_id = models.BigIntegerField(
+        verbose_name=_("Update"),
+        primary_key=True
+    )
+    chat_id = models.BigIntegerField(
+        verbose_name=_("Telegram chat")
+    )
+    payload = models.JSONField(
+        verbose_name=_("Payload")
+    )
+    received = models.DateTimeField(
+        verbose_name=_("Received"),
+        auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = _("Inbox update")
+        verbose_name_plural = _("Inbox updates")
+        indexes = [
+            models.Index(
+                fields=["chat_id", "update_id"],
+                name="inbox_chat_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return str(self.update_id)
+
+
+class DigestRun(models.Model):
+    """DigestRun model represents a day digests of reminders were queued
+    for, so they are queued once a day"""
+    date = models.DateField(
+        verbose_name=_("Date"),
+        unique=True
+    )
+    queued = models.PositiveIntegerField(
+        verbose_name=_("Queued digests"),
+        default=0
+    )
+    queued_at = models.DateTimeField(
+        verbose_name=_("Queued at"),
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = _("Digest run")
+        verbose_name_plural = _("Digest runs")
+
+    def __str__(self):
+        return f'{self.date}: {self.queued}'
@@ -0,0 +1,580 @@
+"""This file contains tests of the bot app"""
+import datetime
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+import requests
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import SimpleTestCase, TestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from bot.management.commands.runreminders import Command as RunReminders
+from bot.models import (
+    DigestRun, InboxUpdate, OutboxMessage, ProcessedUpdate, TgUser)
+from bot.tg.bot_actions import PAGE_SIZE, BotActions
+from bot.tg.client import UPDATE_SCHEMA, TgClient
+from bot.tg.offsets import PendingUpdates
+from bot.tg.outbox import OutboxWorker
+from bot.tg.ratelimit import ChatRateLimiter
+from bot.tg.state import BaseStateStore
+from bot.tg.transport import TgApiError, TgTransport
+from bot.tg.webhook import UpdateDispatcher
+from core.models import User
+from goals.models import Board, Category, Goal, Participant, Roles
+# -------------------------------------------------------------------------
+
+
+def create_goal(board_title: str, **participants: int) -> Goal:
+    """This function creates a board with a goal and participants
+    :param board_title: A string representing the title of the board
+    :param participants: Roles of users given by their usernames
+    :return: A Goal instance
+    """
+    board = Board.objects.create(title=board_title)
+    users = {}
+    for username, role in participants.items():
+        users[username], _ = User.objects.get_or_create(username=username)
+        Participant.objects.create(board=board, user=users[username],
+                                   role=role)
+
+    author = next(iter(users.values()))
+    category = Category.objects.create(title='Category', user=author,
+                                       board=board)
+    return Goal.objects.create(title=board_title, user=author,
+                               category=category)
+
+
+def create_payload(update_id: int, user_id: int, text: str = '/goals'):
+    """This function returns an update of a private chat as telegram sends
+    it
+    :param update_id: An integer representing the id of the update
+    :param user_id: An integer representing the telegram user and the chat
+    :param text: A string representing the text of the message
+    :return: A dictionary containing the update
+    """
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': user_id, 'first_name': 'User'},
+            'text': text,
+        },
+    }
+
+
+def create_update(update_id: int, user_id: int, text: str = '/goals'):
+    """This function returns an Update instance of a private chat"""
+    return UPDATE_SCHEMA.load(create_payload(update_id, user_id, text))
+
+
+class MemoryStateStore(BaseStateStore):
+    """MemoryStateStore class keeps states in a dictionary, so tests count
+    only queries of the bot actions"""
+    def __init__(self) -> None:
+        self._states = {}
+
+    def get(self, tg_user: TgUser) -> dict:
+        return self._states.get(tg_user.tg_id, {})
+
+    def set(self, tg_user: TgUser, data: dict) -> None:
+        self._states[tg_user.tg_id] = data
+
+    def clear(self, tg_user: TgUser) -> None:
+        self._states.pop(tg_user.tg_id, None)
+
+
+class ListingQuerysetTest(TestCase):
+    """Listings of the bot should show goals of boards the user takes part
+    in with the required role"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.own = create_goal('Own', reader=Roles.writer)
+        cls.shared = create_goal('Shared', owner=Roles.owner,
+                                 reader=Roles.reader)
+        cls.tg_user = TgUser.objects.create(
+            tg_id=1, user=User.objects.get(username='reader'))
+
+    def test_goals_listing(self):
+        queryset = BotActions._get_listing_queryset('goals', self.tg_user)
+
+        self.assertCountEqual(queryset, [self.own, self.shared])
+
+    def test_remove_listing_checks_role_of_the_user(self):
+        queryset = BotActions._get_listing_queryset('remove', self.tg_user)
+
+        self.assertEqual(list(queryset), [self.own])
+
+
+class QueryBudgetTest(TestCase):
+    """Every page of a listing should be loaded by one query whatever the
+    number of goals is, the confirmation should not depend on the number
+    of telegram users"""
+
+    @classmethod
+    def setUpTestData(cls):
+        goal = create_goal('Board', owner=Roles.owner)
+        Goal.objects.bulk_create(
+            Goal(title=f'Goal {number}', user=goal.user,
+                 category=goal.category, board=goal.board)
+            for number in range(PAGE_SIZE * 3))
+        cls.tg_user = TgUser.objects.create(tg_id=1, user=goal.user)
+
+    def test_pages_of_listings(self):
+        actions = BotActions(MemoryStateStore())
+
+        with self.assertNumQueries(1):
+            actions.get_user_goals(self.tg_user)
+        for forward in (True, True, False):
+            with self.assertNumQueries(1):
+                actions.turn_page(self.tg_user, forward=forward)
+
+    def test_confirm_user(self):
+        for number in range(2, 10):
+            TgUser.objects.create(tg_id=number, verification_code=number)
+        tg_user = TgUser.objects.create(tg_id=10, verification_code='code')
+        client = APIClient()
+        client.force_authenticate(self.tg_user.user)
+
+        # The user is found by the check of the code and by the view, it is
+        # saved by the serializer and the view, the message is queued in a
+        # savepoint
+        with self.assertNumQueries(7):
+            response = client.patch('/bot/verify',
+                                    {'verification_code': 'code'},
+                                    format='json')
+
+        self.assertEqual(response.status_code, 200)
+        tg_user.refresh_from_db()
+        self.assertEqual(tg_user.bot_state, TgUser.BotStates.confirmed)
+        self.assertTrue(OutboxMessage.objects.filter(chat_id=10).exists())
+
+
+class FakeApiHandler(BaseHTTPRequestHandler):
+    """FakeApiHandler class answers requests by responses queued in the
+    server and records the requests"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get('Content-Length', 0))
+        self.server.received.append(
+            (self.path, json.loads(self.rfile.read(length)),
+             self.client_address))
+        status, body, headers = (
+            self.server.responses.pop(0) if self.server.responses
+            else (200, {'ok': True, 'result': True}, {}))
+
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class TransportTest(SimpleTestCase):
+    """TgTransport should retry failed requests with a growing delay, follow
+    retry_after of 429 responses and reuse connections of its pool. The
+    bot API is served by a local HTTP server, delays are recorded instead
+    of sleeping"""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeApiHandler)
+        self.server.daemon_threads = True
+        self.server.responses, self.server.received = [], []
+        thread = threading.Thread(target=self.server.serve_forever,
+                                  kwargs={'poll_interval': 0.05},
+                                  daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        self.transport = TgTransport('token', api_url=self.url, retries=3,
+                                     backoff=0.5)
+        sleep = mock.patch('bot.tg.transport.time.sleep')
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def get_delays(self) -> list:
+        return [call.args[0] for call in self.sleep.call_args_list]
+
+    def test_retries_with_backoff(self):
+        self.server.responses = [
+            (500, {'ok': False}, {}),
+            (502, {'ok': False}, {}),
+            (200, {'ok': True, 'result': [1]}, {}),
+        ]
+
+        response = self.transport.request('getUpdates', {'offset': 5})
+
+        self.assertEqual(response, {'ok': True, 'result': [1]})
+        self.assertEqual(self.get_delays(), [0.5, 1.0])
+        self.assertEqual(
+            [(path, params) for path, params, _ in self.server.received],
+            [('/bottoken/getUpdates', {'offset': 5})] * 3)
+
+    def test_retry_after_of_too_many_requests(self):
+        self.server.responses = [
+            (429, {'ok': False, 'parameters': {'retry_after': 7}}, {}),
+            (429, {'ok': False}, {'Retry-After': '3'}),
+            (200, {'ok': True, 'result': True}, {}),
+        ]
+
+        self.transport.request('sendMessage', {'chat_id': 1, 'text': 'a'})
+
+        self.assertEqual(self.get_delays(), [7.0, 3.0])
+
+    def test_retries_are_limited(self):
+        self.server.responses = [(503, {'ok': False}, {})] * 4
+
+        with self.assertRaises(TgApiError) as context:
+            self.transport.request('sendMessage', {'chat_id': 1})
+
+        self.assertEqual(context.exception.status_code, 503)
+        self.assertEqual(len(self.server.received), 4)
+        self.assertEqual(self.get_delays(), [0.5, 1.0, 2.0])
+
+    def test_client_errors_are_not_retried(self):
+        self.server.responses = [(400, {'ok': False}, {})]
+
+        with self.assertRaises(TgApiError) as context:
+            self.transport.request('sendMessage', {'chat_id': 1})
+
+        self.assertEqual(context.exception.status_code, 400)
+        self.assertEqual(len(self.server.received), 1)
+        self.assertEqual(self.get_delays(), [])
+
+    def test_network_errors_are_retried(self):
+        transport = TgTransport('token', api_url='http://127.0.0.1:9',
+                                retries=2, backoff=0.1)
+
+        with self.assertRaises(TgApiError) as context:
+            transport.request('getMe', {})
+
+        self.assertIsNone(context.exception.status_code)
+        self.assertEqual(self.get_delays(), [0.1, 0.2])
+
+    def test_connections_are_reused(self):
+        for number in range(5):
+            self.transport.request('sendMessage', {'chat_id': number})
+
+        clients = {client for _, _, client in self.server.received}
+        self.assertEqual(len(clients), 1)
+
+    @tag('benchmark')
+    def test_pooled_and_unpooled_requests(self):
+        def measure(send) -> float:
+            started = time.perf_counter()
+            for number in range(100):
+                send(number)
+            return (time.perf_counter() - started) * 10
+
+        url = self.transport.get_url('sendMessage')
+        unpooled = measure(
+            lambda number: requests.post(url, json={'chat_id': number}))
+        pooled = measure(
+            lambda number: self.transport.request(
+                'sendMessage', {'chat_id': number}))
+
+        print('', 'ms per request', f'unpooled: {unpooled:.2f}',
+              f'pooled: {pooled:.2f}', sep='\n')
+
+
+class OffsetTest(SimpleTestCase):
+    """The offset to save should stop at the earliest update which is not
+    handled yet"""
+
+    def test_offset_waits_for_pending_updates(self):
+        pending = PendingUpdates(5)
+        self.assertEqual(pending.offset, 5)
+        self.assertFalse(pending.changed)
+
+        for update_id in (5, 6, 7):
+            pending.add(update_id)
+        pending.done(6)
+        self.assertEqual(pending.offset, 5)
+        self.assertFalse(pending.changed)
+
+        pending.done(5)
+        self.assertEqual(pending.offset, 7)
+        pending.done(7)
+        self.assertEqual(pending.offset, 8)
+        self.assertTrue(pending.changed)
+
+
+class ProcessUpdatesTest(TestCase):
+    """An error of an update should be logged and recorded in the ledger
+    instead of stopping the rest of the batch, telegram users of the batch
+    should be loaded by a single query"""
+
+    def test_failed_update_is_recorded(self):
+        client = TgClient('token', BotActions(MemoryStateStore()))
+        handle_update = client.handle_update
+
+        def fail_second(item, tg_users):
+            if item.update_id == 2:
+                raise ValueError('Broken update')
+            return handle_update(item, tg_users)
+
+        items = [create_update(number, 100 + number) for number in (1, 2, 3)]
+        with mock.patch.object(client, 'handle_update', fail_second):
+            with self.assertLogs('bot.tg.client', 'ERROR') as logs:
+                client.process_updates(items)
+
+        self.assertIn('Failed to handle update 2', logs.output[0])
+        self.assertEqual(
+            set(ProcessedUpdate.objects.values_list('update_id', flat=True)),
+            {1, 2, 3})
+        self.assertEqual(
+            set(OutboxMessage.objects.values_list('chat_id', flat=True)),
+            {101, 103})
+
+
+    def test_tg_users_are_loaded_once_per_batch(self):
+        client = TgClient('token', BotActions(MemoryStateStore()))
+        TgUser.objects.bulk_create(
+            TgUser(tg_id=1000 + number, verification_code='code',
+                   bot_state=TgUser.BotStates.added)
+            for number in range(0, 100, 2))
+
+        # Half of the senders are known and half are new
+        items = [create_update(number, 1000 + number)
+                 for number in range(100)]
+        with CaptureQueriesContext(connection) as queries:
+            client.process_updates(items)
+
+        selects = [query['sql'] for query in queries
+                   if query['sql'].startswith('SELECT')
+                   and 'FROM "bot_tguser"' in query['sql']]
+        self.assertEqual(len(selects), 1)
+        self.assertEqual(OutboxMessage.objects.count(), 100)
+        self.assertEqual(TgUser.objects.count(), 100)
+
+@override_settings(TG_WEBHOOK_SECRET='secret')
+class WebhookTest(TestCase):
+    """Updates of the webhook should be saved before the response and
+    handled in the order of their chats"""
+
+    def post_update(self, payload: dict):
+        return self.client.post(
+            '/bot/webhook', payload, content_type='application/json',
+            HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN='secret')
+
+    def test_updates_are_saved_once(self):
+        with mock.patch('bot.views.dispatcher.notify') as notify:
+            for _ in range(2):
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.post_update(create_payload(1, 10))
+                self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(
+            list(InboxUpdate.objects.values_list('update_id', 'chat_id')),
+            [(1, 10)])
+        self.assertEqual(notify.call_count, 2)
+
+    def test_wrong_secret_is_rejected(self):
+        response = self.client.post(
+            '/bot/webhook', create_payload(1, 10),
+            content_type='application/json',
+            HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN='wrong')
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(InboxUpdate.objects.exists())
+
+    def test_updates_are_handled_in_order(self):
+        for update_id, chat_id in ((3, 10), (1, 10), (2, 20)):
+            InboxUpdate.objects.create(
+                update_id=update_id, chat_id=chat_id,
+                payload=create_payload(update_id, chat_id))
+        client = TgClient('token', BotActions(MemoryStateStore()))
+        dispatcher = UpdateDispatcher(client)
+        handled = []
+
+        def record(item, tg_users=None):
+            handled.append(item.update_id)
+
+        with mock.patch.object(client, 'process_update', record):
+            while dispatcher.handle_next():
+                pass
+
+        self.assertEqual(handled, [1, 2, 3])
+        self.assertFalse(InboxUpdate.objects.exists())
+
+    def test_failed_update_is_removed(self):
+        InboxUpdate.objects.create(
+            update_id=1, chat_id=10, payload=create_payload(1, 10))
+        client = TgClient('token', BotActions(MemoryStateStore()))
+
+        with mock.patch.object(client, 'handle_update',
+                               side_effect=ValueError('Broken update')):
+            with self.assertLogs('bot.tg.client', 'ERROR'):
+                self.assertTrue(UpdateDispatcher(client).handle_next())
+
+        self.assertFalse(InboxUpdate.objects.exists())
+        self.assertTrue(ProcessedUpdate.objects.filter(update_id=1).exists())
+
+
+class OutboxTest(TestCase):
+    """Messages of a chat should be sent in the order they were queued even
+    if an earlier one waits for a retry"""
+
+    def setUp(self):
+        self.transport = mock.Mock(spec=TgTransport)
+        self.worker = OutboxWorker(
+            self.transport, ChatRateLimiter(global_rate=1000, chat_rate=1000))
+
+    def get_sent(self) -> list:
+        return [call.args[1]['text']
+                for call in self.transport.request.call_args_list]
+
+    def test_later_messages_wait_for_retry(self):
+        retry_at = timezone.now() + datetime.timedelta(minutes=1)
+        OutboxMessage.objects.create(chat_id=1, text='first', attempts=1,
+                                     next_attempt_at=retry_at)
+        OutboxMessage.objects.create(chat_id=1, text='second')
+        OutboxMessage.objects.create(chat_id=2, text='other chat')
+
+        self.assertEqual(self.worker.run_once(), 1)
+        self.assertEqual(self.get_sent(), ['other chat'])
+
+        OutboxMessage.objects.filter(text='first').update(
+            next_attempt_at=timezone.now())
+        self.assertEqual(self.worker.run_once(), 1)
+        self.assertEqual(self.worker.run_once(), 1)
+        self.assertEqual(self.get_sent(), ['other chat', 'first', 'second'])
+
+    def test_failed_message_blocks_next_batches(self):
+        self.transport.request.side_effect = [TgApiError('Bad gateway', 502),
+                                              None, None]
+        for text in ('first', 'second'):
+            OutboxMessage.objects.create(chat_id=1, text=text)
+
+        self.worker.run_once()
+        self.assertEqual(self.worker.run_once(), 0)
+
+        # The second message is due before the first one is retried
+        OutboxMessage.objects.filter(text='second').update(
+            next_attempt_at=timezone.now())
+        self.assertEqual(self.worker.run_once(), 0)
+
+        OutboxMessage.objects.filter(text='first').update(
+            next_attempt_at=timezone.now())
+        self.worker.run_once()
+        self.worker.run_once()
+        self.assertEqual(self.get_sent(), ['first', 'first', 'second'])
+        self.assertFalse(OutboxMessage.objects.filter(
+            status=OutboxMessage.Statuses.pending).exists())
+
+    def test_interleaved_claims(self):
+        for text in ('first', 'second'):
+            OutboxMessage.objects.create(chat_id=1, text=text)
+        OutboxMessage.objects.create(chat_id=2, text='other chat')
+        # The first worker takes only the first message of the chat
+        worker = OutboxWorker(self.transport, ChatRateLimiter(), batch_size=1)
+        other = OutboxWorker(self.transport, ChatRateLimiter())
+        claims = []
+        update = QuerySet.update
+        select_for_update = QuerySet.select_for_update
+
+        def lease(queryset, **kwargs):
+            # The other worker claims before the lease of this one is saved,
+            # rows held by this one are skipped as SQLite has no row locks
+            if not claims:
+                held = list(queryset.values_list('id', flat=True))
+                claims.append(held)
+
+                def skip_held(other_queryset, **options):
+                    return select_for_update(
+                        other_queryset.exclude(id__in=held), **options)
+
+                with mock.patch.object(
+                        QuerySet, 'select_for_update', skip_held):
+                    claims.append(other._claim())
+            return update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', lease):
+            messages = worker._claim()
+
+        self.assertEqual([message.text for message in messages], ['first'])
+        self.assertEqual([message.text for message in claims[1]],
+                         ['other chat'])
+
+
+class RemindersTest(TestCase):
+    """Digests should be queued once a day by the same number of queries
+    whatever the number of linked users is"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.localdate()
+        cls.add_users(0, 2)
+
+    @classmethod
+    def add_users(cls, first: int, count: int) -> None:
+        """This method creates linked users with a board of goals due today,
+        tomorrow and later
+        :param first: An integer representing the number of the first user
+        :param count: An integer representing the number of users
+        """
+        numbers = range(first, first + count)
+        users = User.objects.bulk_create(
+            User(username=f'user{number}') for number in numbers)
+        boards = Board.objects.bulk_create(
+            Board(title=f'Board {number}') for number in numbers)
+        Participant.objects.bulk_create(
+            Participant(board=board, user=user, role=Roles.owner)
+            for user, board in zip(users, boards))
+        categories = Category.objects.bulk_create(
+            Category(title='Category', user=user, board=board)
+            for user, board in zip(users, boards))
+        Goal.objects.bulk_create(
+            Goal(title=f'Goal {days}', user=category.user,
+                 board=category.board, category=category,
+                 due_date=cls.today + datetime.timedelta(days=days))
+            for category in categories for days in (0, 1, 2))
+        TgUser.objects.bulk_create(
+            TgUser(tg_id=1000 + number, user=user,
+                   bot_state=TgUser.BotStates.confirmed)
+            for number, user in zip(numbers, users))
+
+    def send_digests(self) -> int:
+        return RunReminders().send_digests(self.today, 100, 10)
+
+    def test_digests_are_queued_once_a_day(self):
+        now = timezone.localtime().replace(hour=10)
+        self.assertFalse(RunReminders.is_due(now.replace(hour=8), 9))
+        self.assertTrue(RunReminders.is_due(now, 9))
+
+        self.assertEqual(self.send_digests(), 2)
+
+        self.assertFalse(RunReminders.is_due(now, 9))
+        self.assertEqual(DigestRun.objects.get(date=self.today).queued, 2)
+        self.assertEqual(
+            OutboxMessage.objects.get(chat_id=1000).text,
+            'Сегодня последний день для целей:\n- Goal 0\n\n'
+            'Завтра наступает срок целей:\n- Goal 1')
+
+    @tag('benchmark')
+    def test_queries_do_not_depend_on_users(self):
+        self.send_digests()
+        with CaptureQueriesContext(connection) as queries:
+            self.send_digests()
+
+        # Only inserts of digests are added, one per batch of 100 digests
+        self.add_users(2, 1000)
+        started = time.perf_counter()
+        with self.assertNumQueries(len(queries) + 10):
+            self.assertEqual(self.send_digests(), 1002)
+        self.assertLess(time.perf_counter() - started, 10)
@@ -0,0 +1,129 @@
+"""This file contains an AsyncBotRunner class to run the telegram bot with
+concurrent handling of updates"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from django.db import close_old_connections
+from bot.tg.client import TgClient
+from bot.tg.dc import Update
+from bot.tg.metrics import QUEUE_DEPTH
+from bot.tg.offsets import PendingUpdates
+
+# -------------------------------------------------------------------------
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBotRunner:
+    """AsyncBotRunner class polls telegram continuously and handles updates
+    of different chats concurrently. Updates of the same chat are handled
+    one by one in the order they were received. Database work and sending
+    of messages run in a bounded thread pool"""
+    def __init__(
+            self, client: TgClient, concurrency: int = 8,
+            max_pending: int = 1000) -> None:
+        """Initialize the AsyncBotRunner class
+        :param client: A TgClient instance handling updates
+        :param concurrency: An integer representing the maximum number of
+        updates handled at the same time
+        :param max_pending: An integer representing the maximum number of
+        received updates waiting for handling, polling stops when it is
+        reached
+        """
+        self._client = client
+        self._concurrency = concurrency
+        self._max_pending = max_pending
+        self._chats: dict[int, asyncio.Queue] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._waiting = 0
+        QUEUE_DEPTH.set_function(lambda: self._waiting, queue='async')
+
+    def start_bot(self) -> None:
+        """This is a main method to start the telegram bot"""
+        asyncio.run(self._run())
+
+    async def _run(self) -> None:
+        """This method polls telegram and dispatches received updates"""
+        self._workers = ThreadPoolExecutor(
+            max_workers=self._concurrency, thread_name_prefix='bot-worker')
+        self._poller = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='bot-poller')
+        self._handling = asyncio.Semaphore(self._concurrency)
+        self._pending = asyncio.Semaphore(self._max_pending)
+        loop = asyncio.get_running_loop()
+        offset = await loop.run_in_executor(
+            self._poller, self._client.load_offset)
+        self._offsets = PendingUpdates(offset)
+
+        while True:
+            try:
+                response = await loop.run_in_executor(
+                    self._poller, self._client.get_updates, offset)
+            except Exception:
+                logger.exception('Failed to get updates')
+                await asyncio.sleep(1)
+                continue
+
+            for item in response.result:
+                offset = item.update_id + 1
+                await self._pending.acquire()
+                self._offsets.add(item.update_id)
+                self._dispatch(item)
+
+            # Only updates handled so far are passed by the saved offset
+            if self._offsets.changed:
+                saved = self._offsets.offset
+                await loop.run_in_executor(
+                    self._poller, self._client.save_offset, saved)
+                self._offsets.saved = saved
+
+    def _dispatch(self, item: Update) -> None:
+        """This method puts the update into the queue of its chat and starts
+        a chat task if there is no one
+        :param item: An instance of Update class
+        """
+        chat_id = item.message.chat.id
+        queue = self._chats.get(chat_id)
+
+        if queue is None:
+            queue = self._chats[chat_id] = asyncio.Queue()
+            task = asyncio.create_task(self._process_chat(chat_id, queue))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        queue.put_nowait(item)
+        self._waiting += 1
+
+    async def _process_chat(self, chat_id: int, queue: asyncio.Queue) -> None:
+        """This method handles updates of a single chat in order and
+        finishes when the queue of the chat is empty
+        :param chat_id: An integer representing the telegram chat id
+        :param queue: A queue containing updates of the chat
+        """
+        loop = asyncio.get_running_loop()
+
+        while not queue.empty():
+            item = queue.get_nowait()
+            try:
+                async with self._handling:
+                    await loop.run_in_executor(
+                        self._workers, self._handle_update, item)
+            except Exception:
+                logger.exception('Failed to handle update %s', item.update_id)
+            finally:
+                self._waiting -= 1
+                self._pending.release()
+                self._offsets.done(item.update_id)
+
+        del self._chats[chat_id]
+
+    def _handle_update(self, item: Update) -> None:
+        """This method handles the update and queues the answer in a thread
+        of the pool
+        :param item: An instance of Update class
+        """
+        close_old_connections()
+        try:
+            self._client.process_update_safely(item)
+        finally:
+            close_old_connections()
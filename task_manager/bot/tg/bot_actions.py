@@ -1,94 +1,218 @@
 """This unit contains a BotActions class with actions for different states
 of telegram bot"""
 import os
-from django.utils import timezone
 from bot.models import TgUser
-from bot.tg.dc import Update
+from bot.tg.state import BaseStateStore, get_state_store
+from django.db.models import QuerySet
 from goals.models import Goal, Status, Category, Roles
 
 # --------------------------------------------------------------------------
 
+PAGE_SIZE = 20
+TITLE_LENGTH = 150
+LISTINGS = {
+    'goals': ('Список ваших целей:', 'У вас нет активных целей'),
+    'categories': (
+        'Введите номер или название категории:', 'У вас нет категорий'),
+    'remove': ('Введите номер или имя цели:', 'У вас нет активных целей'),
+}
+
 
 class BotActions:
     """The BotActions class providing necessary action methods"""
-    def __init__(self) -> None:
-        """Initialize the BotActions class"""
-        self._user_category = {}
+    def __init__(self, state_store: BaseStateStore | None = None) -> None:
+        """Initialize the BotActions class
+        :param state_store: A state store to keep dialogs of users, the
+        store configured by TG_STATE_STORE setting is used by default
+        """
+        self._state = state_store or get_state_store()
 
     @staticmethod
-    def confirm_user(update_obj: Update, new_code: str) -> str:
+    def confirm_user(tg_user: TgUser, new_code: str) -> str:
         """This method used for confirm state of telegram bot
-        :param update_obj: An instance of Update class
+        :param tg_user: An instance of TgUser class
         :param new_code: A string representing randomly generated code
         :return: A string representing the message to send to telegram bot
         """
         message = (f'Пожалуйста подтвердите свой аккаунт.\n'
                    f'Введите на сайте следующий код: {new_code}')
 
-        TgUser.objects.filter(
-            username=update_obj.message.from_.username
-        ).update(verification_code=new_code)
+        tg_user.verification_code = new_code
+        tg_user.save(update_fields=['verification_code'])
 
         return message
 
-    @staticmethod
-    def get_user_goals(tg_user: TgUser) -> str:
-        """This method used to get all available goals of provided user
+    def get_user_goals(self, tg_user: TgUser) -> str:
+        """This method used to get the first page of available goals of
+        provided user
         :param tg_user: An instance of TgUser class
         :return: A string representing the list of user's goals
         """
-        Goal.objects.filter(
-            due_date__lt=timezone.now().date()).update(status=Status.archived)
+        return self._show_page(tg_user, 'goals')
 
-        goals = Goal.objects.select_related("category").filter(
-            category__board__participants__user=tg_user.user,
-            status__lt=Status.archived,
-        )
+    def get_user_categories(self, tg_user: TgUser) -> str:
+        """This method used to get the first page of available categories of
+        provided user
+        :param tg_user: An instance of TgUser class
+        :return: A string representing the list of user's categories
+        """
+        tg_user.bot_state = TgUser.BotStates.wait_category
+        tg_user.save()
 
-        goals_list = [f'{num}: {goal.title}'
-                      for num, goal in enumerate(goals, 1)]
+        return self._show_page(tg_user, 'categories')
 
-        return ('Список ваших целей:\n' + '\n'.join(goals_list)
-                if goals_list else 'У вас нет активных целей')
+    def get_removable_goals(self, tg_user: TgUser) -> str:
+        """This method used to get the first page of goals provided user can
+        remove
+        :param tg_user: An instance of TgUser class
+        :return: A string representing the list of user's goals
+        """
+        tg_user.bot_state = TgUser.BotStates.remove_goal
+        tg_user.save()
+
+        return self._show_page(tg_user, 'remove')
+
+    def turn_page(self, tg_user: TgUser, forward: bool) -> str:
+        """This method used to show the next or the previous page of the
+        last shown list
+        :param tg_user: An instance of TgUser class
+        :param forward: True to show the next page, False for the previous
+        :return: A string representing the page
+        """
+        state = self._state.get(tg_user)
+        listing = state.get('listing')
+        if listing not in LISTINGS:
+            return 'Нет списка для перелистывания'
+
+        if forward and not state.get('has_next'):
+            return 'Это последняя страница'
+        if not forward and not state.get('has_prev'):
+            return 'Это первая страница'
+
+        items = state['items']
+        if forward:
+            return self._show_page(tg_user, listing, after=items[-1][0])
+        return self._show_page(tg_user, listing, before=items[0][0])
 
     @staticmethod
-    def get_user_categories(tg_user: TgUser) -> str:
-        """This method used to get all available categories of provided user
+    def _get_listing_queryset(listing: str, tg_user: TgUser) -> QuerySet:
+        """This secondary method returns a queryset of the listing
+        :param listing: A string representing the name of the listing
         :param tg_user: An instance of TgUser class
-        :return: A string representing the list of user's categories
+        :return: A QuerySet instance
         """
-        categories = Category.objects.filter(
-            is_deleted=False,
-            board__participants__user=tg_user.user,
-            board__participants__role__in=[Roles.owner, Roles.writer],
+        if listing == 'categories':
+            return Category.objects.filter(
+                is_deleted=False,
+                board__participants__user_id=tg_user.user_id,
+                board__participants__role__in=[Roles.owner, Roles.writer],
+            )
+
+        # Conditions of the participant are put in a single filter call, so
+        # they apply to the same row of the join
+        participant = {'board__participants__user_id': tg_user.user_id}
+        if listing == 'remove':
+            participant['board__participants__role__in'] = [
+                Roles.owner, Roles.writer]
+
+        return Goal.objects.active().filter(**participant)
+
+    @staticmethod
+    def _select_item(state: dict, listing: str, text: str) -> list | None:
+        """This secondary method finds a row of the last shown page by its
+        number or its title
+        :param state: A dictionary containing the state of the user
+        :param listing: A string representing the expected listing
+        :param text: A string representing the number or the title
+        :return: A list containing the id and the title of the row or None
+        if there is no such row
+        """
+        if state.get('listing') != listing:
+            return None
+
+        items = state['items']
+        text = text.strip()
+        if text.isdigit():
+            number = int(text)
+            return items[number - 1] if 0 < number <= len(items) else None
+
+        return next((item for item in items if item[1] == text), None)
+
+    def _show_page(
+            self, tg_user: TgUser, listing: str, after: int | None = None,
+            before: int | None = None) -> str:
+        """This secondary method loads a page of the listing by a keyset
+        cursor and saves rows of the page in the state of the user, so they
+        can be selected by numbers
+        :param tg_user: An instance of TgUser class
+        :param listing: A string representing the name of the listing
+        :param after: An integer representing the id the page starts after
+        :param before: An integer representing the id the page ends before
+        :return: A string representing the page
+        """
+        queryset = self._get_listing_queryset(
+            listing, tg_user).values_list('id', 'title')
+
+        if before is not None:
+            rows = list(
+                queryset.filter(id__lt=before).order_by('-id')[:PAGE_SIZE + 1])
+            has_prev, has_next = len(rows) > PAGE_SIZE, True
+            rows = rows[:PAGE_SIZE][::-1]
+        else:
+            if after is not None:
+                queryset = queryset.filter(id__gt=after)
+            rows = list(queryset.order_by('id')[:PAGE_SIZE + 1])
+            has_prev, has_next = after is not None, len(rows) > PAGE_SIZE
+            rows = rows[:PAGE_SIZE]
+
+        header, empty = LISTINGS[listing]
+        if not rows:
+            self._state.update(tg_user, listing=None)
+            return empty
+
+        items = [[pk, title[:TITLE_LENGTH]] for pk, title in rows]
+        self._state.update(
+            tg_user,
+            listing=listing,
+            items=items,
+            has_prev=has_prev,
+            has_next=has_next,
         )
-        tg_user.bot_state = TgUser.BotStates.wait_category
-        tg_user.save()
 
-        categories_list = [f'{num}: {category.title}'
-                           for num, category in enumerate(categories, 1)]
+        lines = [f'{num}: {title}' for num, (_, title) in enumerate(items, 1)]
+        if has_prev:
+            lines.append('/prev - предыдущая страница')
+        if has_next:
+            lines.append('/next - следующая страница')
 
-        return ('Введите название категории:\n' + '\n'.join(categories_list)
-                if categories_list else 'У вас нет категорий')
+        return header + '\n' + '\n'.join(lines)
 
     def set_category(self, category: str, tg_user: TgUser) -> str:
         """This method used to check provided category and save it for
-        current user if category exists
+        current user if category exists. The category is chosen among the
+        shown ones by its number or title
         :param tg_user: An instance of TgUser class
-        :param category: A string representing the category title to save
+        :param category: A string representing the number or the title of
+        the category to save
         :return: A string representing the result of the operation
         """
-        if Category.objects.filter(
-                is_deleted=False, title=category,
-                board__participants__user=tg_user.user,
+        state = self._state.get(tg_user)
+        item = self._select_item(state, 'categories', category)
+        board_id = None
+        if item is not None:
+            board_id = Category.objects.filter(
+                id=item[0], is_deleted=False,
+                board__participants__user_id=tg_user.user_id,
                 board__participants__role__in=[Roles.owner, Roles.writer],
-        ).exists():
+            ).values_list('board_id', flat=True).first()
 
-            self._user_category[tg_user.username] = category
+        if board_id is not None:
+            self._state.set(
+                tg_user, {**state, 'category_id': item[0], 'board_id': board_id})
             tg_user.bot_state = TgUser.BotStates.wait_title
             tg_user.save()
 
-            return f'Категория {category} сохранена успешно, введите имя цели'
+            return f'Категория {item[1]} сохранена успешно, введите имя цели'
 
         return 'Категория указана неверно, попробуйте еще раз, пожалуйста'
 
@@ -101,39 +225,54 @@ class BotActions:
         if not title:
             return 'Название цели не может быть пустым'
 
-        category = Category.objects.get(
-            title=self._user_category[tg_user.username])
+        state = self._state.get(tg_user)
+        category = Category.objects.filter(
+            id=state.get('category_id'),
+            board_id=state.get('board_id'),
+            is_deleted=False,
+            board__participants__user_id=tg_user.user_id,
+            board__participants__role__in=[Roles.owner, Roles.writer],
+        ).only('id', 'board_id').first()
+        if category is None:
+            self.cancel_request(tg_user)
+            return 'Категория больше не доступна, начните заново с /create'
+
         new_goal = Goal.objects.create(
-             title=title, user=tg_user.user, category=category)
+             title=title, user_id=tg_user.user_id, category=category)
 
         tg_user.bot_state = TgUser.BotStates.confirmed
         tg_user.save()
+        self._state.clear(tg_user)
 
         host = os.environ.get('WEB_HOST')
         goal_url = f'{host}/categories/goals?goal={new_goal.pk}'
 
         return f'Цель успешно создана и доступна по ссылке: {goal_url}'
 
-    @staticmethod
-    def remove_goal(title: str, tg_user: TgUser) -> str:
-        """This method used to remove existing goal
+    def remove_goal(self, text: str, tg_user: TgUser) -> str:
+        """This method used to remove existing goal. The goal is chosen
+        among the shown ones by its number or title
         :param tg_user: An instance of TgUser class
-        :param title: A string representing the goal's title to create
+        :param text: A string representing the number or the title of the
+        goal to remove
         :return: A string representing the result of the operation
         """
-        goal = Goal.objects.select_related("category").filter(
-            category__board__participants__user=tg_user.user,
-            category__board__participants__role__in=[Roles.owner, Roles.writer],
-            status__lt=Status.archived,
-            title=title,
-        )
-        if goal.exists():
-            goal.update(status=Status.archived)
-            tg_user.bot_state = TgUser.BotStates.confirmed
-            tg_user.save()
-            return f'Цель {title} успешно удалена'
+        item = self._select_item(self._state.get(tg_user), 'remove', text)
+        if item is None:
+            return f'Не могу найти вашу цель {text}, проверьте данные'
+
+        removed = Goal.objects.active().filter(
+            id=item[0],
+            board__participants__user_id=tg_user.user_id,
+            board__participants__role__in=[Roles.owner, Roles.writer],
+        ).update(status=Status.archived)
+        if not removed:
+            return f'Цель {item[1]} больше не доступна'
 
-        return f'Не могу найти вашу цель с именем {title}, проверьте данные'
+        tg_user.bot_state = TgUser.BotStates.confirmed
+        tg_user.save()
+        self._state.clear(tg_user)
+        return f'Цель {item[1]} успешно удалена'
 
     def cancel_request(self, tg_user: TgUser) -> str:
         """This method used to cancel a requested action
@@ -142,6 +281,6 @@ class BotActions:
         """
         tg_user.bot_state = TgUser.BotStates.confirmed
         tg_user.save()
-        self._user_category.pop(tg_user.username, None)
+        self._state.clear(tg_user)
 
         return f'Запрос отменен успешно'
@@ -1,14 +1,36 @@
 """This file contains a TgClient class to manage telegram bot"""
+import datetime
+import logging
+import time
 from string import ascii_lowercase, digits
 from random import choice
-import requests
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
 from marshmallow_dataclass import class_schema
-from bot.models import TgUser
+from bot.models import ProcessedUpdate, TgUser, UpdateOffset
 from bot.tg.bot_actions import BotActions
 from bot.tg.dc import GetUpdatesResponse, SendMessageResponse, Update
+from bot.tg.metrics import (
+    SKIPPED_UPDATES,
+    UPDATE_ERRORS,
+    UPDATE_QUERIES,
+    UPDATE_SECONDS,
+)
+from bot.tg.outbox import enqueue_message
+from bot.tg.transport import TgTransport
 
 # -------------------------------------------------------------------------
 
+GET_UPDATES_SCHEMA = class_schema(GetUpdatesResponse)()
+SEND_MESSAGE_SCHEMA = class_schema(SendMessageResponse)()
+UPDATE_SCHEMA = class_schema(Update)()
+OFFSET_NAME = 'polling'
+PRUNE_INTERVAL = 3600
+COMMANDS = ('/goals', '/create', '/remove', '/next', '/prev', '/cancel')
+
+logger = logging.getLogger(__name__)
+
 
 class TgClient:
     """TgClient class contains methods to manage telegram bot"""
@@ -17,22 +39,15 @@ class TgClient:
         :param token: A string representing the telegram bot token
         :param bot_actions: A BotActions instance
         """
-        self._token = token
+        self._transport = TgTransport(token)
         self._bot_actions = bot_actions
+        self._pruned_at = None
         self._actions = {
             TgUser.BotStates.remove_goal: self._bot_actions.remove_goal,
             TgUser.BotStates.wait_category: self._bot_actions.set_category,
             TgUser.BotStates.wait_title: self._bot_actions.create_goal
         }
 
-    def get_url(self, method: str) -> str:
-        """This method returns the configured telegram url
-        :param method: A string representing a method to add in telegram url
-        :return: A string representing the telegram url with token and
-        requested method
-        """
-        return f'https://api.telegram.org/bot{self._token}/{method}'
-
     def get_updates(
             self, offset: int = 0, timeout: int = 60) -> GetUpdatesResponse:
         """This method serves to send update request to telegram API,
@@ -43,15 +58,9 @@ class TgClient:
         response
         :return: A GetUpdatesResponse instance
         """
-        url = self.get_url('getUpdates')
-        updates_url = f'{url}?offset={offset}&timeout={timeout}'
-        response = requests.get(updates_url)
-
-        if not response:
-            raise NotImplementedError
-
-        updates_response_schema = class_schema(GetUpdatesResponse)()
-        result = updates_response_schema.load(response.json())
+        response = self._transport.request(
+            'getUpdates', {'offset': offset, 'timeout': timeout}, timeout)
+        result = GET_UPDATES_SCHEMA.load(response)
 
         return result
 
@@ -62,51 +71,235 @@ class TgClient:
         :return: A SendMessageResponse instance containing a result of the
         operation
         """
-        url = self.get_url('sendMessage')
-        message_url = f'{url}?chat_id={chat_id}&text={message}'
-        response = requests.get(message_url)
+        response = self._transport.request(
+            'sendMessage', {'chat_id': chat_id, 'text': message})
+        result = SEND_MESSAGE_SCHEMA.load(response)
+        return result
 
-        if not response:
-            raise NotImplementedError
+    def set_webhook(self, url: str, secret_token: str) -> None:
+        """This method serves to make telegram send updates to the webhook
+        :param url: A string representing the url of the webhook
+        :param secret_token: A string telegram sends in the
+        X-Telegram-Bot-Api-Secret-Token header of every request
+        """
+        self._transport.request(
+            'setWebhook', {'url': url, 'secret_token': secret_token})
 
-        message_response_schema = class_schema(SendMessageResponse)()
-        result = message_response_schema.load(response.json())
-        return result
+    def delete_webhook(self) -> None:
+        """This method serves to remove the webhook to receive updates by
+        long polling"""
+        self._transport.request('deleteWebhook', {})
 
     def start_bot(self) -> None:
         """This is a main method to start the telegram bot"""
-        offset = 0
+        offset = self.load_offset()
 
         while True:
             response = self.get_updates(offset=offset)
-            new_code = self._generate_code()
-            for item in response.result:
-                offset = item.update_id + 1
-                print(item.message)
+            self.process_updates(response.result)
+            if response.result:
+                offset = response.result[-1].update_id + 1
+                self.save_offset(offset)
+
+    @staticmethod
+    def load_offset() -> int:
+        """This method returns the saved offset of the next update
+        :return: An integer representing the offset, 0 if it wasn't saved
+        """
+        offset = UpdateOffset.objects.filter(
+            name=OFFSET_NAME).values_list('offset', flat=True).first()
+        return offset or 0
+
+    @staticmethod
+    def save_offset(offset: int) -> None:
+        """This method saves the offset of the next update
+        :param offset: An integer representing the offset
+        """
+        UpdateOffset.objects.update_or_create(
+            name=OFFSET_NAME, defaults={'offset': offset})
+
+    def process_updates(self, items: list[Update]) -> None:
+        """This method handles a batch of updates, already processed updates
+        are skipped and telegram users of the batch are loaded by a single
+        query
+        :param items: A list of Update instances
+        """
+        processed = set(ProcessedUpdate.objects.filter(
+            update_id__in=[item.update_id for item in items]
+        ).values_list('update_id', flat=True))
+        items = [item for item in items if item.update_id not in processed]
+        SKIPPED_UPDATES.inc(len(processed))
+
+        tg_users = self.get_tg_users(items)
+        for item in items:
+            self.process_update_safely(item, tg_users)
+
+    def process_update_safely(
+            self, item: Update,
+            tg_users: dict[int, TgUser] | None = None) -> None:
+        """This method handles a single update, an error of the update is
+        logged and the update is recorded as processed, so it is not handled
+        again after a restart and doesn't stop other updates
+        :param item: An instance of Update class
+        :param tg_users: A dictionary of preloaded telegram users where keys
+        are telegram user ids, they are loaded if it isn't provided
+        """
+        try:
+            self.process_update(item, tg_users)
+        except Exception:
+            logger.exception('Failed to handle update %s', item.update_id)
+            self._mark_processed(item)
+            if tg_users is not None:
+                # The user could be changed by the rolled back transaction
+                tg_users.pop(item.message.from_.id, None)
+                tg_users.update(self.get_tg_users([item]))
+
+    def process_update(
+            self, item: Update,
+            tg_users: dict[int, TgUser] | None = None) -> None:
+        """This method handles a single update and queues the answer in the
+        same transaction, the answer is sent by the outbox worker. The update
+        is recorded in the same transaction too, so a repeated update is
+        skipped
+        :param item: An instance of Update class
+        :param tg_users: A dictionary of preloaded telegram users where keys
+        are telegram user ids, they are loaded if it isn't provided
+        """
+        labels = {'command': self._get_command(item), 'state': 'skipped'}
+        queries = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count_query):
+                self._process_update(item, tg_users, labels)
+        except Exception:
+            UPDATE_ERRORS.inc(**labels)
+            raise
+        finally:
+            UPDATE_SECONDS.observe(time.perf_counter() - started, **labels)
+            UPDATE_QUERIES.observe(queries)
+
+        self._prune_processed()
+
+    def _process_update(
+            self, item: Update, tg_users: dict[int, TgUser] | None,
+            labels: dict[str, str]) -> None:
+        """This secondary method handles the update in a transaction and
+        sets the state label of metrics to the state of the user before
+        handling
+        :param item: An instance of Update class
+        :param tg_users: A dictionary of preloaded telegram users or None
+        :param labels: A dictionary containing labels of metrics
+        """
+        with transaction.atomic():
+            if not self._mark_processed(item):
+                SKIPPED_UPDATES.inc()
+                return
+
+            if tg_users is None:
+                tg_users = self.get_tg_users([item])
 
-                username = item.message.from_.username
-                tg_user_queryset = TgUser.objects.filter(username=username)
-                tg_user = tg_user_queryset.first()
+            tg_user = tg_users.get(item.message.from_.id)
+            labels['state'] = TgUser.BotStates(tg_user.bot_state).name \
+                if tg_user else 'new'
 
-                if not tg_user_queryset.exists():
+            message = self.handle_update(item, tg_users)
+            enqueue_message(item.message.chat.id, message)
 
-                    message = (f'Привет {item.message.from_.first_name}.\n'
-                               f'Ваш код верификации: {new_code}')
-                    self._create_tg_user(item, new_code)
+    @staticmethod
+    def get_tg_users(items: list[Update]) -> dict[int, TgUser]:
+        """This method loads telegram users who sent the updates
+        :param items: A list of Update instances
+        :return: A dictionary where keys are telegram user ids and values
+        are TgUser instances
+        """
+        tg_ids = {item.message.from_.id for item in items}
+        if not tg_ids:
+            return {}
 
-                elif tg_user.bot_state == TgUser.BotStates.added:
-                    message = self._bot_actions.confirm_user(item, new_code)
+        return {
+            tg_user.tg_id: tg_user
+            for tg_user in TgUser.objects.filter(tg_id__in=tg_ids)
+        }
 
-                elif tg_user.bot_state == TgUser.BotStates.confirmed:
+    def handle_update(self, item: Update, tg_users: dict[int, TgUser]) -> str:
+        """This method handles a single update according to the state of
+        the telegram user
+        :param item: An instance of Update class
+        :param tg_users: A dictionary of loaded telegram users where keys are
+        telegram user ids, a created user is added into it
+        :return: A string representing the message to send to telegram bot
+        """
+        logger.info(
+            'Update %s from %s: %s', item.update_id, item.message.from_.id,
+            item.message.text)
+        new_code = self._generate_code()
+        tg_user = tg_users.get(item.message.from_.id)
 
-                    message = self._get_confirmed_user_options(item, tg_user)
+        if tg_user is None:
 
-                else:
-                    message = self._get_state_options(item, tg_user)
+            message = (f'Привет {item.message.from_.first_name}.\n'
+                       f'Ваш код верификации: {new_code}')
+            tg_users[item.message.from_.id] = self._create_tg_user(
+                item, new_code)
 
-                message_response = self.send_message(
-                    item.message.chat.id, message)
-                print(message_response)
+        elif tg_user.bot_state == TgUser.BotStates.added:
+            message = self._bot_actions.confirm_user(tg_user, new_code)
+
+        elif tg_user.bot_state == TgUser.BotStates.confirmed:
+
+            message = self._get_confirmed_user_options(item, tg_user)
+
+        else:
+            message = self._get_state_options(item, tg_user)
+
+        return message
+
+    @staticmethod
+    def _get_command(item: Update) -> str:
+        """This secondary method returns the command of the update to label
+        metrics, any other text is labeled as a single value
+        :param item: An instance of Update class
+        :return: A string representing the command
+        """
+        text = item.message.text
+        if text in COMMANDS:
+            return text
+
+        return 'other' if text.startswith('/') else 'text'
+
+    @staticmethod
+    def _mark_processed(item: Update) -> bool:
+        """This secondary method records the update as processed
+        :param item: An instance of Update class
+        :return: False if the update was already processed
+        """
+        try:
+            with transaction.atomic():
+                ProcessedUpdate.objects.create(update_id=item.update_id)
+        except IntegrityError:
+            return False
+
+        return True
+
+    def _prune_processed(self) -> None:
+        """This secondary method deletes records of processed updates older
+        than TG_PROCESSED_UPDATES_RETENTION hours, it works once an hour"""
+        now = time.monotonic()
+        if (self._pruned_at is not None
+                and now - self._pruned_at < PRUNE_INTERVAL):
+            return
+
+        self._pruned_at = now
+        ProcessedUpdate.objects.filter(
+            processed__lt=timezone.now() - datetime.timedelta(
+                hours=settings.TG_PROCESSED_UPDATES_RETENTION)
+        ).delete()
 
     @staticmethod
     def _generate_code() -> str:
@@ -120,13 +313,14 @@ class TgClient:
         return ''.join(new_code)
 
     @staticmethod
-    def _create_tg_user(item: Update, new_code: str) -> None:
+    def _create_tg_user(item: Update, new_code: str) -> TgUser:
         """This method creates a new telegram user
         :param item: An instance of Update class
         :param new_code: A string representing a random code
+        :return: A created TgUser instance
         """
-        TgUser.objects.create(
-            tg_id=item.message.chat.id,
+        return TgUser.objects.create(
+            tg_id=item.message.from_.id,
             username=item.message.from_.username,
             verification_code=new_code,
             bot_state=TgUser.BotStates.added
@@ -148,11 +342,14 @@ class TgClient:
             )
 
         elif item.message.text == '/remove':
-            message = 'Введите имя цели:\n' + self._bot_actions.get_user_goals(
+            message = self._bot_actions.get_removable_goals(
                 tg_user
             )
-            tg_user.bot_state = TgUser.BotStates.remove_goal
-            tg_user.save()
+
+        elif item.message.text in ('/next', '/prev'):
+            message = self._bot_actions.turn_page(
+                tg_user, item.message.text == '/next'
+            )
 
         else:
             message = 'Неизвестная команда'
@@ -170,6 +367,10 @@ class TgClient:
             message = self._bot_actions.cancel_request(
                 tg_user
             )
+        elif item.message.text in ('/next', '/prev'):
+            message = self._bot_actions.turn_page(
+                tg_user, item.message.text == '/next'
+            )
         else:
             action = self._actions.get(tg_user.bot_state)
             if not action:
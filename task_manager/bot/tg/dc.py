@@ -1,7 +1,7 @@
 """This file contains dataclasses representing different parts of telegram API
 response"""
 from dataclasses import field
-from typing import List
+from typing import List, Optional
 from marshmallow import EXCLUDE
 from marshmallow_dataclass import dataclass
 # -------------------------------------------------------------------------
@@ -12,7 +12,7 @@ class MessageFrom:
     """MessageFrom class represents a user sent a message"""
     id: int
     first_name: str
-    username: str
+    username: Optional[str] = None
     last_name: str = ''
 
     class Meta:
@@ -24,9 +24,9 @@ class Chat:
     """Chat class represents chat the message was sent from"""
     id: int
     type: str
-    first_name: str
-    username: str
-    last_name: str
+    first_name: str = ''
+    username: Optional[str] = None
+    last_name: str = ''
 
     class Meta:
         unknown = EXCLUDE
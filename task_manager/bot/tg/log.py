@@ -0,0 +1,54 @@
+"""This file contains functions to configure sampled logging of the telegram
+bot through a background thread"""
+import logging
+import os
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+# -------------------------------------------------------------------------
+
+LOG_FORMAT = '%(asctime)s %(levelname)s %(processName)s %(name)s %(message)s'
+
+
+class SamplingFilter(logging.Filter):
+    """SamplingFilter class passes a share of records below WARNING level,
+    warnings and errors are always passed"""
+    def __init__(self, rate: float) -> None:
+        """Initialize the SamplingFilter class
+        :param rate: A float from 0 to 1 representing the share of records
+        to pass
+        """
+        super().__init__()
+        self._rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or random.random() < self._rate
+
+
+def setup_logging(
+        sample_rate: float, level: int = logging.INFO) -> QueueListener:
+    """This function makes loggers of the bot put sampled records into a
+    queue, so the handling loop doesn't wait for output. The records are
+    written by a listener thread, forked processes start their own one
+    :param sample_rate: A float representing the share of records below
+    WARNING level to write
+    :param level: An integer representing the minimal level of records
+    :return: A started QueueListener instance
+    """
+    records = queue.SimpleQueue()
+    handler = QueueHandler(records)
+    handler.addFilter(SamplingFilter(sample_rate))
+
+    output = logging.StreamHandler()
+    output.setFormatter(logging.Formatter(LOG_FORMAT))
+    listener = QueueListener(records, output)
+
+    logger = logging.getLogger('bot')
+    logger.setLevel(level)
+    logger.addHandler(handler)
+    logger.propagate = False
+
+    listener.start()
+    os.register_at_fork(
+        after_in_child=lambda: QueueListener(records, output).start())
+    return listener
@@ -0,0 +1,210 @@
+"""This file contains metric classes of the telegram bot and an HTTP server
+exposing them in the Prometheus text format"""
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+# -------------------------------------------------------------------------
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float('inf'))
+REGISTRY = []
+
+
+class Metric:
+    """Metric class is a base class of metrics with labels. Values of every
+    combination of labels are kept separately"""
+    type = ''
+
+    def __init__(
+            self, name: str, documentation: str,
+            labels: tuple[str, ...] = ()) -> None:
+        """Initialize the Metric class
+        :param name: A string representing the name of the metric
+        :param documentation: A string describing the metric
+        :param labels: A tuple containing names of labels
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def render(self) -> list[str]:
+        """This method returns lines of the metric in the text format"""
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} {self.type}']
+        with self._lock:
+            values = self._copy_values()
+
+        for key, value in values:
+            lines.extend(self._render_value(key, value))
+
+        return lines
+
+    def _copy_values(self) -> list[tuple]:
+        """This secondary method returns a copy of values to render them
+        without the lock"""
+        return list(self._values.items())
+
+    def _render_value(self, key: tuple, value) -> list[str]:
+        """This secondary method returns lines of a value of the labels"""
+        return [f'{self.name}{self._format_labels(key)} {value}']
+
+    def _get_key(self, labels: dict) -> tuple:
+        """This secondary method returns a key of values of the labels"""
+        return tuple(str(labels.get(label, '')) for label in self.labels)
+
+    def _format_labels(self, key: tuple, **extra) -> str:
+        """This secondary method formats labels of the key as a string"""
+        pairs = [*zip(self.labels, key), *extra.items()]
+        if not pairs:
+            return ''
+
+        escaped = (
+            f'{name}="{self._escape(value)}"' for name, value in pairs)
+        return '{' + ','.join(escaped) + '}'
+
+    @staticmethod
+    def _escape(value) -> str:
+        """This secondary method escapes a value of a label"""
+        return str(value).replace('\\', '\\\\').replace(
+            '"', '\\"').replace('\n', '\\n')
+
+
+class Counter(Metric):
+    """Counter class represents a value that only grows"""
+    type = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """This method increases the counter of the labels"""
+        key = self._get_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Gauge class represents a value that can go up and down or a value
+    read by a callback when the metrics are collected"""
+    type = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        """This method sets the value of the labels"""
+        with self._lock:
+            self._values[self._get_key(labels)] = value
+
+    def set_function(self, function: Callable[[], float], **labels) -> None:
+        """This method makes the value of the labels be read by the function
+        when the metrics are collected"""
+        with self._lock:
+            self._values[self._get_key(labels)] = function
+
+    def _render_value(self, key: tuple, value) -> list[str]:
+        return super()._render_value(
+            key, value() if callable(value) else value)
+
+
+class Histogram(Metric):
+    """Histogram class counts observed values by buckets"""
+    type = 'histogram'
+
+    def __init__(
+            self, name: str, documentation: str,
+            labels: tuple[str, ...] = (),
+            buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        """Initialize the Histogram class
+        :param buckets: A tuple containing sorted upper bounds of buckets,
+        the last one should be infinity
+        """
+        super().__init__(name, documentation, labels)
+        self.buckets = buckets
+
+    def observe(self, value: float, **labels) -> None:
+        """This method adds the value to the histogram of the labels"""
+        key = self._get_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(
+                key, ([0] * len(self.buckets), 0))
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def _copy_values(self) -> list[tuple]:
+        return [(key, (list(counts), total))
+                for key, (counts, total) in self._values.items()]
+
+    def _render_value(self, key: tuple, value) -> list[str]:
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            labels = self._format_labels(
+                key, le='+Inf' if bound == float('inf') else bound)
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+
+        lines.append(f'{self.name}_sum{self._format_labels(key)} {total}')
+        lines.append(
+            f'{self.name}_count{self._format_labels(key)} {cumulative}')
+        return lines
+
+
+def render_metrics() -> str:
+    """This function returns all metrics in the Prometheus text format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """MetricsHandler class serves metrics at /metrics"""
+    def do_GET(self) -> None:
+        """This method returns metrics or 404 for other paths"""
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+
+        body = render_metrics().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        """Requests of the scraper are not logged"""
+
+
+def start_metrics_server(port: int) -> ThreadingHTTPServer:
+    """This function starts an HTTP server of metrics in a daemon thread
+    :param port: An integer representing the port to listen
+    :return: A started ThreadingHTTPServer instance
+    """
+    server = ThreadingHTTPServer(('', port), MetricsHandler)
+    threading.Thread(
+        target=server.serve_forever, name='bot-metrics', daemon=True).start()
+    return server
+
+
+UPDATE_SECONDS = Histogram(
+    'bot_update_seconds', 'Time to handle an update',
+    ('command', 'state'))
+UPDATE_ERRORS = Counter(
+    'bot_update_errors_total', 'Updates failed to handle',
+    ('command', 'state'))
+UPDATE_QUERIES = Histogram(
+    'bot_update_db_queries', 'Database queries made to handle an update',
+    buckets=(1, 2, 5, 10, 20, 50, 100, float('inf')))
+SKIPPED_UPDATES = Counter(
+    'bot_skipped_updates_total', 'Repeated updates skipped by the ledger')
+TELEGRAM_SECONDS = Histogram(
+    'bot_telegram_request_seconds', 'Latency of telegram bot API requests',
+    ('method',))
+TELEGRAM_ERRORS = Counter(
+    'bot_telegram_errors_total', 'Failed attempts of telegram bot API '
+    'requests', ('method', 'reason'))
+QUEUE_DEPTH = Gauge(
+    'bot_queue_depth', 'Updates waiting for handling', ('queue',))
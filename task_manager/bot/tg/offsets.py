@@ -0,0 +1,42 @@
+"""This file contains a PendingUpdates class tracking which received updates
+are still being handled, so the saved offset never passes an update which
+was not handled"""
+# -------------------------------------------------------------------------
+
+
+class PendingUpdates:
+    """PendingUpdates class keeps ids of received updates until they are
+    handled. The offset to save is the id of the earliest pending update,
+    updates after it which were already handled are skipped by the ledger
+    of processed updates when telegram sends them again"""
+    def __init__(self, offset: int = 0) -> None:
+        """Initialize the PendingUpdates class
+        :param offset: An integer representing the saved offset
+        """
+        self._pending: set[int] = set()
+        self._received = offset
+        self.saved = offset
+
+    def add(self, update_id: int) -> None:
+        """This method records a received update
+        :param update_id: An integer representing the id of the update
+        """
+        self._pending.add(update_id)
+        self._received = max(self._received, update_id + 1)
+
+    def done(self, update_id: int) -> None:
+        """This method records a handled update
+        :param update_id: An integer representing the id of the update
+        """
+        self._pending.discard(update_id)
+
+    @property
+    def offset(self) -> int:
+        """This property returns the offset all updates before which were
+        handled"""
+        return min(self._pending, default=self._received)
+
+    @property
+    def changed(self) -> bool:
+        """This property tells if the offset moved since it was saved"""
+        return self.offset != self.saved
@@ -0,0 +1,148 @@
+"""This file contains a function to queue messages of the telegram bot and an
+OutboxWorker class to send them"""
+import datetime
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from bot.models import OutboxMessage
+from bot.tg.ratelimit import ChatRateLimiter
+from bot.tg.transport import TgTransport
+# -------------------------------------------------------------------------
+
+PERMANENT_ERRORS = (400, 403)
+
+
+def enqueue_message(chat_id: int, text: str) -> OutboxMessage:
+    """This function queues a message to send. The message is saved in the
+    current transaction, so it is sent only if the transaction is committed
+    :param chat_id: An integer representing the telegram chat id
+    :param text: A string representing the message
+    :return: An instance of OutboxMessage class
+    """
+    return OutboxMessage.objects.create(chat_id=chat_id, text=text)
+
+
+def enqueue_messages(messages: list[tuple[int, str]]) -> None:
+    """This function queues messages to send by a single query
+    :param messages: A list of tuples containing telegram chat ids and
+    messages
+    """
+    OutboxMessage.objects.bulk_create(
+        [OutboxMessage(chat_id=chat_id, text=text)
+         for chat_id, text in messages])
+
+
+class OutboxWorker:
+    """OutboxWorker class sends queued messages by batches within telegram
+    rate limits. Failed messages are retried with an exponential backoff and
+    marked as dead when attempts are exhausted or telegram refuses the chat.
+    Rate limits are kept in memory, so a single worker should be run"""
+    def __init__(
+            self, transport: TgTransport, limiter: ChatRateLimiter,
+            batch_size: int = 100, max_attempts: int = 5,
+            backoff: float = 1, lease: int = 60) -> None:
+        """Initialize the OutboxWorker class
+        :param transport: A TgTransport instance to send messages
+        :param limiter: A ChatRateLimiter instance
+        :param batch_size: An integer representing the number of messages
+        taken at once
+        :param max_attempts: An integer representing the number of attempts
+        before the message is marked as dead
+        :param backoff: Seconds to wait before the first retry, the delay
+        doubles with every next one
+        :param lease: Seconds taken messages are hidden from other workers
+        """
+        self._transport = transport
+        self._limiter = limiter
+        self._batch_size = batch_size
+        self._max_attempts = max_attempts
+        self._backoff = backoff
+        self._lease = lease
+
+    def run_once(self) -> int:
+        """This method sends a batch of due messages. Messages of a chat are
+        sent one by one in the order they were queued, a message is
+        postponed if it can't be sent now
+        :return: An integer representing the number of taken messages
+        """
+        messages = self._claim()
+
+        for message in messages:
+            delay = self._limiter.acquire(message.chat_id)
+            if delay:
+                message.next_attempt_at = timezone.now() + datetime.timedelta(
+                    seconds=delay)
+            else:
+                self._send(message)
+
+        OutboxMessage.objects.bulk_update(
+            messages,
+            ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'],
+        )
+        self._limiter.prune()
+        return len(messages)
+
+    @staticmethod
+    def prune(keep_days: int) -> int:
+        """This method deletes sent messages older than keep_days
+        :return: An integer representing the number of deleted messages
+        """
+        deleted, _ = OutboxMessage.objects.filter(
+            status=OutboxMessage.Statuses.sent,
+            sent_at__lt=timezone.now() - datetime.timedelta(days=keep_days),
+        ).delete()
+        return deleted
+
+    def _claim(self) -> list[OutboxMessage]:
+        """This secondary method takes due messages and hides them from other
+        workers for the lease time. Only the earliest pending message of a
+        chat is taken, so later messages of the chat wait while it waits for
+        a retry or is held by another worker
+        :return: A list of OutboxMessage instances ordered by id
+        """
+        now = timezone.now()
+        earlier = OutboxMessage.objects.filter(
+            status=OutboxMessage.Statuses.pending,
+            chat_id=OuterRef('chat_id'),
+            id__lt=OuterRef('id'),
+        )
+
+        with transaction.atomic():
+            messages = list(
+                OutboxMessage.objects.select_for_update(skip_locked=True)
+                .filter(
+                    ~Exists(earlier),
+                    status=OutboxMessage.Statuses.pending,
+                    next_attempt_at__lte=now,
+                )
+                .order_by('id')[:self._batch_size]
+            )
+            OutboxMessage.objects.filter(
+                id__in=[message.id for message in messages]
+            ).update(next_attempt_at=now + datetime.timedelta(
+                seconds=self._lease))
+
+        return messages
+
+    def _send(self, message: OutboxMessage) -> None:
+        """This secondary method sends the message and updates its status
+        :param message: An instance of OutboxMessage class
+        """
+        message.attempts += 1
+        try:
+            self._transport.request(
+                'sendMessage',
+                {'chat_id': message.chat_id, 'text': message.text},
+            )
+        except Exception as error:
+            message.last_error = str(error)[:1000]
+            if (getattr(error, 'status_code', None) in PERMANENT_ERRORS
+                    or message.attempts >= self._max_attempts):
+                message.status = OutboxMessage.Statuses.dead
+            else:
+                message.next_attempt_at = timezone.now() + datetime.timedelta(
+                    seconds=self._backoff * 2 ** (message.attempts - 1))
+            return
+
+        message.status = OutboxMessage.Statuses.sent
+        message.sent_at = timezone.now()
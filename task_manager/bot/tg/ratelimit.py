@@ -0,0 +1,91 @@
+"""This file contains token bucket classes to limit the rate of messages sent
+by the telegram bot"""
+import time
+# -------------------------------------------------------------------------
+
+
+class TokenBucket:
+    """TokenBucket class allows a burst of capacity actions and refills
+    tokens with the given rate"""
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        """Initialize the TokenBucket class
+        :param rate: A float representing tokens added per second
+        :param capacity: A float representing the maximum number of tokens,
+        it equals to the rate by default
+        """
+        self._rate = rate
+        self._capacity = capacity or rate
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        """This method takes a token if there is one
+        :return: True if the token was taken
+        """
+        self._refill()
+        if self._tokens < 1:
+            return False
+
+        self._tokens -= 1
+        return True
+
+    def wait_time(self) -> float:
+        """This method returns seconds to wait for the next token"""
+        self._refill()
+        return max(1 - self._tokens, 0) / self._rate
+
+    def is_full(self) -> bool:
+        """This method checks if the bucket has refilled completely"""
+        self._refill()
+        return self._tokens >= self._capacity
+
+    def _refill(self) -> None:
+        """This secondary method adds tokens for the time passed since the
+        last call"""
+        now = time.monotonic()
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+
+class ChatRateLimiter:
+    """ChatRateLimiter class combines a global bucket with a bucket per chat
+    to follow both telegram limits"""
+    def __init__(self, global_rate: float = 30, chat_rate: float = 1) -> None:
+        """Initialize the ChatRateLimiter class
+        :param global_rate: A float representing messages per second to all
+        chats
+        :param chat_rate: A float representing messages per second to a
+        single chat
+        """
+        self._global = TokenBucket(global_rate)
+        self._chat_rate = chat_rate
+        self._chats: dict[int, TokenBucket] = {}
+
+    def acquire(self, chat_id: int) -> float:
+        """This method takes a token to send a message to the chat. The
+        global bucket is waited for while a busy chat is reported to the
+        caller to send other messages first
+        :param chat_id: An integer representing the telegram chat id
+        :return: 0 if the message can be sent, otherwise seconds to wait for
+        the chat token
+        """
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = self._chats[chat_id] = TokenBucket(self._chat_rate)
+
+        if not bucket.try_acquire():
+            return bucket.wait_time()
+
+        while not self._global.try_acquire():
+            time.sleep(self._global.wait_time())
+
+        return 0
+
+    def prune(self) -> None:
+        """This method removes refilled buckets of idle chats to keep the
+        memory usage bounded"""
+        self._chats = {
+            chat_id: bucket for chat_id, bucket in self._chats.items()
+            if not bucket.is_full()
+        }
@@ -0,0 +1,88 @@
+"""This file contains state store classes to keep data of unfinished dialogs
+of telegram users with the bot outside a bot process"""
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from bot.models import TgConversationState, TgUser
+# -------------------------------------------------------------------------
+
+
+class BaseStateStore:
+    """BaseStateStore class describes the interface of a state store. The
+    state is a dictionary of JSON serializable values"""
+    def get(self, tg_user: TgUser) -> dict:
+        """This method returns the state of the telegram user
+        :param tg_user: An instance of TgUser class
+        :return: A dictionary containing the state, it is empty if there
+        is no one
+        """
+        raise NotImplementedError
+
+    def set(self, tg_user: TgUser, data: dict) -> None:
+        """This method replaces the state of the telegram user
+        :param tg_user: An instance of TgUser class
+        :param data: A dictionary containing the new state
+        """
+        raise NotImplementedError
+
+    def clear(self, tg_user: TgUser) -> None:
+        """This method removes the state of the telegram user
+        :param tg_user: An instance of TgUser class
+        """
+        raise NotImplementedError
+
+    def update(self, tg_user: TgUser, **values) -> dict:
+        """This method adds values to the state of the telegram user
+        :param tg_user: An instance of TgUser class
+        :return: A dictionary containing the new state
+        """
+        data = {**self.get(tg_user), **values}
+        self.set(tg_user, data)
+        return data
+
+
+class DatabaseStateStore(BaseStateStore):
+    """DatabaseStateStore class keeps states in the TgConversationState
+    table, it is used by default"""
+    def get(self, tg_user: TgUser) -> dict:
+        data = TgConversationState.objects.filter(
+            tg_user_id=tg_user.id).values_list('data', flat=True).first()
+        return data or {}
+
+    def set(self, tg_user: TgUser, data: dict) -> None:
+        TgConversationState.objects.update_or_create(
+            tg_user_id=tg_user.id, defaults={'data': data})
+
+    def clear(self, tg_user: TgUser) -> None:
+        TgConversationState.objects.filter(tg_user_id=tg_user.id).delete()
+
+
+class CacheStateStore(BaseStateStore):
+    """CacheStateStore class keeps states in a Django cache. The cache
+    should be shared by all bot processes, e.g. redis or memcached"""
+    def __init__(self) -> None:
+        """Initialize the CacheStateStore class"""
+        self._cache = caches[settings.TG_STATE_CACHE_ALIAS]
+        self._timeout = settings.TG_STATE_CACHE_TIMEOUT
+
+    def get(self, tg_user: TgUser) -> dict:
+        return self._cache.get(self._get_key(tg_user)) or {}
+
+    def set(self, tg_user: TgUser, data: dict) -> None:
+        self._cache.set(self._get_key(tg_user), data, self._timeout)
+
+    def clear(self, tg_user: TgUser) -> None:
+        self._cache.delete(self._get_key(tg_user))
+
+    @staticmethod
+    def _get_key(tg_user: TgUser) -> str:
+        """This secondary method returns the cache key of the state"""
+        return f'tg_state:{tg_user.id}'
+
+
+def get_state_store() -> BaseStateStore:
+    """This function creates the state store configured by TG_STATE_STORE
+    setting
+    :return: An instance of the state store class
+    """
+    return import_string(settings.TG_STATE_STORE)()
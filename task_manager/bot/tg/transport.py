@@ -0,0 +1,124 @@
+"""This file contains a TgTransport class to send requests to telegram bot API
+through a pool of persistent connections"""
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from bot.tg.metrics import TELEGRAM_ERRORS, TELEGRAM_SECONDS
+
+# -------------------------------------------------------------------------
+
+API_URL = 'https://api.telegram.org'
+
+
+class TgApiError(Exception):
+    """This exception is raised when telegram bot API returns an error"""
+    def __init__(self, message: str, status_code: int | None = None) -> None:
+        """Initialize the TgApiError class
+        :param message: A string describing the error
+        :param status_code: An integer representing the HTTP status of the
+        response if it was received
+        """
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TgTransport:
+    """TgTransport class keeps a pooled HTTP session to telegram bot API and
+    retries requests failed by network errors, 429 or 5xx responses"""
+    retry_statuses = (429, 500, 502, 503, 504)
+
+    def __init__(
+            self, token: str, pool_size: int = 10, connect_timeout: float = 5,
+            read_timeout: float = 10, retries: int = 3,
+            backoff: float = 0.5, api_url: str = API_URL) -> None:
+        """Initialize the TgTransport class
+        :param token: A string representing the telegram bot token
+        :param pool_size: An integer representing the maximum number of
+        connections kept open
+        :param connect_timeout: Seconds to wait for a connection
+        :param read_timeout: Seconds to wait for a response in addition to
+        the long polling timeout of the request
+        :param retries: An integer representing the number of retries
+        :param backoff: Seconds to wait before the first retry, the delay
+        doubles with every next one
+        :param api_url: A string representing the url of the bot API, a
+        local bot API server can be used instead of the telegram one
+        """
+        self._token = token
+        self._api_url = api_url.rstrip('/')
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        self._retries = retries
+        self._backoff = backoff
+        self._session = requests.Session()
+        self._session.mount(
+            self._api_url + '/',
+            HTTPAdapter(pool_connections=1, pool_maxsize=pool_size),
+        )
+
+    def get_url(self, method: str) -> str:
+        """This method returns the configured telegram url
+        :param method: A string representing a method to add in telegram url
+        :return: A string representing the telegram url with token and
+        requested method
+        """
+        return f'{self._api_url}/bot{self._token}/{method}'
+
+    def request(self, method: str, params: dict, timeout: float = 0) -> dict:
+        """This method sends a request to telegram bot API
+        :param method: A string representing the API method
+        :param params: A dictionary containing parameters of the method
+        :param timeout: Seconds the API may hold the request for long polling
+        :return: A dictionary containing the decoded response
+        """
+        url = self.get_url(method)
+        timeouts = (self._connect_timeout, self._read_timeout + timeout)
+
+        for attempt in range(self._retries + 1):
+            last_attempt = attempt == self._retries
+            started = time.perf_counter()
+            try:
+                response = self._session.post(url, json=params, timeout=timeouts)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                TELEGRAM_SECONDS.observe(
+                    time.perf_counter() - started, method=method)
+                TELEGRAM_ERRORS.inc(method=method, reason='network')
+                if last_attempt:
+                    raise TgApiError(f'{method} failed: {error}') from error
+                time.sleep(self._get_delay(attempt))
+                continue
+
+            TELEGRAM_SECONDS.observe(time.perf_counter() - started, method=method)
+            if not response:
+                TELEGRAM_ERRORS.inc(method=method, reason=response.status_code)
+
+            if response.status_code in self.retry_statuses and not last_attempt:
+                time.sleep(self._get_delay(attempt, response))
+                continue
+
+            if not response:
+                raise TgApiError(
+                    f'{method} failed: {response.status_code} {response.text}',
+                    response.status_code)
+
+            return response.json()
+
+    def _get_delay(
+            self, attempt: int,
+            response: requests.Response | None = None) -> float:
+        """This secondary method returns seconds to wait before the next
+        attempt. The retry_after value sent by telegram is used if present
+        :param attempt: An integer representing the number of the attempt
+        :param response: A failed Response instance
+        :return: A float representing seconds to wait
+        """
+        if response is not None:
+            try:
+                return float(response.json()['parameters']['retry_after'])
+            except (ValueError, KeyError, TypeError):
+                pass
+
+            if response.headers.get('Retry-After', '').isdigit():
+                return float(response.headers['Retry-After'])
+
+        return self._backoff * 2 ** attempt
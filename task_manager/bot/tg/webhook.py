@@ -0,0 +1,115 @@
+"""This file contains functions to save updates received by the webhook and
+an UpdateDispatcher class to handle them in background threads of a web
+worker"""
+import logging
+import os
+import threading
+from django.db import close_old_connections, transaction
+from django.db.models import Exists, OuterRef
+from bot.models import InboxUpdate
+from bot.tg.client import UPDATE_SCHEMA, TgClient
+from bot.tg.dc import Update
+
+# -------------------------------------------------------------------------
+
+POLL_INTERVAL = 5
+
+logger = logging.getLogger(__name__)
+
+
+def save_update(item: Update, payload: dict) -> None:
+    """This function saves the update into the inbox before telegram gets
+    the response, so an update is not lost if the web worker stops. An
+    update sent again is saved once
+    :param item: An instance of Update class
+    :param payload: A dictionary containing the update as it was received
+    """
+    InboxUpdate.objects.bulk_create(
+        [InboxUpdate(update_id=item.update_id, chat_id=item.message.chat.id,
+                     payload=payload)],
+        ignore_conflicts=True)
+
+
+class UpdateDispatcher:
+    """UpdateDispatcher class handles updates of the inbox by the same state
+    machine as the polling bot. Every web worker process has its own
+    threads, an update is taken only when it is the earliest one of its chat
+    and no other thread or process holds it, so updates of a chat are
+    handled one by one in order"""
+    def __init__(
+            self, client: TgClient, workers: int = 2,
+            poll_interval: float = POLL_INTERVAL) -> None:
+        """Initialize the UpdateDispatcher class
+        :param client: A TgClient instance handling updates
+        :param workers: An integer representing the number of threads
+        :param poll_interval: Seconds between checks of the inbox when
+        threads aren't notified, updates left by stopped workers are found
+        by them
+        """
+        self._client = client
+        self._workers = workers
+        self._poll_interval = poll_interval
+        self._received = threading.Event()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def notify(self) -> None:
+        """This method wakes threads up to handle a saved update"""
+        self._start()
+        self._received.set()
+
+    def handle_next(self) -> bool:
+        """This method handles the earliest update of a chat which is not
+        taken by another thread. The update stays locked until it is
+        handled and deleted, so later updates of the chat wait for it
+        :return: False if there is no update to handle
+        """
+        earlier = InboxUpdate.objects.filter(
+            chat_id=OuterRef('chat_id'), update_id__lt=OuterRef('update_id'))
+
+        with transaction.atomic():
+            inbox_update = InboxUpdate.objects.select_for_update(
+                skip_locked=True
+            ).filter(~Exists(earlier)).order_by('update_id').first()
+            if inbox_update is None:
+                return False
+
+            self._client.process_update_safely(
+                UPDATE_SCHEMA.load(inbox_update.payload))
+            inbox_update.delete()
+
+        return True
+
+    def _start(self) -> None:
+        """This secondary method starts threads in the current process. The
+        threads are started lazily as they don't survive forking of web
+        workers"""
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+
+            for number in range(self._workers):
+                threading.Thread(
+                    target=self._work,
+                    name=f'bot-webhook-{number}',
+                    daemon=True,
+                ).start()
+            self._pid = os.getpid()
+
+    def _work(self) -> None:
+        """This secondary method handles updates of the inbox forever"""
+        while True:
+            self._received.wait(self._poll_interval)
+            self._received.clear()
+
+            close_old_connections()
+            try:
+                while self.handle_next():
+                    pass
+            except Exception:
+                logger.exception('Failed to handle updates of the inbox')
+            finally:
+                close_old_connections()
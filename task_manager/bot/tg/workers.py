@@ -0,0 +1,129 @@
+"""This file contains a PartitionedBotRunner class to handle updates of the
+telegram bot in several processes"""
+import logging
+import multiprocessing
+import time
+from django.db import close_old_connections, connections
+from bot.tg.client import TgClient
+from bot.tg.dc import Update
+from bot.tg.metrics import QUEUE_DEPTH, start_metrics_server
+from bot.tg.offsets import PendingUpdates
+
+# -------------------------------------------------------------------------
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionedBotRunner:
+    """PartitionedBotRunner class polls telegram in the main process and
+    passes updates to worker processes by chat id. Updates of a chat always
+    get into the same worker, so they are handled in order, while the state
+    of dialogs is shared through the state store. Workers report handled
+    updates back, so the saved offset doesn't pass updates still waiting in
+    queues"""
+    def __init__(
+            self, client: TgClient, workers: int = 2,
+            max_pending: int = 1000, metrics_port: int = 0) -> None:
+        """Initialize the PartitionedBotRunner class
+        :param client: A TgClient instance handling updates
+        :param workers: An integer representing the number of processes
+        :param max_pending: An integer representing the maximum number of
+        updates waiting in the queue of a worker, polling stops when it is
+        reached
+        :param metrics_port: An integer representing the port of metrics of
+        the main process, workers serve their metrics on the next ports. 0
+        disables metrics of workers
+        """
+        self._client = client
+        self._workers = workers
+        self._max_pending = max_pending
+        self._metrics_port = metrics_port
+        self._context = multiprocessing.get_context('fork')
+        self._queues: list[multiprocessing.Queue] = []
+        self._handled = self._context.Queue()
+        self._processes: list[multiprocessing.Process] = []
+
+    def start_bot(self) -> None:
+        """This is a main method to start the telegram bot"""
+        for number in range(self._workers):
+            self._queues.append(self._context.Queue(self._max_pending))
+            QUEUE_DEPTH.set_function(
+                self._queues[number].qsize, queue=f'worker-{number}')
+            self._processes.append(self._start_worker(number))
+
+        offset = self._client.load_offset()
+        pending = PendingUpdates(offset)
+        while True:
+            try:
+                response = self._client.get_updates(offset=offset)
+            except Exception:
+                logger.exception('Failed to get updates')
+                time.sleep(1)
+                continue
+
+            for item in response.result:
+                offset = item.update_id + 1
+                pending.add(item.update_id)
+                self._dispatch(item)
+
+            self._save_offset(pending)
+
+    def _save_offset(self, pending: PendingUpdates) -> None:
+        """This secondary method collects updates handled by workers and
+        saves the offset of the earliest update which is still pending
+        :param pending: A PendingUpdates instance of received updates
+        """
+        while not self._handled.empty():
+            pending.done(self._handled.get())
+
+        if pending.changed:
+            self._client.save_offset(pending.offset)
+            pending.saved = pending.offset
+
+    def _dispatch(self, item: Update) -> None:
+        """This method puts the update into the queue of the worker chosen by
+        the chat id and restarts the worker if it died
+        :param item: An instance of Update class
+        """
+        number = item.message.chat.id % self._workers
+        if not self._processes[number].is_alive():
+            logger.error('Bot worker %s died, restarting it', number)
+            self._processes[number] = self._start_worker(number)
+
+        self._queues[number].put(item)
+
+    def _start_worker(self, number: int) -> multiprocessing.Process:
+        """This secondary method starts a worker process. Database
+        connections of the main process are closed before as they can't be
+        shared with a forked process
+        :param number: An integer representing the number of the worker
+        :return: A started Process instance
+        """
+        connections.close_all()
+        process = self._context.Process(
+            target=self._work,
+            args=(number,),
+            name=f'bot-worker-{number}',
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def _work(self, number: int) -> None:
+        """This secondary method handles updates of the queue forever in a
+        worker process
+        :param number: An integer representing the number of the worker
+        """
+        connections.close_all()
+        if self._metrics_port:
+            start_metrics_server(self._metrics_port + number + 1)
+
+        queue = self._queues[number]
+        while True:
+            item = queue.get()
+            close_old_connections()
+            try:
+                self._client.process_update_safely(item)
+            finally:
+                close_old_connections()
+                self._handled.put(item.update_id)
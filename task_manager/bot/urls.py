@@ -5,4 +5,5 @@ from bot import views
 
 urlpatterns = [
     path("verify", views.BotConfirmView.as_view()),
+    path("webhook", views.BotWebhookView.as_view()),
     ]
@@ -1,13 +1,23 @@
 """This file contains CBVs for telegram bot"""
+from django.conf import settings
 from django.db import transaction
-from rest_framework import generics
+from django.utils.crypto import constant_time_compare
+from marshmallow import ValidationError as SchemaValidationError
+from rest_framework import generics, status
 from rest_framework.exceptions import ValidationError
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from bot.management.commands.runbot import client
 from bot.models import TgUser
 from bot.serializers import BotUpdateSerializer
+from bot.tg.client import UPDATE_SCHEMA
+from bot.tg.outbox import enqueue_message
+from bot.tg.webhook import UpdateDispatcher, save_update
 # --------------------------------------------------------------------------
 
+dispatcher = UpdateDispatcher(client, settings.TG_WEBHOOK_WORKERS)
+
 
 class BotConfirmView(generics.UpdateAPIView):
     """This view used to connect telegram user with application user"""
@@ -32,5 +42,29 @@ class BotConfirmView(generics.UpdateAPIView):
             tg_user.user = self.request.user
             tg_user.bot_state = TgUser.BotStates.confirmed
             tg_user.save()
+            enqueue_message(tg_user.tg_id, 'Аккаунт успешно подтвержден')
+
+
+class BotWebhookView(APIView):
+    """This view receives updates from telegram, saves them into the inbox
+    and wakes the dispatcher up without waiting for handling"""
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request, *args, **kwargs) -> Response:
+        """This method checks the secret token and saves the update, telegram
+        gets the response only when the update is saved"""
+        secret_token = request.headers.get('X-Telegram-Bot-Api-Secret-Token', '')
+        if not settings.TG_WEBHOOK_SECRET or not constant_time_compare(
+                secret_token, settings.TG_WEBHOOK_SECRET):
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            item = UPDATE_SCHEMA.load(request.data)
+        except SchemaValidationError:
+            return Response(status=status.HTTP_200_OK)
+
+        save_update(item, request.data)
+        transaction.on_commit(dispatcher.notify)
 
-        client.send_message(tg_user.tg_id, 'Аккаунт успешно подтвержден')
+        return Response(status=status.HTTP_200_OK)
@@ -0,0 +1,282 @@
+"""This file contains a Command class to generate HTTP load against a running
+instance of the API and to compare results with a saved baseline"""
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from django.core.management import BaseCommand, CommandError
+
+# -------------------------------------------------------------------------
+
+DEFAULT_MIX = "goal_list=40,goal_detail=20,goal_create=5,comment_list=20,board_list=15"
+
+
+class Command(BaseCommand):
+    """Command class representing a custom command to run a load test. Every
+    worker logs in through core/login and sends requests to endpoints chosen
+    by their weights in the mix until the duration expires"""
+
+    help = "Runs a load test against the goals API and saves or compares results"
+
+    def add_arguments(self, parser) -> None:
+        """This method adds arguments of the command"""
+        parser.add_argument("--host", default="http://127.0.0.1:8000")
+        parser.add_argument("--username", required=True)
+        parser.add_argument("--password", required=True)
+        parser.add_argument("--duration", type=int, default=30, help="Seconds")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--limit", type=int, default=50, help="Page size")
+        parser.add_argument(
+            "--mix",
+            default=DEFAULT_MIX,
+            help="Comma separated endpoint=weight pairs",
+        )
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--output", help="A file to save results as JSON")
+        parser.add_argument("--compare", help="A baseline JSON file to compare with")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.1,
+            help="Allowed relative degradation of latency and throughput",
+        )
+
+    def handle(self, *args, **options) -> None:
+        """This method runs the load test, prints and saves the results"""
+        self.options = options
+        self.host = options["host"].rstrip("/")
+        self.mix = self.parse_mix(options["mix"])
+        self.latencies = {name: [] for name in self.mix}
+        self.errors = {name: 0 for name in self.mix}
+        self.lock = threading.Lock()
+        deadline = time.monotonic() + options["duration"]
+
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            workers = [
+                executor.submit(self.run_worker, number, deadline)
+                for number in range(options["concurrency"])
+            ]
+            for worker in workers:
+                worker.result()
+
+        results = self.get_results(options["duration"])
+        self.print_results(results)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(results, file, indent=2)
+
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as file:
+                baseline = json.load(file)
+            self.compare(results, baseline, options["threshold"])
+
+    def run_worker(self, number: int, deadline: float) -> None:
+        """This method sends requests of a single worker until the deadline
+        :param number: An integer representing the number of the worker
+        :param deadline: A monotonic time to stop at
+        """
+        seed = self.options["seed"]
+        rnd = random.Random(None if seed is None else seed + number)
+        session = self.login()
+        context = self.get_context(session)
+        names, weights = list(self.mix), list(self.mix.values())
+
+        while time.monotonic() < deadline:
+            name = rnd.choices(names, weights)[0]
+            method, url, data = self.get_request(name, context, rnd)
+
+            started = time.perf_counter()
+            try:
+                response = session.request(
+                    method,
+                    url,
+                    json=data,
+                    headers={"X-CSRFToken": session.cookies.get("csrftoken", "")},
+                    timeout=30,
+                )
+                failed = response.status_code >= 400
+            except requests.RequestException:
+                failed = True
+            elapsed = time.perf_counter() - started
+
+            with self.lock:
+                self.latencies[name].append(elapsed)
+                self.errors[name] += failed
+
+    def login(self) -> requests.Session:
+        """This method logs in through core/login and gets a CSRF token
+        :return: A Session instance with authentication cookies
+        """
+        session = requests.Session()
+        response = session.post(
+            f"{self.host}/core/login",
+            json={
+                "username": self.options["username"],
+                "password": self.options["password"],
+            },
+        )
+        if response.status_code >= 400:
+            raise CommandError(f"Login failed: {response.status_code} {response.text}")
+
+        session.get(f"{self.host}/core/profile")
+        return session
+
+    def get_context(self, session: requests.Session) -> dict[str, list[int]]:
+        """This method loads ids of goals and categories used by requests.
+        Only categories of boards the user can write to are used to create
+        goals"""
+        goals = session.get(f"{self.host}/goals/goal/list?limit=100").json()
+        categories = session.get(
+            f"{self.host}/goals/goal_category/list?limit=100"
+        ).json()
+        boards = session.get(f"{self.host}/goals/board/list?limit=20").json()
+        editable_boards = {
+            board["id"]
+            for board in boards["results"]
+            if self.can_write(session, board["id"])
+        }
+        context = {
+            "goals": [goal["id"] for goal in goals["results"]],
+            "categories": [
+                category["id"]
+                for category in categories["results"]
+                if category["board"] in editable_boards
+            ],
+        }
+
+        if not context["goals"] or not context["categories"]:
+            raise CommandError("The user should have at least one goal and category")
+
+        return context
+
+    def can_write(self, session: requests.Session, board_id: int) -> bool:
+        """This method checks if the user is an owner or a writer of the
+        board"""
+        board = session.get(f"{self.host}/goals/board/{board_id}").json()
+        return any(
+            participant["user"] == self.options["username"]
+            and participant["role"] in (1, 2)
+            for participant in board["participants"]
+        )
+
+    def get_request(self, name: str, context: dict, rnd: random.Random) -> tuple:
+        """This method builds a request for the endpoint
+        :return: A tuple containing a method, a url and data to send
+        """
+        limit = self.options["limit"]
+        goal = rnd.choice(context["goals"])
+
+        requests_map = {
+            "goal_list": ("GET", f"/goals/goal/list?limit={limit}", None),
+            "goal_detail": ("GET", f"/goals/goal/{goal}", None),
+            "goal_create": (
+                "POST",
+                "/goals/goal/create",
+                {"title": "Load test", "category": rnd.choice(context["categories"])},
+            ),
+            "comment_list": (
+                "GET",
+                f"/goals/goal_comment/list?goal={goal}&limit={limit}",
+                None,
+            ),
+            "board_list": ("GET", f"/goals/board/list?limit={limit}", None),
+        }
+        method, path, data = requests_map[name]
+        return method, f"{self.host}{path}", data
+
+    def get_results(self, duration: int) -> dict:
+        """This method calculates latency percentiles and throughput of every
+        endpoint"""
+        endpoints = {}
+
+        for name, latencies in self.latencies.items():
+            latencies = sorted(latencies)
+            endpoints[name] = {
+                "requests": len(latencies),
+                "errors": self.errors[name],
+                "throughput": round(len(latencies) / duration, 2),
+                "p50": self.get_percentile(latencies, 50),
+                "p95": self.get_percentile(latencies, 95),
+                "p99": self.get_percentile(latencies, 99),
+            }
+
+        return {
+            "host": self.host,
+            "duration": duration,
+            "concurrency": self.options["concurrency"],
+            "mix": self.mix,
+            "endpoints": endpoints,
+        }
+
+    def print_results(self, results: dict) -> None:
+        """This method prints the results as a table"""
+        self.stdout.write(
+            f"{'endpoint':<14}{'requests':>10}{'errors':>8}{'rps':>9}"
+            f"{'p50, ms':>10}{'p95, ms':>10}{'p99, ms':>10}"
+        )
+        for name, stats in results["endpoints"].items():
+            self.stdout.write(
+                f"{name:<14}{stats['requests']:>10}{stats['errors']:>8}"
+                f"{stats['throughput']:>9}{stats['p50'] * 1000:>10.1f}"
+                f"{stats['p95'] * 1000:>10.1f}{stats['p99'] * 1000:>10.1f}"
+            )
+
+    def compare(self, results: dict, baseline: dict, threshold: float) -> None:
+        """This method compares the results with the baseline and fails if
+        latency or throughput of any endpoint became worse than the threshold
+        allows"""
+        regressions = []
+
+        for name, stats in results["endpoints"].items():
+            base = baseline["endpoints"].get(name)
+            if not base or not base["requests"]:
+                continue
+
+            for metric in ("p50", "p95", "p99"):
+                if stats[metric] > base[metric] * (1 + threshold):
+                    regressions.append(
+                        f"{name} {metric}: {base[metric] * 1000:.1f} ms -> "
+                        f"{stats[metric] * 1000:.1f} ms"
+                    )
+            if stats["throughput"] < base["throughput"] * (1 - threshold):
+                regressions.append(
+                    f"{name} throughput: {base['throughput']} -> "
+                    f"{stats['throughput']} rps"
+                )
+
+        if regressions:
+            raise CommandError("Regressions found:\n" + "\n".join(regressions))
+
+        self.stdout.write("No regressions found")
+
+    @staticmethod
+    def parse_mix(mix: str) -> dict[str, int]:
+        """This method parses the endpoint mix received from the arguments"""
+        available = (
+            "goal_list",
+            "goal_detail",
+            "goal_create",
+            "comment_list",
+            "board_list",
+        )
+        parsed = {}
+
+        for item in mix.split(","):
+            name, _, weight = item.partition("=")
+            if name.strip() not in available or not weight.strip().isdigit():
+                raise CommandError(f"Incorrect mix item: {item}")
+            parsed[name.strip()] = int(weight)
+
+        return parsed
+
+    @staticmethod
+    def get_percentile(latencies: list[float], percentile: int) -> float:
+        """This method returns a percentile of sorted latencies in seconds"""
+        if not latencies:
+            return 0.0
+
+        index = max(round(percentile / 100 * len(latencies)) - 1, 0)
+        return round(latencies[min(index, len(latencies) - 1)], 6)
@@ -0,0 +1,57 @@
+"""This unit contains a middleware detecting N+1 query patterns in requests"""
+import logging
+from collections import Counter
+from django.conf import settings
+from django.db import connection
+
+# --------------------------------------------------------------------------
+
+logger = logging.getLogger(__name__)
+
+
+class NPlusOneError(Exception):
+    """This exception is raised when a request runs the same query too many
+    times"""
+
+
+class QueryCountMiddleware:
+    """QueryCountMiddleware class counts queries of every request grouped by
+    their SQL. If any query is repeated N_PLUS_ONE_THRESHOLD times or more
+    the request is reported as an N+1 pattern, the middleware raises an
+    exception instead of logging if N_PLUS_ONE_RAISE is set, so tests fail"""
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+        self.threshold = getattr(settings, "N_PLUS_ONE_THRESHOLD", 5)
+        self.raise_error = getattr(settings, "N_PLUS_ONE_RAISE", False)
+
+    def __call__(self, request):
+        queries = Counter()
+
+        def count_query(execute, sql, params, many, context):
+            queries[sql] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_query):
+            response = self.get_response(request)
+
+        repeated = [
+            (sql, count) for sql, count in queries.items() if count >= self.threshold
+        ]
+        if repeated:
+            self.report(request, repeated)
+
+        return response
+
+    def report(self, request, repeated: list[tuple[str, int]]) -> None:
+        """This method logs or raises an error about repeated queries
+        :param request: A request running repeated queries
+        :param repeated: A list of tuples with SQL and the number of its runs
+        """
+        details = "\n".join(f"{count} times: {sql}" for sql, count in repeated)
+        message = f"N+1 queries detected in {request.method} {request.path}\n{details}"
+
+        if self.raise_error:
+            raise NPlusOneError(message)
+
+        logger.warning(message)
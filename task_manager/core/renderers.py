@@ -0,0 +1,63 @@
+"""This unit contains a JSON renderer and a parser based on orjson. They are
+used instead of the DRF ones if the FAST_JSON setting is enabled"""
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+# --------------------------------------------------------------------------
+
+# orjson writes these characters as is, the DRF renderer escapes them to make
+# the output valid JavaScript
+UNESCAPED = ((b"\xe2\x80\xa8", b"\\u2028"), (b"\xe2\x80\xa9", b"\\u2029"))
+
+
+class ORJSONRenderer(JSONRenderer):
+    """ORJSONRenderer class renders data by orjson. Values orjson doesn't
+    support (lazy translation strings, decimals, datetimes, querysets) are
+    converted by the DRF encoder, so the output is the same as the output of
+    JSONRenderer. Indented output for the browsable API is still rendered by
+    JSONRenderer"""
+
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b""
+
+        encoder = self.encoder_class()
+        try:
+            result = orjson.dumps(data, default=encoder.default, option=self.options)
+        except orjson.JSONEncodeError:
+            # Integers out of 64 bit range and the like are left to the DRF
+            # renderer
+            return super().render(data, accepted_media_type, renderer_context)
+
+        for character, escaped in UNESCAPED:
+            if character in result:
+                result = result.replace(character, escaped)
+
+        return result
+
+
+class ORJSONParser(JSONParser):
+    """ORJSONParser class parses JSON request bodies by orjson"""
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+
+        try:
+            data = stream.read()
+            if encoding.lower().replace("-", "") != "utf8":
+                data = data.decode(encoding)
+            return orjson.loads(data)
+        except ValueError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
@@ -0,0 +1,17 @@
+"""This unit contains a test runner leaving benchmarks out of the default
+test run"""
+from django.test.runner import DiscoverRunner
+
+# --------------------------------------------------------------------------
+
+BENCHMARK_TAG = "benchmark"
+
+
+class TestRunner(DiscoverRunner):
+    """TestRunner class excludes tests tagged as benchmarks, their timings
+    depend on the machine, so they are run only by `test --tag benchmark`"""
+
+    def __init__(self, *args, tags=None, exclude_tags=None, **kwargs) -> None:
+        if not tags or BENCHMARK_TAG not in tags:
+            exclude_tags = {*(exclude_tags or ()), BENCHMARK_TAG}
+        super().__init__(*args, tags=tags, exclude_tags=exclude_tags, **kwargs)
@@ -1,3 +1,37 @@
+"""This file contains tests of the core app"""
 from django.test import TestCase
+from core.models import User
 
-# Create your tests here.
+# --------------------------------------------------------------------------
+
+
+class QueryBudgetTest(TestCase):
+    """The profile endpoint should use the user loaded by the session
+    authentication instead of loading it once again"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="user", password="password")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_retrieve_profile(self):
+        # The session and its user
+        with self.assertNumQueries(2):
+            response = self.client.get("/core/profile")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["username"], "user")
+
+    def test_update_profile(self):
+        # The session, its user and the update
+        with self.assertNumQueries(3):
+            response = self.client.patch(
+                "/core/profile",
+                {"first_name": "Name"},
+                content_type="application/json",
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["first_name"], "Name")
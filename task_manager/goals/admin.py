@@ -1,6 +1,6 @@
 """This file contains classes to configure admin panel"""
 from django.contrib import admin
-from goals.models import Category, Goal, Comment, Board, Participant
+from goals.models import Category, Goal, Comment, Board, Participant, Watermark
 
 # -------------------------------------------------------------------------
 
@@ -21,7 +21,8 @@ class GoalAdmin(admin.ModelAdmin):
     list_display = ("title", "description", "created", "updated")
     search_fields = ("title", "description")
     list_filter = ("due_date", "user", "category")
-    readonly_fields = ("created", "updated")
+    # The board is taken from the category when the goal is saved
+    readonly_fields = ("board", "created", "updated")
 
 
 class CommentAdmin(admin.ModelAdmin):
@@ -31,7 +32,8 @@ class CommentAdmin(admin.ModelAdmin):
     list_display = ("text", "user", "created", "updated")
     search_fields = ("user", "created")
     list_filter = ("user", "goal")
-    readonly_fields = ("created", "updated")
+    # The board is taken from the goal when the comment is created
+    readonly_fields = ("board", "created", "updated")
 
 
 @admin.register(Participant)
@@ -50,6 +52,12 @@ class BoardAdmin(admin.ModelAdmin):
     readonly_fields = ("created", "updated")
 
 
+@admin.register(Watermark)
+class WatermarkAdmin(admin.ModelAdmin):
+    list_display = ("name", "swept_until", "swept_at")
+    readonly_fields = ("name", "swept_until", "swept_at")
+
+
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(Goal, GoalAdmin)
 admin.site.register(Comment, CommentAdmin)
@@ -0,0 +1,143 @@
+"""This file contains functions exporting goals of a board and their comments
+as NDJSON or CSV. Rows are read by server-side cursors and written by
+chunks, so the memory usage doesn't depend on the size of the board"""
+import csv
+import io
+import json
+from typing import Iterator
+from goals.models import Comment, Goal, Status
+
+# -------------------------------------------------------------------------
+
+GOAL_COLUMNS = {
+    "id": "id",
+    "category": "category_id",
+    "title": "title",
+    "description": "description",
+    "due_date": "due_date",
+    "status": "status",
+    "priority": "priority",
+    "user": "user__username",
+    "created": "created",
+    "updated": "updated",
+}
+COMMENT_COLUMNS = {
+    "id": "id",
+    "goal": "goal_id",
+    "text": "text",
+    "user": "user__username",
+    "created": "created",
+    "updated": "updated",
+}
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+CHUNK_SIZE = 2000
+BUFFER_SIZE = 64 * 1024
+
+
+def iter_records(
+    board_id: int, comments: bool = False, chunk_size: int = CHUNK_SIZE
+) -> Iterator[dict]:
+    """This function returns records of goals of the board which are not
+    archived. Every goal is followed by its comments if they are requested
+    :param board_id: An integer representing the id of the board
+    :param comments: A boolean flag to add comments of goals
+    :param chunk_size: An integer representing the number of rows fetched
+    from the database at once
+    :return: An iterator of dictionaries with the type key
+    """
+    goals = Goal.objects.filter(board_id=board_id, status__lt=Status.archived)
+    goals = _iter_rows(goals.order_by("id"), GOAL_COLUMNS, chunk_size)
+    if not comments:
+        for goal in goals:
+            yield {"type": "goal", **goal}
+        return
+
+    rows = _iter_rows(
+        Comment.objects.filter(
+            board_id=board_id, goal__status__lt=Status.archived
+        ).order_by("goal_id", "id"),
+        COMMENT_COLUMNS,
+        chunk_size,
+    )
+    comment = next(rows, None)
+
+    for goal in goals:
+        yield {"type": "goal", **goal}
+        # Both cursors are ordered by the goal id, so comments of the goal
+        # are the next ones
+        while comment is not None and comment["goal"] <= goal["id"]:
+            if comment["goal"] == goal["id"]:
+                yield {"type": "comment", **comment}
+            comment = next(rows, None)
+
+
+def _iter_rows(queryset, columns: dict, chunk_size: int) -> Iterator[dict]:
+    """This function returns rows of the queryset with the export names of
+    the columns"""
+    names = list(columns)
+    rows = queryset.values_list(*columns.values()).iterator(chunk_size=chunk_size)
+    for row in rows:
+        yield dict(zip(names, row))
+
+
+def export_ndjson(records: Iterator[dict]) -> Iterator[str]:
+    """This function renders records as lines of JSON objects grouped into
+    chunks"""
+    buffer = io.StringIO()
+    for record in records:
+        buffer.write(json.dumps(record, ensure_ascii=False, default=str))
+        buffer.write("\n")
+        if buffer.tell() >= BUFFER_SIZE:
+            yield _flush(buffer)
+
+    yield _flush(buffer)
+
+
+def export_csv(records: Iterator[dict], comments: bool = False) -> Iterator[str]:
+    """This function renders records as CSV rows grouped into chunks. Goals
+    and comments share the table, the type column tells them apart"""
+    columns = ["type", *GOAL_COLUMNS]
+    if comments:
+        columns.extend(name for name in COMMENT_COLUMNS if name not in columns)
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, columns)
+    writer.writeheader()
+    for record in records:
+        writer.writerow(record)
+        if buffer.tell() >= BUFFER_SIZE:
+            yield _flush(buffer)
+
+    yield _flush(buffer)
+
+
+def _flush(buffer: io.StringIO) -> str:
+    """This function returns the content of the buffer and empties it"""
+    content = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return content
+
+
+def export_board(
+    board_id: int,
+    output: str = "ndjson",
+    comments: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[str]:
+    """This function returns chunks of an export of the board
+    :param board_id: An integer representing the id of the board
+    :param output: A string representing the format, ndjson or csv
+    :param comments: A boolean flag to add comments of goals
+    :param chunk_size: An integer representing the number of rows fetched
+    from the database at once
+    :return: An iterator of strings
+    """
+    records = iter_records(board_id, comments, chunk_size)
+    if output == "csv":
+        return export_csv(records, comments)
+
+    return export_ndjson(records)
@@ -1,8 +1,12 @@
-"""The file contains a GoalListFilter class to provide filtering for CBVs
-working with the Goal model"""
-from django.db import models
-from django_filters import IsoDateTimeFilter
+"""The file contains filter classes to provide filtering and searching for
+CBVs working with the Goal model"""
+from functools import reduce
+from operator import or_
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F
 from django_filters.rest_framework import FilterSet
+from rest_framework.filters import SearchFilter
 from goals.models import Goal
 
 # --------------------------------------------------------------------------
@@ -21,3 +25,34 @@ class GoalListFilter(FilterSet):
             "status": ("in",),
             "category": ("in",),
         }
+
+
+class GoalSearchFilter(SearchFilter):
+    """The GoalSearchFilter class provides a full text search of goals by
+    their search vector ranking results by relevance. Databases other than
+    PostgreSQL use the default search by the search_fields of the view"""
+
+    search_configs = ("russian", "english")
+
+    def filter_queryset(self, request, queryset, view):
+        if connections[queryset.db].vendor != "postgresql":
+            return super().filter_queryset(request, queryset, view)
+
+        terms = " ".join(self.get_search_terms(request))
+        if not terms:
+            return queryset
+
+        query = reduce(
+            or_,
+            (
+                SearchQuery(terms, config=config, search_type="websearch")
+                for config in self.search_configs
+            ),
+        )
+        ordering = queryset.query.order_by
+
+        return (
+            queryset.annotate(rank=SearchRank(F("search_vector"), query))
+            .filter(search_vector=query)
+            .order_by("-rank", *ordering)
+        )
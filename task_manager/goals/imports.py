@@ -0,0 +1,248 @@
+"""This file contains a GoalImporter class creating goals of a board from CSV
+or NDJSON rows. Rows are validated by batches against values loaded once
+and saved by bulk inserts, so the number of queries doesn't depend on the
+number of rows"""
+import csv
+import datetime
+import io
+import json
+from typing import Iterable, Iterator
+from django.db import transaction
+from django.utils import timezone
+from goals.models import Board, Category, Goal, Priority, Status
+
+# -------------------------------------------------------------------------
+
+INPUT_FORMATS = ("ndjson", "csv")
+BATCH_SIZE = 1000
+MAX_ERRORS = 1000
+TITLE_LENGTH = Goal._meta.get_field("title").max_length
+
+
+class ImportRollback(Exception):
+    """This exception is raised to roll the import back if some rows are
+    invalid"""
+
+
+class StreamReader(io.RawIOBase):
+    """StreamReader class adapts a binary stream having only the read method
+    (a request) to the io module"""
+
+    def __init__(self, stream) -> None:
+        """Initialize the StreamReader class
+        :param stream: An object with the read method returning bytes
+        """
+        super().__init__()
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._stream.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def open_text(stream) -> io.TextIOWrapper:
+    """This function returns a text stream decoding UTF-8 of the binary
+    stream. Lines are split only by line breaks of CSV and NDJSON, not by
+    other Unicode separators like U+2028 which can occur in values
+    :param stream: An object with the read method returning bytes
+    :return: A TextIOWrapper instance
+    """
+    return io.TextIOWrapper(
+        io.BufferedReader(StreamReader(stream)), encoding="utf-8-sig", newline=""
+    )
+
+
+def read_rows(stream: io.TextIOBase, input_format: str) -> Iterator[dict]:
+    """This function returns rows of goals from a text stream. Rows of other
+    types of an export (comments) are skipped, so an export of a board can
+    be imported as is
+    :param stream: A text stream to read
+    :param input_format: A string representing the format, ndjson or csv
+    :return: An iterator of dictionaries, invalid lines are returned as
+    strings to be reported
+    """
+    if input_format == "csv":
+        rows = csv.DictReader(stream)
+    else:
+        rows = (_load_line(line) for line in stream if line.strip())
+
+    for row in rows:
+        if not isinstance(row, dict) or row.get("type", "goal") in ("goal", ""):
+            yield row
+
+
+def _load_line(line: str):
+    """This function parses a line of NDJSON, an error message is returned
+    for an invalid line"""
+    try:
+        return json.loads(line)
+    except ValueError as error:
+        return f"Invalid JSON: {error}"
+
+
+class GoalImporter:
+    """GoalImporter class validates rows of goals and creates them in a
+    single transaction. Categories of the board are loaded once, statuses
+    and priorities are checked against their choices"""
+
+    def __init__(
+        self,
+        board: Board,
+        user,
+        batch_size: int = BATCH_SIZE,
+        partial: bool = False,
+    ) -> None:
+        """Initialize the GoalImporter class
+        :param board: A Board instance goals are imported into
+        :param user: A User instance who becomes the author of goals
+        :param batch_size: An integer representing the number of rows
+        validated and inserted at once
+        :param partial: A boolean flag to create valid rows if some rows are
+        invalid, otherwise nothing is created
+        """
+        self._board = board
+        self._user = user
+        self._batch_size = batch_size
+        self._partial = partial
+        self._categories = set()
+        self._statuses = {value for value in Status.values if value != Status.archived}
+        self._priorities = set(Priority.values)
+
+    def run(self, rows: Iterable[dict]) -> dict:
+        """This method imports the rows
+        :param rows: An iterable of dictionaries with fields of goals
+        :return: A dictionary with numbers of created and invalid rows and
+        errors of first MAX_ERRORS invalid rows numbered from 1
+        """
+        self._categories = set(
+            Category.objects.filter(board=self._board, is_deleted=False).values_list(
+                "id", flat=True
+            )
+        )
+        report = {"created": 0, "invalid": 0, "errors": []}
+
+        try:
+            with transaction.atomic():
+                for number, batch in self._get_batches(rows):
+                    goals = self._validate_batch(number, batch, report)
+                    Goal.objects.bulk_create(goals)
+                    report["created"] += len(goals)
+
+                if report["invalid"] and not self._partial:
+                    raise ImportRollback
+
+        except ImportRollback:
+            report["created"] = 0
+
+        return report
+
+    def _get_batches(self, rows: Iterable[dict]) -> Iterator[tuple[int, list]]:
+        """This secondary method splits the rows into batches
+        :return: An iterator of tuples containing the number of the first
+        row of the batch and a list of rows
+        """
+        batch, first = [], 1
+        for number, row in enumerate(rows, 1):
+            batch.append(row)
+            if len(batch) >= self._batch_size:
+                yield first, batch
+                batch, first = [], number + 1
+
+        if batch:
+            yield first, batch
+
+    def _validate_batch(self, first: int, batch: list, report: dict) -> list[Goal]:
+        """This secondary method returns goals of valid rows of the batch and
+        adds errors of invalid ones to the report"""
+        today = timezone.now().date()
+        goals = []
+
+        for number, row in enumerate(batch, first):
+            if isinstance(row, dict):
+                values, errors = self._clean(row)
+            else:
+                values, errors = {}, {"row": [str(row)]}
+
+            if errors:
+                report["invalid"] += 1
+                if len(report["errors"]) < MAX_ERRORS:
+                    report["errors"].append({"row": number, "errors": errors})
+                continue
+
+            goals.append(
+                Goal(
+                    **values,
+                    board_id=self._board.id,
+                    user=self._user,
+                    created=today,
+                    updated=today,
+                )
+            )
+
+        return goals
+
+    def _clean(self, row: dict) -> tuple[dict, dict]:
+        """This secondary method converts values of the row
+        :return: A tuple containing values of goal fields and errors of
+        invalid fields
+        """
+        values, errors = {}, {}
+
+        # Values of NDJSON rows can be of any JSON type, only strings are
+        # accepted by text fields
+        title = row.get("title") or ""
+        if not isinstance(title, str):
+            errors["title"] = ["Not a valid string."]
+        elif not title.strip():
+            errors["title"] = ["This field is required."]
+        elif len(title.strip()) > TITLE_LENGTH:
+            errors["title"] = [
+                f"Ensure this field has no more than {TITLE_LENGTH} characters."
+            ]
+        else:
+            values["title"] = title.strip()
+
+        description = row.get("description") or None
+        if description is not None and not isinstance(description, str):
+            errors["description"] = ["Not a valid string."]
+        values["description"] = description
+
+        category = self._to_int(row.get("category"))
+        if category not in self._categories:
+            errors["category"] = ["The category doesn't exist on the board."]
+        values["category_id"] = category
+
+        for name, choices, default in (
+            ("status", self._statuses, Status.to_do),
+            ("priority", self._priorities, Priority.medium),
+        ):
+            value = row.get(name)
+            value = default if value in (None, "") else self._to_int(value)
+            if value not in choices:
+                errors[name] = [
+                    f"Choose one of {', '.join(map(str, sorted(choices)))}."
+                ]
+            values[name] = value
+
+        due_date = row.get("due_date")
+        try:
+            values["due_date"] = (
+                datetime.date.fromisoformat(due_date) if due_date else None
+            )
+        except (TypeError, ValueError):
+            errors["due_date"] = ["Use the YYYY-MM-DD format."]
+
+        return values, errors
+
+    @staticmethod
+    def _to_int(value) -> int | None:
+        """This secondary method converts a value to an integer, None is
+        returned for invalid values"""
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
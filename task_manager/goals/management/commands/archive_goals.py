@@ -0,0 +1,77 @@
+"""This file contains a Command class to archive overdue goals in the
+background instead of doing it on every list request"""
+import time
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from goals.models import Goal, Status, Watermark
+
+# -------------------------------------------------------------------------
+
+WATERMARK_NAME = "archive_goals"
+
+
+class Command(BaseCommand):
+    """Command class representing a custom command to archive overdue goals
+    by bounded batches"""
+
+    help = "Archives overdue goals by batches once or in a loop"
+
+    def add_arguments(self, parser) -> None:
+        """This method adds arguments of the command"""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Maximum number of goals to archive in one transaction",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Seconds between sweeps, the command runs once if it is 0",
+        )
+
+    def handle(self, *args, **options) -> None:
+        """This method runs the sweeper once or in a loop"""
+        while True:
+            archived = self.sweep(options["batch_size"])
+            self.stdout.write(f"Archived goals: {archived}")
+
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
+
+    @staticmethod
+    def sweep(batch_size: int) -> int:
+        """This method archives all overdue goals by batches and saves the
+        watermark of the sweep
+        :param batch_size: An integer representing the size of a batch
+        :return: An integer representing the number of archived goals
+        """
+        today = timezone.now().date()
+        archived = 0
+
+        while True:
+            with transaction.atomic():
+                # The partial index of not archived goals is ordered by due
+                # dates, so archived history is never scanned
+                overdue = Goal.objects.filter(
+                    due_date__lt=today, status__lt=Status.archived
+                )
+                batch = list(
+                    overdue.select_for_update(skip_locked=True)
+                    .order_by("due_date", "id")
+                    .values_list("id", flat=True)[:batch_size]
+                )
+                if not batch:
+                    break
+
+                # Goals changed since they were selected are checked again
+                archived += overdue.filter(id__in=batch).update(status=Status.archived)
+
+        Watermark.objects.update_or_create(
+            name=WATERMARK_NAME,
+            defaults={"swept_until": today, "swept_at": timezone.now()},
+        )
+        return archived
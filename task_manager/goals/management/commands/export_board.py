@@ -0,0 +1,66 @@
+"""This file contains a Command class to export goals of a board into a file
+or the standard output"""
+from django.core.management import BaseCommand, CommandError
+from goals.export import CHUNK_SIZE, CONTENT_TYPES, export_board
+from goals.models import Board
+
+# -------------------------------------------------------------------------
+
+
+class Command(BaseCommand):
+    """Command class representing a custom command to dump goals of a board
+    and optionally their comments as NDJSON or CSV. Rows are streamed, so
+    boards of any size can be exported"""
+
+    help = "Exports goals of a board as NDJSON or CSV"
+
+    def add_arguments(self, parser) -> None:
+        """This method adds arguments of the command"""
+        parser.add_argument("board", type=int, help="Id of the board")
+        parser.add_argument(
+            "--output",
+            choices=list(CONTENT_TYPES),
+            default="ndjson",
+            help="Format of the export",
+        )
+        parser.add_argument(
+            "--comments",
+            action="store_true",
+            help="Add comments of goals",
+        )
+        parser.add_argument(
+            "--file",
+            default="-",
+            help="Path of the file to write, the standard output by default",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help="Number of rows fetched from the database at once",
+        )
+
+    def handle(self, *args, **options) -> None:
+        """This method writes the export by chunks"""
+        if not Board.objects.filter(id=options["board"], is_deleted=False).exists():
+            raise CommandError(f"Board {options['board']} does not exist")
+
+        chunks = export_board(
+            options["board"],
+            options["output"],
+            options["comments"],
+            options["chunk_size"],
+        )
+        if options["file"] == "-":
+            self.write(chunks, self.stdout)
+            return
+
+        with open(options["file"], "w", encoding="utf-8", newline="") as file:
+            self.write(chunks, file)
+
+    @staticmethod
+    def write(chunks, file) -> None:
+        """This method writes chunks of the export into the file"""
+        for chunk in chunks:
+            if chunk:
+                file.write(chunk)
@@ -0,0 +1,71 @@
+"""This file contains a Command class to import goals of a board from a file
+or the standard input"""
+import json
+import sys
+from django.core.management import BaseCommand, CommandError
+from core.models import User
+from goals.imports import BATCH_SIZE, INPUT_FORMATS, GoalImporter, read_rows
+from goals.models import Board
+
+# -------------------------------------------------------------------------
+
+
+class Command(BaseCommand):
+    """Command class representing a custom command to create goals of a
+    board from a CSV or NDJSON file in a single transaction. The command
+    prints a report with errors of invalid rows"""
+
+    help = "Imports goals of a board from CSV or NDJSON"
+
+    def add_arguments(self, parser) -> None:
+        """This method adds arguments of the command"""
+        parser.add_argument("board", type=int, help="Id of the board")
+        parser.add_argument(
+            "file", help="Path of the file to read, - for the standard input"
+        )
+        parser.add_argument(
+            "--user",
+            required=True,
+            help="Username of the author of goals",
+        )
+        parser.add_argument(
+            "--input",
+            choices=INPUT_FORMATS,
+            help="Format of the file, it is chosen by the extension by default",
+        )
+        parser.add_argument(
+            "--partial",
+            action="store_true",
+            help="Create valid rows even if some rows are invalid",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Number of rows validated and inserted at once",
+        )
+
+    def handle(self, *args, **options) -> None:
+        """This method imports the file and prints the report"""
+        board = Board.objects.filter(id=options["board"], is_deleted=False).first()
+        if board is None:
+            raise CommandError(f"Board {options['board']} does not exist")
+
+        user = User.objects.filter(username=options["user"]).first()
+        if user is None:
+            raise CommandError(f"User {options['user']} does not exist")
+
+        input_format = options["input"] or (
+            "csv" if options["file"].endswith(".csv") else "ndjson"
+        )
+        importer = GoalImporter(board, user, options["batch_size"], options["partial"])
+
+        if options["file"] == "-":
+            report = importer.run(read_rows(sys.stdin, input_format))
+        else:
+            with open(options["file"], encoding="utf-8-sig", newline="") as file:
+                report = importer.run(read_rows(file, input_format))
+
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+        if report["invalid"] and not options["partial"]:
+            raise CommandError("Nothing was imported as some rows are invalid")
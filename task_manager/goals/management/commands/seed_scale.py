@@ -0,0 +1,274 @@
+"""This file contains a Command class to generate a large synthetic dataset
+for load and scale testing"""
+import datetime
+import random
+from django.contrib.auth.hashers import make_password
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from bot.models import TgUser
+from core.models import User
+from goals.models import (
+    Board,
+    Category,
+    Comment,
+    Goal,
+    Participant,
+    Priority,
+    Roles,
+    Status,
+)
+
+# -------------------------------------------------------------------------
+
+STATUS_WEIGHTS = {
+    Status.to_do: 40,
+    Status.in_progress: 30,
+    Status.done: 20,
+    Status.archived: 10,
+}
+PRIORITY_WEIGHTS = {
+    Priority.low: 20,
+    Priority.medium: 40,
+    Priority.high: 30,
+    Priority.critical: 10,
+}
+ROLE_WEIGHTS = {
+    Roles.writer: 30,
+    Roles.reader: 70,
+}
+
+
+class Command(BaseCommand):
+    """Command class representing a custom command to fill the database with
+    users, boards, participants, categories, goals, comments and telegram
+    users. The data is generated by chunks of users, so the memory usage
+    doesn't depend on the total size of the dataset"""
+
+    help = "Generates a deterministic synthetic dataset for scale testing"
+
+    def add_arguments(self, parser) -> None:
+        """This method adds arguments of the command"""
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--boards-per-user", type=int, default=2)
+        parser.add_argument("--participants-per-board", type=int, default=4)
+        parser.add_argument("--categories-per-board", type=int, default=3)
+        parser.add_argument("--goals-per-category", type=int, default=20)
+        parser.add_argument("--comments-per-goal", type=int, default=2)
+        parser.add_argument(
+            "--tg-users-share",
+            type=float,
+            default=0.3,
+            help="Share of users linked with a telegram account",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of users generated with their data at once",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of rows inserted by one query",
+        )
+        parser.add_argument("--prefix", default="seed")
+
+    def handle(self, *args, **options) -> None:
+        """This method generates the dataset chunk by chunk"""
+        self.options = options
+        self.random = random.Random(options["seed"])
+        self.today = timezone.now().date()
+        self.password = make_password("password")
+        total = options["users"]
+
+        for start in range(0, total, options["chunk_size"]):
+            stop = min(start + options["chunk_size"], total)
+            with transaction.atomic():
+                counts = self.create_chunk(start, stop)
+
+            self.stdout.write(
+                f"Users {stop}/{total}: "
+                + ", ".join(f"{name} {count}" for name, count in counts.items())
+            )
+
+    def create_chunk(self, start: int, stop: int) -> dict[str, int]:
+        """This method creates users with indexes from start to stop and all
+        their data
+        :return: A dictionary containing numbers of created rows
+        """
+        options = self.options
+        prefix = f"{options['prefix']}{options['seed']}"
+
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=f"{prefix}_user_{index}",
+                    email=f"{prefix}_user_{index}@example.com",
+                    password=self.password,
+                )
+                for index in range(start, stop)
+            ],
+            batch_size=options["batch_size"],
+        )
+        tg_users = self.create_tg_users(users, start)
+
+        boards = Board.objects.bulk_create(
+            [
+                Board(
+                    title=f"Board {index}.{number}",
+                    is_deleted=False,
+                    **self.get_dates(),
+                )
+                for index in range(start, stop)
+                for number in range(options["boards_per_user"])
+            ],
+            batch_size=options["batch_size"],
+        )
+        members = self.create_participants(users, boards)
+        categories = self.create_categories(boards, members)
+
+        goals = comments = 0
+        for goals_batch in self.generate_goals(categories, members):
+            Goal.objects.bulk_create(goals_batch)
+            goals += len(goals_batch)
+            comments += self.create_comments(goals_batch, members)
+
+        return {
+            "boards": len(boards),
+            "categories": len(categories),
+            "goals": goals,
+            "comments": comments,
+            "telegram users": tg_users,
+        }
+
+    def create_tg_users(self, users: list[User], start: int) -> int:
+        """This method links a share of users with telegram accounts"""
+        tg_users = [
+            TgUser(
+                tg_id=10**9 + index,
+                username=user.username,
+                bot_state=TgUser.BotStates.confirmed,
+                user=user,
+            )
+            for index, user in enumerate(users, start)
+            if self.random.random() < self.options["tg_users_share"]
+        ]
+        TgUser.objects.bulk_create(tg_users, batch_size=self.options["batch_size"])
+        return len(tg_users)
+
+    def create_participants(
+        self, users: list[User], boards: list[Board]
+    ) -> dict[int, list[tuple[int, int]]]:
+        """This method adds owners and random members of the chunk to boards
+        :return: A dictionary where keys are board ids and values are lists
+        of tuples with user ids and roles
+        """
+        boards_per_user = self.options["boards_per_user"]
+        extra = min(self.options["participants_per_board"] - 1, len(users) - 1)
+        members = {}
+
+        for number, board in enumerate(boards):
+            owner = users[number // boards_per_user]
+            others = self.random.sample(users, extra + 1)
+            members[board.id] = [(owner.id, Roles.owner)] + [
+                (user.id, self.choose(ROLE_WEIGHTS))
+                for user in others
+                if user.id != owner.id
+            ][: max(extra, 0)]
+
+        Participant.objects.bulk_create(
+            [
+                Participant(
+                    board_id=board_id, user_id=user_id, role=role, **self.get_dates()
+                )
+                for board_id, board_members in members.items()
+                for user_id, role in board_members
+            ],
+            batch_size=self.options["batch_size"],
+        )
+        return members
+
+    def create_categories(self, boards: list[Board], members: dict) -> list[Category]:
+        """This method creates categories of boards by their owners"""
+        return Category.objects.bulk_create(
+            [
+                Category(
+                    title=f"Category {board.id}.{number}",
+                    user_id=members[board.id][0][0],
+                    board_id=board.id,
+                    is_deleted=False,
+                    **self.get_dates(),
+                )
+                for board in boards
+                for number in range(self.options["categories_per_board"])
+            ],
+            batch_size=self.options["batch_size"],
+        )
+
+    def generate_goals(self, categories: list[Category], members: dict):
+        """This method generates goals of categories by batches
+        :return: A generator of lists of Goal instances
+        """
+        batch = []
+
+        for category in categories:
+            writers = [
+                user_id
+                for user_id, role in members[category.board_id]
+                if role != Roles.reader
+            ]
+            for number in range(self.options["goals_per_category"]):
+                batch.append(
+                    Goal(
+                        title=f"Goal {category.id}.{number}",
+                        description=f"Description of the goal {category.id}.{number}",
+                        category_id=category.id,
+                        board_id=category.board_id,
+                        user_id=self.random.choice(writers),
+                        status=self.choose(STATUS_WEIGHTS),
+                        priority=self.choose(PRIORITY_WEIGHTS),
+                        due_date=self.get_due_date(),
+                        **self.get_dates(),
+                    )
+                )
+                if len(batch) >= self.options["batch_size"]:
+                    yield batch
+                    batch = []
+
+        if batch:
+            yield batch
+
+    def create_comments(self, goals: list[Goal], members: dict) -> int:
+        """This method creates comments of goals by members of their boards"""
+        comments = [
+            Comment(
+                goal_id=goal.id,
+                board_id=goal.board_id,
+                user_id=self.random.choice(members[goal.board_id])[0],
+                text=f"Comment {number} of the goal {goal.id}",
+                **self.get_dates(),
+            )
+            for goal in goals
+            for number in range(self.options["comments_per_goal"])
+        ]
+        Comment.objects.bulk_create(comments, batch_size=self.options["batch_size"])
+        return len(comments)
+
+    def choose(self, weights: dict) -> int:
+        """This method returns a random key of the dictionary by weights"""
+        return self.random.choices(list(weights), list(weights.values()))[0]
+
+    def get_due_date(self) -> datetime.date | None:
+        """This method returns a random due date, some goals have no one"""
+        if self.random.random() < 0.1:
+            return None
+
+        return self.today + datetime.timedelta(days=self.random.randint(-30, 90))
+
+    def get_dates(self) -> dict[str, datetime.date]:
+        """This method returns random create and update dates"""
+        created = self.today - datetime.timedelta(days=self.random.randint(0, 365))
+        return {"created": created, "updated": created}
@@ -0,0 +1,199 @@
+"""This file contains a RowMapper class building representations of rows
+loaded by .values() the same way as read-only serializers do and mixins of
+views loading only the columns their serializers need. Model instances and
+serializer fields aren't created for every row, so large pages are rendered
+much faster"""
+from functools import lru_cache
+from typing import Callable
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from goals.serializers.dynamic import (
+    FieldOptions,
+    get_field_options,
+    get_query_fields,
+)
+
+# -------------------------------------------------------------------------
+
+Converter = Callable[[dict], object]
+
+# Fields representing values loaded from the database as is
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+class RowMapper:
+    """The RowMapper class compiles fields of a serializer into functions
+    reading values from rows. Nested serializers are read from columns of
+    the related model, so the serializer should not use custom sources or
+    methods"""
+
+    def __init__(
+        self,
+        serializer_class: type[serializers.Serializer],
+        options: FieldOptions = FieldOptions(),
+    ) -> None:
+        """Initialize the RowMapper class
+        :param serializer_class: A serializer class which representation
+        should be repeated
+        :param options: A FieldOptions instance representing fields chosen
+        by the request
+        """
+        self.columns: list[str] = []
+        serializer = serializer_class(context={"field_options": options})
+        self._converters = self._compile(serializer.fields, "")
+
+    def map(self, row: dict) -> dict:
+        """This method returns a representation of the row"""
+        return {name: convert(row) for name, convert in self._converters}
+
+    def map_rows(self, rows) -> list[dict]:
+        """This method returns representations of the rows"""
+        return [self.map(row) for row in rows]
+
+    def _compile(self, fields, prefix: str) -> list[tuple[str, Converter]]:
+        """This secondary method returns pairs of field names and functions
+        building their values from a row"""
+        converters = []
+        for name, field in fields.items():
+            if field.write_only:
+                continue
+
+            if not field.source or "." in field.source or field.source == "*":
+                raise ImproperlyConfigured(
+                    f"The field {name} can't be read from a row of values"
+                )
+
+            column = prefix + field.source
+            self.columns.append(column)
+
+            if isinstance(field, serializers.BaseSerializer):
+                nested = self._compile(field.fields, column + "__")
+                converters.append((name, self._get_nested(column, nested)))
+            else:
+                converters.append((name, self._get_value(column, field)))
+
+        return converters
+
+    @staticmethod
+    def _get_nested(column: str, converters: list) -> Converter:
+        """This secondary method returns a function building a nested
+        representation or None if the foreign key is empty"""
+
+        def convert(row: dict):
+            if row[column] is None:
+                return None
+            return {name: nested(row) for name, nested in converters}
+
+        return convert
+
+    @staticmethod
+    def _get_value(column: str, field: serializers.Field) -> Converter:
+        """This secondary method returns a function converting a column
+        value as the field does"""
+        if isinstance(field, serializers.ChoiceField):
+            choices = {key: field.to_representation(key) for key in field.choices}
+
+            def convert(row: dict):
+                value = row[column]
+                return None if value is None else choices.get(value, value)
+
+        elif isinstance(field, IDENTITY_FIELDS):
+
+            def convert(row: dict):
+                return row[column]
+
+        elif (
+            type(field) is serializers.DateField
+            and getattr(field, "format", api_settings.DATE_FORMAT) == ISO_8601
+        ):
+
+            def convert(row: dict):
+                value = row[column]
+                return None if value is None else value.isoformat()
+
+        else:
+            to_representation = field.to_representation
+
+            def convert(row: dict):
+                value = row[column]
+                return None if value is None else to_representation(value)
+
+        return convert
+
+
+@lru_cache(maxsize=256)
+def get_row_mapper(
+    serializer_class: type[serializers.Serializer],
+    options: FieldOptions = FieldOptions(),
+) -> RowMapper:
+    """This function returns a RowMapper of the serializer class and the
+    chosen fields compiled once per process"""
+    return RowMapper(serializer_class, options)
+
+
+def get_ordering_columns(queryset) -> list[str]:
+    """This function returns fields and annotations the queryset is ordered
+    by, the pagination reads them from the rows of a page"""
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    columns = [name.lstrip("-") for name in ordering if isinstance(name, str)]
+    return ["id" if name == "pk" else name for name in columns]
+
+
+class FastListMixin:
+    """The FastListMixin class makes a list view load rows by .values() and
+    build their representations by a RowMapper of the serializer class
+    instead of serializing model instances. The output is the same as the
+    serializer's one"""
+
+    def list(self, request, *args, **kwargs):
+        mapper = get_row_mapper(self.get_serializer_class(), get_field_options(request))
+        queryset = self.filter_queryset(self.get_queryset())
+        columns = dict.fromkeys(
+            [
+                *mapper.columns,
+                *get_ordering_columns(queryset),
+                *queryset.query.annotations,
+                "id",
+            ]
+        )
+        rows = queryset.values(*columns)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(mapper.map_rows(page))
+
+        return Response(mapper.map_rows(rows))
+
+
+class SparseFieldsMixin:
+    """The SparseFieldsMixin class makes a view load only the columns used by
+    the fields chosen by the request. Fields listed in the only_fields
+    attribute are always loaded as permissions check them"""
+
+    only_fields: tuple[str, ...] = ()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if get_field_options(self.request) == FieldOptions():
+            return queryset
+
+        columns, relations, prefetched = get_query_fields(self.get_serializer().fields)
+        queryset = queryset.select_related(None)
+        if relations:
+            queryset = queryset.select_related(*relations)
+        if not prefetched:
+            queryset = queryset.prefetch_related(None)
+
+        ordering = [
+            name
+            for name in get_ordering_columns(queryset)
+            if name not in queryset.query.annotations
+        ]
+        return queryset.only(*columns, *ordering, *self.only_fields)
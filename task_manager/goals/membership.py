@@ -0,0 +1,106 @@
+"""This file contains functions to resolve board roles of the current user.
+The roles are loaded by a single query once per request and can also be
+cached for a short time between requests"""
+from django.conf import settings
+from django.core.cache import cache
+from goals.models import Participant, Roles
+
+# -------------------------------------------------------------------------
+
+EDITOR_ROLES = (Roles.owner, Roles.writer)
+CACHE_KEY = "board_roles:{user_id}"
+
+
+def get_board_roles(request) -> dict[int, int]:
+    """This function returns roles of the current user for all boards he
+    participates in. The result is saved into the request so all
+    permission classes and querysets of the request share it
+    :param request: A Request instance
+    :return: A dictionary where keys are board ids and values are roles
+    """
+    roles = getattr(request, "_board_roles", None)
+
+    if roles is None:
+        roles = _load_board_roles(request.user.id)
+        request._board_roles = roles
+
+    return roles
+
+
+def get_board_ids(request, roles: tuple = ()) -> list[int]:
+    """This function returns ids of the boards the current user participates
+    in
+    :param request: A Request instance
+    :param roles: A tuple of roles to filter boards by, all roles are
+    accepted if it is empty
+    :return: A list of board ids
+    """
+    return [
+        board_id
+        for board_id, role in get_board_roles(request).items()
+        if not roles or role in roles
+    ]
+
+
+def has_board_role(request, board_id, roles: tuple = ()) -> bool:
+    """This function checks if the current user participates in the board
+    :param request: A Request instance
+    :param board_id: An id of the board to check
+    :param roles: A tuple of required roles, any role is accepted if it is
+    empty
+    :return: True if the user has the required role in the board
+    """
+    role = get_board_roles(request).get(_to_int(board_id))
+
+    if role is None:
+        return False
+
+    return not roles or role in roles
+
+
+def invalidate_board_roles(*user_ids: int) -> None:
+    """This function removes cached roles of the provided users, it should
+    be called every time participants of a board are changed
+    :param user_ids: Ids of users whose roles were changed
+    """
+    if _get_cache_ttl():
+        cache.delete_many([CACHE_KEY.format(user_id=user_id) for user_id in user_ids])
+
+
+def _load_board_roles(user_id: int) -> dict[int, int]:
+    """This secondary function loads roles of the user from the cache or
+    from the database
+    :param user_id: An id of the user
+    :return: A dictionary where keys are board ids and values are roles
+    """
+    ttl = _get_cache_ttl()
+    key = CACHE_KEY.format(user_id=user_id)
+
+    if ttl:
+        roles = cache.get(key)
+        if roles is not None:
+            return roles
+
+    roles = dict(
+        Participant.objects.filter(user_id=user_id).values_list("board_id", "role")
+    )
+
+    if ttl:
+        cache.set(key, roles, ttl)
+
+    return roles
+
+
+def _get_cache_ttl() -> int:
+    """This secondary function returns the cache lifetime of board roles,
+    the cache is disabled if it is 0"""
+    return getattr(settings, "BOARD_ROLES_CACHE_TTL", 0)
+
+
+def _to_int(value) -> int | None:
+    """This secondary function converts ids received from a request to
+    integers"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,51 @@
+# Generated by Django 4.1.7 on 2026-10-18 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("goals", "0004_alter_category_board_alter_participant_board_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Watermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(max_length=50, unique=True, verbose_name="Name"),
+                ),
+                (
+                    "swept_until",
+                    models.DateField(blank=True, null=True, verbose_name="Swept until"),
+                ),
+                (
+                    "swept_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Last swept"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Watermark",
+                "verbose_name_plural": "Watermarks",
+            },
+        ),
+        migrations.AlterField(
+            model_name="goal",
+            name="due_date",
+            field=models.DateField(
+                blank=True, db_index=True, null=True, verbose_name="Due date"
+            ),
+        ),
+    ]
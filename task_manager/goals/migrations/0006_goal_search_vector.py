@@ -0,0 +1,76 @@
+# Generated by Django 4.1.7 on 2026-10-18 19:03
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('pg_catalog.russian', coalesce({row}title, '')), 'A') ||
+    setweight(to_tsvector('pg_catalog.english', coalesce({row}title, '')), 'A') ||
+    setweight(to_tsvector('pg_catalog.russian', coalesce({row}description, '')), 'B') ||
+    setweight(to_tsvector('pg_catalog.english', coalesce({row}description, '')), 'B')
+"""
+
+CREATE_SQL = f"""
+CREATE INDEX goal_search_vector_idx ON goals_goal USING gin (search_vector);
+
+CREATE FUNCTION goals_goal_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {SEARCH_VECTOR_SQL.format(row="NEW.")};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER goals_goal_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, description ON goals_goal
+FOR EACH ROW EXECUTE FUNCTION goals_goal_search_vector_update();
+
+UPDATE goals_goal SET search_vector = {SEARCH_VECTOR_SQL.format(row="")};
+"""
+
+DROP_SQL = """
+DROP TRIGGER IF EXISTS goals_goal_search_vector_trigger ON goals_goal;
+DROP FUNCTION IF EXISTS goals_goal_search_vector_update();
+DROP INDEX IF EXISTS goal_search_vector_idx;
+"""
+
+
+def create_search_vector(apps, schema_editor):
+    """The GIN index and the trigger keeping the search vector up to date
+    are only available in PostgreSQL"""
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(CREATE_SQL)
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(DROP_SQL)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("goals", "0005_goal_due_date_index_watermark"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="goal",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True, verbose_name="Search vector"
+            ),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name="goal",
+                    index=django.contrib.postgres.indexes.GinIndex(
+                        fields=["search_vector"], name="goal_search_vector_idx"
+                    ),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_search_vector, drop_search_vector),
+            ],
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.1.7 on 2026-10-18 19:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("goals", "0006_goal_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="board",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="comments",
+                to="goals.board",
+                verbose_name="Board",
+            ),
+        ),
+        migrations.AddField(
+            model_name="goal",
+            name="board",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="goals",
+                to="goals.board",
+                verbose_name="Board",
+            ),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.1.7 on 2026-10-18 19:05
+
+from django.db import migrations, transaction
+from django.db.models import Max, OuterRef, Subquery
+
+CHUNK_SIZE = 10000
+
+
+def fill_by_chunks(model, board_subquery):
+    """Boards are filled by ranges of ids, so every transaction locks a
+    bounded number of rows"""
+    last_id = model.objects.aggregate(last_id=Max("id"))["last_id"] or 0
+
+    for start in range(0, last_id + 1, CHUNK_SIZE):
+        with transaction.atomic():
+            model.objects.filter(
+                id__gte=start,
+                id__lt=start + CHUNK_SIZE,
+                board__isnull=True,
+            ).update(board_id=board_subquery)
+
+
+def fill_boards(apps, schema_editor):
+    Category = apps.get_model("goals", "Category")
+    Goal = apps.get_model("goals", "Goal")
+    Comment = apps.get_model("goals", "Comment")
+
+    fill_by_chunks(
+        Goal,
+        Subquery(
+            Category.objects.filter(id=OuterRef("category_id")).values("board_id")[:1]
+        ),
+    )
+    fill_by_chunks(
+        Comment,
+        Subquery(Goal.objects.filter(id=OuterRef("goal_id")).values("board_id")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("goals", "0007_goal_comment_board"),
+    ]
+
+    operations = [migrations.RunPython(fill_boards, migrations.RunPython.noop)]
@@ -0,0 +1,33 @@
+# Generated by Django 4.1.7 on 2026-10-18 19:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("goals", "0008_fill_goal_comment_board"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="comment",
+            name="board",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="comments",
+                to="goals.board",
+                verbose_name="Board",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="goal",
+            name="board",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="goals",
+                to="goals.board",
+                verbose_name="Board",
+            ),
+        ),
+    ]
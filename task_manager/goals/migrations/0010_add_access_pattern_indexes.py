@@ -0,0 +1,90 @@
+# Generated by Django 4.1.7 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+INDEXES = [
+    (
+        "board",
+        models.Index(
+            condition=models.Q(("is_deleted", False)),
+            fields=["title"],
+            name="board_active_title_idx",
+        ),
+    ),
+    (
+        "category",
+        models.Index(
+            condition=models.Q(("is_deleted", False)),
+            fields=["board", "title"],
+            name="category_active_board_idx",
+        ),
+    ),
+    (
+        "comment",
+        models.Index(
+            fields=["goal", "-created", "id"], name="comment_goal_created_idx"
+        ),
+    ),
+    (
+        "goal",
+        models.Index(
+            condition=models.Q(("status__lt", 4)),
+            fields=["board", "priority", "id"],
+            name="goal_active_priority_idx",
+        ),
+    ),
+    (
+        "goal",
+        models.Index(
+            condition=models.Q(("status__lt", 4)),
+            fields=["board", "due_date"],
+            name="goal_active_due_date_idx",
+        ),
+    ),
+    (
+        "participant",
+        models.Index(
+            fields=["user", "board", "role"], name="participant_user_board_idx"
+        ),
+    ),
+]
+
+
+def get_options(schema_editor) -> dict:
+    """Indexes are built without locking writes in PostgreSQL, other
+    databases don't support it"""
+    if schema_editor.connection.vendor == "postgresql":
+        return {"concurrently": True}
+    return {}
+
+
+def add_indexes(apps, schema_editor):
+    for model_name, index in INDEXES:
+        model = apps.get_model("goals", model_name)
+        schema_editor.add_index(model, index, **get_options(schema_editor))
+
+
+def remove_indexes(apps, schema_editor):
+    for model_name, index in INDEXES:
+        model = apps.get_model("goals", model_name)
+        schema_editor.remove_index(model, index, **get_options(schema_editor))
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("goals", "0009_alter_goal_comment_board"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name=model_name, index=index)
+                for model_name, index in INDEXES
+            ],
+            database_operations=[
+                migrations.RunPython(add_indexes, remove_indexes),
+            ],
+        ),
+    ]
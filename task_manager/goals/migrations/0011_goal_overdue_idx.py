@@ -0,0 +1,46 @@
+# Generated by Django 4.1.7 on 2026-10-18 19:39
+
+from django.db import migrations, models
+
+INDEX = models.Index(
+    condition=models.Q(("status__lt", 4)),
+    fields=["due_date", "id"],
+    name="goal_overdue_idx",
+)
+
+
+def get_options(schema_editor) -> dict:
+    """The index is built without locking writes in PostgreSQL, other
+    databases don't support it"""
+    if schema_editor.connection.vendor == "postgresql":
+        return {"concurrently": True}
+    return {}
+
+
+def add_index(apps, schema_editor):
+    model = apps.get_model("goals", "goal")
+    schema_editor.add_index(model, INDEX, **get_options(schema_editor))
+
+
+def remove_index(apps, schema_editor):
+    model = apps.get_model("goals", "goal")
+    schema_editor.remove_index(model, INDEX, **get_options(schema_editor))
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("goals", "0010_add_access_pattern_indexes"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name="goal", index=INDEX),
+            ],
+            database_operations=[
+                migrations.RunPython(add_index, remove_index),
+            ],
+        ),
+    ]
@@ -1,4 +1,6 @@
 """This file contains entities such as Category, Goal and Comment"""
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
@@ -33,6 +35,35 @@ class Roles(models.IntegerChoices):
     reader = 3, _("Reader")
 
 
+class GoalQuerySet(models.QuerySet):
+    """This class provides query shortcuts for the Goal model"""
+
+    def active(self) -> "GoalQuerySet":
+        """This method returns goals which are neither archived nor overdue.
+        Overdue goals are archived by the archive_goals command, so until
+        the next sweep they are treated as archived at query time"""
+        today = timezone.now().date()
+        return self.filter(
+            models.Q(due_date__isnull=True) | models.Q(due_date__gte=today),
+            status__lt=Status.archived,
+        )
+
+    def overdue(self) -> "GoalQuerySet":
+        """This method returns overdue goals which are still not archived"""
+        return self.filter(
+            due_date__lt=timezone.now().date(),
+            status__lt=Status.archived,
+        )
+
+
+class GoalManager(models.Manager.from_queryset(GoalQuerySet)):
+    """This class provides a manager for the Goal model which doesn't load
+    the search vector as it is only used by the database"""
+
+    def get_queryset(self) -> GoalQuerySet:
+        return super().get_queryset().defer("search_vector")
+
+
 class ModelDateMixin(models.Model):
     """This is an abstract mixin class providing a logic to work with fields
     common for all models"""
@@ -78,6 +109,13 @@ class Board(ModelDateMixin):
     class Meta:
         verbose_name = _("Board")
         verbose_name_plural = _("Boards")
+        indexes = [
+            models.Index(
+                fields=["title"],
+                condition=models.Q(is_deleted=False),
+                name="board_active_title_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -112,6 +150,12 @@ class Participant(ModelDateMixin):
         verbose_name = _("Participant")
         verbose_name_plural = _("Participants")
         unique_together = ("board", "user")
+        indexes = [
+            models.Index(
+                fields=["user", "board", "role"],
+                name="participant_user_board_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.role
@@ -137,6 +181,13 @@ class Category(ModelDateMixin):
     class Meta:
         verbose_name = _("Category")
         verbose_name_plural = _("Categories")
+        indexes = [
+            models.Index(
+                fields=["board", "title"],
+                condition=models.Q(is_deleted=False),
+                name="category_active_board_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -151,10 +202,18 @@ class Goal(ModelDateMixin):
         verbose_name=_("Goal category"),
     )
 
+    board = models.ForeignKey(
+        Board,
+        on_delete=models.PROTECT,
+        verbose_name=_("Board"),
+        related_name="goals",
+    )
+
     due_date = models.DateField(
         verbose_name=_("Due date"),
         null=True,
         blank=True,
+        db_index=True,
     )
 
     status = models.PositiveSmallIntegerField(
@@ -186,13 +245,57 @@ class Goal(ModelDateMixin):
         blank=True,
     )
 
+    search_vector = SearchVectorField(
+        verbose_name=_("Search vector"),
+        null=True,
+        editable=False,
+    )
+
+    objects = GoalManager()
+
     class Meta:
         verbose_name = _("Goal")
         verbose_name_plural = _("Goals")
+        indexes = [
+            GinIndex(fields=["search_vector"], name="goal_search_vector_idx"),
+            models.Index(
+                fields=["board", "priority", "id"],
+                condition=models.Q(status__lt=Status.archived),
+                name="goal_active_priority_idx",
+            ),
+            models.Index(
+                fields=["board", "due_date"],
+                condition=models.Q(status__lt=Status.archived),
+                name="goal_active_due_date_idx",
+            ),
+            models.Index(
+                fields=["due_date", "id"],
+                condition=models.Q(status__lt=Status.archived),
+                name="goal_overdue_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        """This method copies the board of the goal's category to the goal
+        and its comments every time the category is saved"""
+        update_fields = kwargs.get("update_fields")
+
+        if update_fields is None or "category" in update_fields:
+            board_id = self.category.board_id
+            moved = self.id is not None and self.board_id != board_id
+            self.board_id = board_id
+
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "board"}
+
+            if moved:
+                self.comment_set.update(board_id=board_id)
+
+        return super().save(*args, **kwargs)
+
 
 class Comment(ModelDateMixin):
     """This class represents a comment model"""
@@ -203,6 +306,13 @@ class Comment(ModelDateMixin):
         verbose_name=_("Goal"),
     )
 
+    board = models.ForeignKey(
+        Board,
+        on_delete=models.PROTECT,
+        verbose_name=_("Board"),
+        related_name="comments",
+    )
+
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -218,6 +328,49 @@ class Comment(ModelDateMixin):
     class Meta:
         verbose_name = _("Comment")
         verbose_name_plural = _("Comments")
+        indexes = [
+            models.Index(
+                fields=["goal", "-created", "id"],
+                name="comment_goal_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.text
+
+    def save(self, *args, **kwargs):
+        """This method copies the board of the goal to a new comment"""
+        if not self.id:
+            self.board_id = self.goal.board_id
+
+        return super().save(*args, **kwargs)
+
+
+class Watermark(models.Model):
+    """This class represents a watermark model storing the progress of
+    periodic background jobs such as the overdue goals sweeper"""
+
+    name = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name=_("Name"),
+    )
+
+    swept_until = models.DateField(
+        verbose_name=_("Swept until"),
+        null=True,
+        blank=True,
+    )
+
+    swept_at = models.DateTimeField(
+        verbose_name=_("Last swept"),
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = _("Watermark")
+        verbose_name_plural = _("Watermarks")
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,240 @@
+"""This file contains pagination classes for list views of the goals app.
+The keyset pagination is enabled by the cursor query parameter, so the limit
+offset pagination stays available for existing clients"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+# -------------------------------------------------------------------------
+
+
+class KeysetPagination(BasePagination):
+    """The KeysetPagination class serves to paginate querysets by the values
+    of their ordering fields instead of offsets. It doesn't count rows and
+    its cost doesn't depend on the page depth"""
+
+    cursor_query_param = "cursor"
+    limit_query_param = "limit"
+    default_limit = 50
+    max_limit = 1000
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None) -> list:
+        """This method returns a page of the queryset located after or
+        before the position saved in the cursor"""
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.ordering = self.get_ordering(queryset)
+        self.fields = self.get_fields(queryset)
+        values, reverse = self.decode_cursor(request)
+
+        ordering = [
+            (field, descending != reverse) for field, descending in self.ordering
+        ]
+        queryset = queryset.order_by(*self._get_order_by(ordering))
+        if values is not None:
+            queryset = queryset.filter(self._get_position_filter(ordering, values))
+
+        page = list(queryset[: self.limit + 1])
+        has_more = len(page) > self.limit
+        page = page[: self.limit]
+
+        if reverse:
+            page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+
+        self.page = page
+        return page
+
+    def get_paginated_response(self, data) -> Response:
+        """This method returns a response with cursors to the next and
+        previous pages"""
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_next_link(self) -> str | None:
+        """This method returns a link to the next page"""
+        if not self.has_next or not self.page:
+            return None
+
+        return self._get_link(self.page[-1], reverse=False)
+
+    def get_previous_link(self) -> str | None:
+        """This method returns a link to the previous page"""
+        if not self.has_previous or not self.page:
+            return None
+
+        return self._get_link(self.page[0], reverse=True)
+
+    def get_limit(self, request) -> int:
+        """This method returns the page size requested by the client"""
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+
+        return min(max(limit, 1), self.max_limit)
+
+    @staticmethod
+    def get_ordering(queryset) -> list[tuple[str, bool]]:
+        """This method returns the ordering of the queryset as a list of
+        field names and descending flags. The primary key is added to the end
+        of the ordering to make it unique"""
+        order_by = list(queryset.query.order_by or queryset.model._meta.ordering)
+        ordering = [
+            (field.lstrip("-"), field.startswith("-"))
+            for field in order_by
+            if isinstance(field, str)
+        ]
+
+        if not any(field in ("id", "pk") for field, _ in ordering):
+            ordering.append(("id", False))
+
+        return ordering
+
+    def get_fields(self, queryset) -> dict:
+        """This method returns model fields used in the ordering"""
+        fields = {}
+        for name, _ in self.ordering:
+            try:
+                fields[name] = queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                fields[name] = None
+
+        return fields
+
+    def decode_cursor(self, request) -> tuple[list | None, bool]:
+        """This method decodes the cursor received from the client
+        :return: A tuple containing values of ordering fields of the row
+        where the page should start and a flag of the backward direction
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            if cursor["o"] != self._get_ordering_key():
+                raise ValueError
+            values = [
+                self._to_python(name, value)
+                for (name, _), value in zip(self.ordering, cursor["v"], strict=True)
+            ]
+            return values, bool(cursor["r"])
+
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, reverse: bool) -> str:
+        """This method encodes the position of the row into a cursor"""
+        values = [self._get_value(row, name) for name, _ in self.ordering]
+        cursor = {"o": self._get_ordering_key(), "v": values, "r": int(reverse)}
+        data = json.dumps(cursor, default=str, separators=(",", ":"))
+        return urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+
+    def _get_link(self, row, reverse: bool) -> str:
+        """This secondary method builds a link to a page by the cursor"""
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(row, reverse)
+        )
+
+    def _get_ordering_key(self) -> list[str]:
+        """This secondary method returns the ordering saved into the cursor
+        to reject cursors created with another ordering"""
+        return [
+            f"-{name}" if descending else name for name, descending in self.ordering
+        ]
+
+    def _get_order_by(self, ordering: list[tuple[str, bool]]) -> list:
+        """This secondary method returns ordering expressions. Null values are
+        always placed as the greatest ones to make the order the same for all
+        database backends"""
+        return [
+            F(name).desc(nulls_first=True)
+            if descending
+            else F(name).asc(nulls_last=True)
+            for name, descending in ordering
+        ]
+
+    def _get_position_filter(self, ordering: list[tuple[str, bool]], values: list) -> Q:
+        """This secondary method builds a filter selecting rows located after
+        the provided values according to the ordering"""
+        position = Q(pk__in=[])
+        equal = Q()
+
+        for (name, descending), value in zip(ordering, values):
+            position |= equal & self._get_after_filter(name, descending, value)
+            equal &= (
+                Q(**{f"{name}__isnull": True}) if value is None else Q(**{name: value})
+            )
+
+        return position
+
+    def _get_after_filter(self, name: str, descending: bool, value) -> Q:
+        """This secondary method builds a filter for a single field selecting
+        values located after the provided one"""
+        nullable = self.fields[name] is not None and self.fields[name].null
+
+        if value is None:
+            return Q(**{f"{name}__isnull": False}) if descending else Q(pk__in=[])
+
+        if descending:
+            return Q(**{f"{name}__lt": value})
+
+        after = Q(**{f"{name}__gt": value})
+        return after | Q(**{f"{name}__isnull": True}) if nullable else after
+
+    def _to_python(self, name: str, value):
+        """This secondary method converts a value received from the cursor to
+        the type of the field"""
+        field = self.fields[name]
+        return value if field is None or value is None else field.to_python(value)
+
+    @staticmethod
+    def _get_value(row, name: str):
+        """This secondary method returns a value of the field from a model
+        instance or a dictionary"""
+        if isinstance(row, dict):
+            return row[name]
+
+        return getattr(row, name)
+
+
+class OptionalKeysetPagination(LimitOffsetPagination):
+    """The OptionalKeysetPagination class paginates querysets by the limit
+    and offset parameters. If the cursor parameter is provided the keyset
+    pagination is used instead"""
+
+    keyset_pagination_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """This method chooses the pagination by query parameters of the
+        request"""
+        self.keyset = None
+        cursor_param = self.keyset_pagination_class.cursor_query_param
+
+        if cursor_param in request.query_params:
+            self.keyset = self.keyset_pagination_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data) -> Response:
+        """This method returns a response of the chosen pagination"""
+        if self.keyset:
+            return self.keyset.get_paginated_response(data)
+
+        return super().get_paginated_response(data)
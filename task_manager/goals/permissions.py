@@ -1,6 +1,7 @@
 """This file contains permission classes to manage user access to data"""
 from rest_framework import permissions
-from goals.models import Participant, Roles, Category, Goal, Comment
+from goals.membership import EDITOR_ROLES, has_board_role
+from goals.models import Roles, Category, Goal
 
 # -------------------------------------------------------------------------
 
@@ -10,14 +11,18 @@ class BoardPermission(permissions.BasePermission):
     who absent in the participant list"""
 
     def has_object_permission(self, request, view, obj):
-
         if request.method in permissions.SAFE_METHODS:
-            return Participant.objects.filter(
-                user=request.user, board=obj).exists()
+            return has_board_role(request, obj.id)
         else:
-            return Participant.objects.filter(
-                user=request.user, board=obj, role=Roles.owner
-            ).exists()
+            return has_board_role(request, obj.id, (Roles.owner,))
+
+
+class BoardImportPermission(permissions.BasePermission):
+    """The BoardImportPermission class serves to allow importing goals into a
+    board only for its owners and writers"""
+
+    def has_object_permission(self, request, view, obj):
+        return has_board_role(request, obj.id, EDITOR_ROLES)
 
 
 class CategoryPermission(permissions.BasePermission):
@@ -26,21 +31,9 @@ class CategoryPermission(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
-            return (
-                Category.objects.select_related("board")
-                .filter(board__participants__user=request.user, board=obj.board)
-                .exists()
-            )
+            return has_board_role(request, obj.board_id)
         else:
-            return (
-                Category.objects.select_related("board")
-                .filter(
-                    board__participants__user=request.user,
-                    board=obj.board,
-                    board__participants__role__in=[Roles.owner, Roles.writer],
-                )
-                .exists()
-            )
+            return has_board_role(request, obj.board_id, EDITOR_ROLES)
 
 
 class CategoryCreatePermission(permissions.BasePermission):
@@ -50,9 +43,7 @@ class CategoryCreatePermission(permissions.BasePermission):
 
     def has_permission(self, request, view):
         board = request.data.get("board")
-        return Participant.objects.filter(
-            user=request.user, board=board, role__in=[Roles.owner, Roles.writer]
-        ).exists()
+        return has_board_role(request, board, EDITOR_ROLES)
 
 
 class GoalCreatePermission(permissions.BasePermission):
@@ -61,12 +52,14 @@ class GoalCreatePermission(permissions.BasePermission):
 
     def has_permission(self, request, view):
         category_id = request.data.get("category")
-        category = Category.objects.get(id=category_id)
-        return Participant.objects.filter(
-            user=request.user,
-            board=category.board,
-            role__in=[Roles.owner, Roles.writer],
-        ).exists()
+        board_id = (
+            Category.objects.filter(id=category_id)
+            .values_list("board_id", flat=True)
+            .first()
+            if str(category_id).isdigit()
+            else None
+        )
+        return has_board_role(request, board_id, EDITOR_ROLES)
 
 
 class GoalPermission(permissions.BasePermission):
@@ -75,24 +68,9 @@ class GoalPermission(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
-            return (
-                Goal.objects.select_related("category")
-                .filter(
-                    category__board__participants__user=request.user,
-                    category__board=obj.category.board,
-                )
-                .exists()
-            )
+            return has_board_role(request, obj.board_id)
         else:
-            return (
-                Goal.objects.select_related("category")
-                .filter(
-                    category__board__participants__user=request.user,
-                    category__board=obj.category.board,
-                    category__board__participants__role__in=[Roles.owner, Roles.writer],
-                )
-                .exists()
-            )
+            return has_board_role(request, obj.board_id, EDITOR_ROLES)
 
 
 class CommentCreatePermission(permissions.BasePermission):
@@ -101,16 +79,12 @@ class CommentCreatePermission(permissions.BasePermission):
 
     def has_permission(self, request, view):
         goal_id = request.data.get("goal")
-        goal = Goal.objects.get(id=goal_id)
-        return (
-            Participant.objects.select_related("user")
-            .filter(
-                user=request.user,
-                board=goal.category.board,
-                role__in=[Roles.owner, Roles.writer],
-            )
-            .exists()
+        board_id = (
+            Goal.objects.filter(id=goal_id).values_list("board_id", flat=True).first()
+            if str(goal_id).isdigit()
+            else None
         )
+        return has_board_role(request, board_id, EDITOR_ROLES)
 
 
 class CommentPermission(permissions.BasePermission):
@@ -118,26 +92,11 @@ class CommentPermission(permissions.BasePermission):
     for users who are not members of the board"""
 
     def has_object_permission(self, request, view, obj):
+        board_id = obj.board_id
+
         if request.method in permissions.SAFE_METHODS:
-            return (
-                Comment.objects.select_related("goal")
-                .filter(
-                    goal__category__board__participants__user=request.user,
-                    goal__category__board=obj.goal.category.board,
-                )
-                .exists()
-            )
+            return has_board_role(request, board_id)
         else:
-            return (
-                Comment.objects.select_related("goal")
-                .filter(
-                    goal__category__board__participants__user=request.user,
-                    goal__category__board=obj.goal.category.board,
-                    user=request.user,
-                    goal__category__board__participants__role__in=[
-                        Roles.owner,
-                        Roles.writer,
-                    ],
-                )
-                .exists()
+            return obj.user_id == request.user.id and has_board_role(
+                request, board_id, EDITOR_ROLES
             )
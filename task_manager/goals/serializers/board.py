@@ -3,7 +3,9 @@ serialize and deserialize db models"""
 from django.db import transaction
 from rest_framework import serializers
 from core.models import User
+from goals.membership import invalidate_board_roles
 from goals.models import Board, Participant, Roles
+from goals.serializers.dynamic import DynamicFieldsMixin
 
 # ------------------------------------------------------------------------
 
@@ -55,10 +57,11 @@ class BoardCreateSerializer(serializers.ModelSerializer):
                 board=board,
                 user=user,
             )
+        invalidate_board_roles(user.id)
         return board
 
 
-class BoardSerializer(serializers.ModelSerializer):
+class BoardSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """The BoardSerializer class serves to retrieve, update or delete a
     single board"""
 
@@ -81,19 +84,22 @@ class BoardSerializer(serializers.ModelSerializer):
             if participant["user"] != user
         }
 
-        old_participants = instance.participants.exclude(user=user)
+        old_participants = list(instance.participants.exclude(user=user))
+        changed_users = set(new_participants) | {
+            participant.user_id for participant in old_participants
+        }
 
         with transaction.atomic():
             for old_participant in old_participants:
-                if old_participant.user.id not in new_participants:
+                if old_participant.user_id not in new_participants:
                     old_participant.delete()
 
                 else:
-                    new_role = new_participants[old_participant.user.id]["role"]
+                    new_role = new_participants[old_participant.user_id]["role"]
                     if old_participant.role != new_role:
                         old_participant.role = new_role
                         old_participant.save()
-                    del new_participants[old_participant.user.id]
+                    del new_participants[old_participant.user_id]
 
             [
                 Participant.objects.create(board=instance, **data)
@@ -102,10 +108,11 @@ class BoardSerializer(serializers.ModelSerializer):
             instance.title = validated_data.get("title")
             instance.save()
 
+        invalidate_board_roles(*changed_users)
         return instance
 
 
-class BoardListSerializer(serializers.ModelSerializer):
+class BoardListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """The BoardListSerializer class serves to get a list of boards"""
 
     class Meta:
@@ -3,6 +3,7 @@ deserialize db models"""
 from rest_framework import serializers
 from core.serializers import UserUpdateRetrieveSerializer
 from goals.models import Category, Board
+from goals.serializers.dynamic import DynamicFieldsMixin
 
 # -------------------------------------------------------------------------
 
@@ -21,7 +22,7 @@ class CreateCategorySerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "created", "updated", "user")
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """This serializer works with all views except CreateAPIView for Category
     models"""
 
@@ -4,11 +4,12 @@ from rest_framework import serializers
 from django.utils.translation import gettext_lazy as _
 from core.serializers import UserUpdateRetrieveSerializer
 from goals.models import Comment, Status
+from goals.serializers.dynamic import DynamicFieldsMixin
 
 # -------------------------------------------------------------------------
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """This serializer works with all views except CreateAPIView for Comment
     models"""
 
@@ -16,7 +17,7 @@ class CommentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Comment
-        fields = "__all__"
+        exclude = ("board",)
         read_only_fields = (
             "id",
             "created",
@@ -35,7 +36,7 @@ class CommentCreateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Comment
-        fields = "__all__"
+        exclude = ("board",)
         read_only_fields = (
             "id",
             "user",
@@ -0,0 +1,106 @@
+"""There is a serializer mixin in the file allowing clients to choose fields
+of responses by the fields, omit and expand query parameters"""
+from typing import NamedTuple
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+# ------------------------------------------------------------------------
+
+FIELDS_PARAM = "fields"
+OMIT_PARAM = "omit"
+EXPAND_PARAM = "expand"
+
+
+class FieldOptions(NamedTuple):
+    """The FieldOptions class represents fields chosen by a request. The
+    fields value is None if all fields are requested"""
+
+    fields: tuple[str, ...] | None = None
+    omit: tuple[str, ...] = ()
+    expand: tuple[str, ...] = ()
+
+
+def _split(value: str | None) -> tuple[str, ...]:
+    """This function splits a comma separated parameter into names"""
+    return tuple(name.strip() for name in (value or "").split(",") if name.strip())
+
+
+def get_field_options(request) -> FieldOptions:
+    """This function returns fields chosen by query parameters of the
+    request. The parameters are ignored by unsafe methods, so they can't
+    change fields accepted from the client"""
+    if request is None or request.method not in SAFE_METHODS:
+        return FieldOptions()
+
+    params = request.query_params
+    return FieldOptions(
+        fields=_split(params[FIELDS_PARAM]) if FIELDS_PARAM in params else None,
+        omit=_split(params.get(OMIT_PARAM)),
+        expand=_split(params.get(EXPAND_PARAM)),
+    )
+
+
+def get_query_fields(fields) -> tuple[list[str], list[str], list[str]]:
+    """This function returns lookups of model fields used by the serializer
+    fields
+    :param fields: A dictionary of serializer fields
+    :return: A tuple containing lookups to load by only(), relations to
+    load by select_related() and fields to load by prefetch_related()
+    """
+    columns, relations, prefetched = [], [], []
+    for field in fields.values():
+        if field.write_only or field.source == "*":
+            continue
+
+        source = field.source.replace(".", "__")
+        if isinstance(
+            field, (serializers.ListSerializer, serializers.ManyRelatedField)
+        ):
+            prefetched.append(source)
+
+        elif isinstance(field, serializers.BaseSerializer):
+            relations.append(source)
+            columns.extend(
+                f"{source}__{column}" for column in get_query_fields(field.fields)[0]
+            )
+
+        else:
+            columns.append(source)
+
+    return columns, relations, prefetched
+
+
+class DynamicFieldsMixin:
+    """The DynamicFieldsMixin class allows to get only the fields listed in
+    the fields parameter and to skip the fields of the omit parameter.
+    Nested objects of expandable fields are replaced with their ids when the
+    fields parameter is given, unless they are listed in the expand
+    parameter"""
+
+    expandable_fields = ("user",)
+
+    @property
+    def field_options(self) -> FieldOptions:
+        """This property returns fields chosen by the request or the ones
+        passed into the field_options item of the context"""
+        if "field_options" in self.context:
+            return self.context["field_options"]
+
+        return get_field_options(self.context.get("request"))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        options = self.field_options
+
+        if options.fields is not None:
+            fields = {
+                name: field for name, field in fields.items() if name in options.fields
+            }
+            for name in self.expandable_fields:
+                if name in fields and name not in options.expand:
+                    fields[name] = serializers.PrimaryKeyRelatedField(read_only=True)
+
+        for name in options.omit:
+            fields.pop(name, None)
+
+        return fields
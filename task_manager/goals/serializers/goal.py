@@ -4,11 +4,12 @@ from rest_framework import serializers
 from django.utils.translation import gettext_lazy as _
 from core.serializers import UserUpdateRetrieveSerializer
 from goals.models import Goal
+from goals.serializers.dynamic import DynamicFieldsMixin
 
 # -------------------------------------------------------------------------
 
 
-class GoalSerializer(serializers.ModelSerializer):
+class GoalSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """This serializer works with all views except CreateAPIView for Goal
     models"""
 
@@ -16,7 +17,7 @@ class GoalSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Goal
-        fields = "__all__"
+        exclude = ("search_vector", "board")
         read_only_fields = (
             "id",
             "created",
@@ -32,7 +33,7 @@ class GoalCreateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Goal
-        fields = "__all__"
+        exclude = ("search_vector", "board")
         read_only_fields = ("id", "created", "updated", "user")
 
     def validate_category(self, value):
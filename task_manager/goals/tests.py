@@ -0,0 +1,577 @@
+"""This file contains tests of the goals app"""
+import datetime
+import json
+import time
+from unittest import mock, skipUnless
+from django.db import connection
+from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from core.models import User
+from core.renderers import ORJSONRenderer
+from goals import permissions
+from goals.management.commands.archive_goals import Command as ArchiveGoals
+from goals.mappers import get_row_mapper
+from goals.models import (
+    Board,
+    Category,
+    Comment,
+    Goal,
+    Participant,
+    Roles,
+    Status,
+    Watermark,
+)
+from goals.serializers import CategorySerializer, CommentSerializer, GoalSerializer
+from goals.serializers.dynamic import FieldOptions
+
+# -------------------------------------------------------------------------
+
+PAGE_SIZES = (50, 500, 5000)
+
+
+def create_board(user: User, goals: int = 3, comments: int = 0) -> Board:
+    """This function creates a board of the user with a category, goals and
+    comments of every goal"""
+    board = Board.objects.create(title="Board", is_deleted=False)
+    Participant.objects.create(board=board, user=user, role=Roles.owner)
+    category = Category.objects.create(title="Category", user=user, board=board)
+    today = timezone.now().date()
+
+    for number in range(goals):
+        goal = Goal.objects.create(
+            title=f"Goal {number}",
+            user=user,
+            category=category,
+            priority=number % 4 + 1,
+            due_date=today + datetime.timedelta(days=number),
+        )
+        Comment.objects.bulk_create(
+            Comment(goal=goal, board=board, user=user, text=f"Comment {index}")
+            for index in range(comments)
+        )
+
+    return board
+
+
+def create_client(user: User) -> APIClient:
+    """This function returns an API client authenticated as the user"""
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def measure_rows(load, rows: int) -> float:
+    """This function returns rows per second of the best of three runs
+    :param load: A function loading and representing the rows
+    :param rows: An integer representing the number of rows
+    """
+    timings = []
+    for _ in range(3):
+        started = time.perf_counter()
+        load()
+        timings.append(time.perf_counter() - started)
+    return rows / min(timings)
+
+
+def print_report(header: str, lines: list[str]) -> None:
+    """This function prints results of a benchmark as a table"""
+    print("", header, *lines, sep="\n")
+
+
+@skipUnless(connection.vendor == "postgresql", "Query plans of PostgreSQL")
+class ListQueryPlanTest(TestCase):
+    """Queries of list views and the archive sweep should be served by the
+    indexes made for them. Other boards hold thousands of rows, most goals
+    are archived history and the tables are analyzed, so the planner
+    chooses the indexes by their costs"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="owner", password="password")
+        cls.board = create_board(cls.user, goals=10, comments=2)
+        other = User.objects.create_user(username="other")
+        today = timezone.now().date()
+
+        boards = Board.objects.bulk_create(
+            Board(title=f"Board {number}", is_deleted=False) for number in range(2000)
+        )
+        Participant.objects.bulk_create(
+            Participant(board=board, user=other, role=Roles.owner) for board in boards
+        )
+        categories = Category.objects.bulk_create(
+            Category(title=f"Category {number}", user=other, board=board)
+            for board in boards
+            for number in range(10)
+        )
+        goals = Goal.objects.bulk_create(
+            Goal(
+                title=f"Goal {number}",
+                user=other,
+                category=category,
+                board=category.board,
+                priority=number % 4 + 1,
+                status=Status.archived if number % 10 else Status.to_do,
+                due_date=today - datetime.timedelta(days=number % 365 + 1),
+            )
+            for number, category in enumerate(categories)
+        )
+        Comment.objects.bulk_create(
+            Comment(goal=goal, board=goal.board, user=other, text="Comment")
+            for goal in goals
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    @staticmethod
+    def explain(queries: CaptureQueriesContext) -> str:
+        """This method returns plans of the captured select queries"""
+        plans = []
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                if query["sql"].startswith("SELECT"):
+                    cursor.execute(f"EXPLAIN {query['sql']}")
+                    plans.extend(row[0] for row in cursor.fetchall())
+        return "\n".join(plans)
+
+    def test_list_queries_use_indexes(self):
+        client = create_client(self.user)
+        goal = Goal.objects.filter(board=self.board).first()
+        indexes = [
+            ("/goals/goal/list?limit=2", "goal_active_priority_idx"),
+            ("/goals/goal/list?cursor=&limit=2", "goal_active_priority_idx"),
+            ("/goals/goal/list?ordering=due_date&limit=2", "goal_active_due_date_idx"),
+            (
+                f"/goals/goal_comment/list?goal={goal.id}&limit=2",
+                "comment_goal_created_idx",
+            ),
+            (
+                f"/goals/goal_category/list?board={self.board.id}",
+                "category_active_board_idx",
+            ),
+            ("/goals/board/list", "goals_board_pkey"),
+        ]
+
+        for url, index in indexes:
+            with self.subTest(url):
+                with CaptureQueriesContext(connection) as queries:
+                    self.assertEqual(client.get(url).status_code, 200)
+
+                plan = self.explain(queries)
+                self.assertIn(index, plan)
+                self.assertNotIn("Seq Scan on goals_", plan)
+
+    def test_sweep_uses_overdue_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(ArchiveGoals.sweep(100), 2000)
+
+        plan = self.explain(queries)
+        self.assertIn("goal_overdue_idx", plan)
+        self.assertNotIn("Seq Scan on goals_goal", plan)
+
+
+class ArchiveGoalsTest(TestCase):
+    """The sweeper should archive only overdue goals and its cost should not
+    depend on goals archived before"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="owner", password="password")
+        cls.board = create_board(cls.user, goals=4)
+        cls.today = timezone.now().date()
+
+    def make_overdue(self, count: int, status: int = Status.to_do) -> None:
+        category = Category.objects.get(board=self.board)
+        Goal.objects.bulk_create(
+            Goal(
+                title=f"Overdue {number}",
+                user=self.user,
+                category=category,
+                board=self.board,
+                status=status,
+                due_date=self.today - datetime.timedelta(days=number + 1),
+            )
+            for number in range(count)
+        )
+
+    def test_sweep_archives_overdue_goals(self):
+        self.make_overdue(5)
+        done = Goal.objects.filter(board=self.board).first()
+        Goal.objects.filter(id=done.id).update(
+            due_date=self.today - datetime.timedelta(days=1), status=Status.done
+        )
+
+        self.assertEqual(ArchiveGoals.sweep(batch_size=2), 6)
+        self.assertFalse(Goal.objects.overdue().exists())
+        self.assertEqual(Goal.objects.filter(status__lt=Status.archived).count(), 3)
+        self.assertEqual(
+            Watermark.objects.get(name="archive_goals").swept_until, self.today
+        )
+
+    def test_queries_do_not_depend_on_archived_goals(self):
+        ArchiveGoals.sweep(batch_size=2)
+        self.make_overdue(3)
+        with CaptureQueriesContext(connection) as queries:
+            ArchiveGoals.sweep(batch_size=2)
+
+        self.make_overdue(3)
+        self.make_overdue(500, status=Status.archived)
+        with self.assertNumQueries(len(queries)):
+            ArchiveGoals.sweep(batch_size=2)
+
+
+class BoardImportTest(TestCase):
+    """Exports of a board should be imported back as is, invalid values of
+    rows should be reported instead of failing the request"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="owner", password="password")
+        cls.board = create_board(cls.user, goals=2)
+        cls.category = Category.objects.get(board=cls.board)
+        Goal.objects.filter(board=cls.board).update(
+            description="Line\u2028separator and\x85next line"
+        )
+
+    def import_rows(self, body: bytes, input_format: str):
+        return create_client(self.user).post(
+            f"/goals/board/{self.board.id}/import?input={input_format}",
+            body,
+            content_type="text/plain",
+        )
+
+    def test_export_round_trip(self):
+        client = create_client(self.user)
+        url = f"/goals/board/{self.board.id}/export?output="
+        columns = ["title", "description", "due_date", "priority"]
+        expected = list(Goal.objects.filter(board=self.board).values(*columns))
+
+        bodies = {
+            input_format: b"".join(client.get(url + input_format).streaming_content)
+            for input_format in ("ndjson", "csv")
+        }
+
+        for input_format, body in bodies.items():
+            response = self.import_rows(body, input_format)
+
+            self.assertEqual(response.status_code, 201, response.data)
+            self.assertEqual(response.data["created"], 2)
+            imported = Goal.objects.filter(board=self.board).order_by("-id")
+            self.assertCountEqual(imported.values(*columns)[:2], expected)
+
+    def test_rows_with_invalid_types_are_rejected(self):
+        rows = [
+            {"title": {"a": 1}, "category": self.category.id},
+            {"title": "Goal", "description": {"a": 1}, "category": self.category.id},
+            {"title": "Goal", "description": "Text", "category": self.category.id},
+        ]
+        body = "\n".join(json.dumps(row) for row in rows).encode()
+
+        response = self.import_rows(body, "ndjson")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error["row"] for error in response.data["errors"]], [1, 2])
+        self.assertEqual(Goal.objects.filter(title="Goal").count(), 0)
+
+
+class PermissionQueriesTest(TestCase):
+    """Permission classes should resolve roles of the user by one query per
+    request whatever the role is, create permissions need one more query to
+    find the board of the category or the goal"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username="owner", password="password")
+        cls.board = create_board(cls.owner, goals=1, comments=1)
+        cls.category = Category.objects.get(board=cls.board)
+        cls.goal = Goal.objects.get(board=cls.board)
+        cls.comment = Comment.objects.get(goal=cls.goal)
+        cls.users = {Roles.owner: cls.owner}
+        for role in (Roles.writer, Roles.reader):
+            cls.users[role] = User.objects.create_user(
+                username=role.label, password="password"
+            )
+            Participant.objects.create(board=cls.board, user=cls.users[role], role=role)
+        cls.users[None] = User.objects.create_user(username="stranger")
+
+    @staticmethod
+    def make_request(user: User, method: str, data: dict | None = None) -> Request:
+        request = getattr(APIRequestFactory(), method)("/", data, format="json")
+        request = Request(request, parsers=[JSONParser()])
+        request.user = user
+        return request
+
+    def test_object_permissions(self):
+        cases = [
+            (permissions.BoardPermission, self.board, (Roles.owner,)),
+            (permissions.BoardImportPermission, self.board, None),
+            (permissions.CategoryPermission, self.category, None),
+            (permissions.GoalPermission, self.goal, None),
+            (permissions.CommentPermission, self.comment, (Roles.owner,)),
+        ]
+        for permission_class, obj, writers in cases:
+            for role, user in self.users.items():
+                for method in ("get", "patch"):
+                    editors = writers or (Roles.owner, Roles.writer)
+                    safe = permission_class is not permissions.BoardImportPermission
+                    expected = role in editors or (
+                        method == "get" and safe and role is not None
+                    )
+                    request = self.make_request(user, method)
+                    with self.subTest(
+                        permission_class.__name__, role=role, method=method
+                    ):
+                        # Authors of comments are checked before roles
+                        with CaptureQueriesContext(connection) as queries:
+                            allowed = permission_class().has_object_permission(
+                                request, None, obj
+                            )
+                        self.assertLessEqual(len(queries), 1)
+                        self.assertEqual(allowed, expected)
+
+    def test_create_permissions(self):
+        cases = [
+            (permissions.CategoryCreatePermission, {"board": self.board.id}, 1),
+            (permissions.GoalCreatePermission, {"category": self.category.id}, 2),
+            (permissions.CommentCreatePermission, {"goal": self.goal.id}, 2),
+        ]
+        for permission_class, data, queries in cases:
+            for role, user in self.users.items():
+                request = self.make_request(user, "post", data)
+                with self.subTest(permission_class.__name__, role=role):
+                    with self.assertNumQueries(queries):
+                        allowed = permission_class().has_permission(request, None)
+                    self.assertEqual(allowed, role in (Roles.owner, Roles.writer))
+
+    def test_roles_are_loaded_once_per_request(self):
+        request = self.make_request(self.users[Roles.writer], "patch")
+        checks = [
+            (permissions.BoardPermission, self.board),
+            (permissions.CategoryPermission, self.category),
+            (permissions.GoalPermission, self.goal),
+            (permissions.CommentPermission, self.comment),
+        ]
+        with self.assertNumQueries(1):
+            for permission_class, obj in checks:
+                permission_class().has_object_permission(request, None, obj)
+
+
+class QueryBudgetTest(TestCase):
+    """List endpoints should run the same number of queries whatever the
+    size of the page is, detail endpoints shouldn't load related rows one
+    by one"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="owner", password="password")
+        cls.board = create_board(cls.user, goals=30, comments=3)
+        for number in range(3):
+            Participant.objects.create(
+                board=cls.board,
+                user=User.objects.create_user(username=f"reader{number}"),
+                role=Roles.reader,
+            )
+        cls.goal = Goal.objects.filter(board=cls.board).first()
+
+    def test_list_endpoints(self):
+        client = create_client(self.user)
+        # Roles, a count of the limit pagination and the page, the board
+        # filter validates its value by one more query
+        budgets = [
+            ("/goals/goal/list?", 3),
+            ("/goals/goal/list?offset=1&", 3),
+            ("/goals/goal/list?cursor=&", 2),
+            (f"/goals/goal_comment/list?goal={self.goal.id}&", 3),
+            (f"/goals/goal_category/list?board={self.board.id}&", 4),
+            ("/goals/board/list?", 3),
+        ]
+        for url, budget in budgets:
+            for limit in (1, 2, 25):
+                with self.subTest(url, limit=limit):
+                    with self.assertNumQueries(budget):
+                        response = client.get(f"{url}limit={limit}")
+                    self.assertEqual(response.status_code, 200)
+
+    def test_detail_endpoints(self):
+        client = create_client(self.user)
+        comment = Comment.objects.filter(goal=self.goal).first()
+        category = Category.objects.get(board=self.board)
+        budgets = [
+            (f"/goals/goal/{self.goal.id}", 2),
+            (f"/goals/goal_comment/{comment.id}", 2),
+            (f"/goals/goal_category/{category.id}", 2),
+            # Participants of the board are prefetched by one query
+            (f"/goals/board/{self.board.id}", 3),
+        ]
+        for url, budget in budgets:
+            with self.subTest(url):
+                with self.assertNumQueries(budget):
+                    response = client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+
+class AdminTest(TestCase):
+    """The board of goals and comments should be shown in the admin panel
+    but taken from their category or goal when they are saved"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(
+            username="admin", password="password", email="admin@example.com"
+        )
+        cls.board = create_board(cls.user, goals=1)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_goal_board_is_taken_from_category(self):
+        category = Category.objects.get(board=self.board)
+        response = self.client.post(
+            "/admin/goals/goal/add/",
+            {
+                "title": "Admin goal",
+                "description": "",
+                "category": category.id,
+                "status": Status.to_do,
+                "priority": 1,
+                "user": self.user.id,
+            },
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Goal.objects.get(title="Admin goal").board, self.board)
+
+    def test_board_is_read_only(self):
+        for url in ("/admin/goals/goal/add/", "/admin/goals/comment/add/"):
+            with self.subTest(url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn("board", response.context["adminform"].form.fields)
+
+
+class FastListParityTest(TestCase):
+    """Row mappers of list views should render the same bytes as their
+    serializers do for every choice of fields without building model
+    instances"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="owner", first_name="Имя", email="owner@example.com"
+        )
+        cls.board = create_board(cls.user, goals=8, comments=2)
+        goals = Goal.objects.filter(board=cls.board).order_by("id")
+        goals.filter(id__in=goals.values("id")[:2]).update(
+            description="Line\u2028separator", due_date=None, status=Status.done
+        )
+
+    def get_cases(self) -> list:
+        return [
+            (GoalSerializer, Goal.objects.filter(board=self.board)),
+            (CategorySerializer, Category.objects.filter(board=self.board)),
+            (CommentSerializer, Comment.objects.filter(board=self.board)),
+        ]
+
+    def test_representations_are_identical(self):
+        options = [
+            FieldOptions(),
+            FieldOptions(fields=("id", "user", "created", "status", "title")),
+            FieldOptions(fields=("id", "user"), expand=("user",)),
+            FieldOptions(omit=("description", "updated")),
+        ]
+        for serializer_class, queryset in self.get_cases():
+            queryset = queryset.select_related("user").order_by("id")
+            for option in options:
+                mapper = get_row_mapper(serializer_class, option)
+                rows = queryset.values(*mapper.columns)
+                data = serializer_class(
+                    queryset, many=True, context={"field_options": option}
+                ).data
+                for renderer in (JSONRenderer(), ORJSONRenderer()):
+                    with self.subTest(serializer_class.__name__, option=option):
+                        self.assertEqual(
+                            renderer.render(mapper.map_rows(rows)),
+                            renderer.render(data),
+                        )
+
+    def test_no_model_instances_are_built(self):
+        client = create_client(self.user)
+        goal = Goal.objects.filter(board=self.board).first()
+        urls = [
+            "/goals/goal/list?limit=25",
+            f"/goals/goal_comment/list?goal={goal.id}&limit=25",
+            f"/goals/goal_category/list?board={self.board.id}&limit=25",
+        ]
+        for url in urls:
+            with self.subTest(url):
+                with mock.patch.object(
+                    Goal, "from_db", side_effect=AssertionError("Goal built")
+                ), mock.patch.object(
+                    Comment, "from_db", side_effect=AssertionError("Comment built")
+                ), mock.patch.object(
+                    Category, "from_db", side_effect=AssertionError("Category built")
+                ):
+                    response = client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+
+@tag("benchmark")
+class ListBenchmarkTest(TestCase):
+    """Rows per second of loading and rendering goal list pages, the
+    results are printed"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username="owner", first_name="Имя")
+        board = create_board(user, goals=0)
+        category = Category.objects.get(board=board)
+        Goal.objects.bulk_create(
+            Goal(
+                title=f"Goal {number}",
+                description="Description " * 10,
+                user=user,
+                category=category,
+                board=board,
+                due_date=timezone.now().date(),
+            )
+            for number in range(max(PAGE_SIZES))
+        )
+        cls.mapper = get_row_mapper(GoalSerializer)
+
+    def get_page(self, size: int):
+        return Goal.objects.select_related("user").order_by("id")[:size]
+
+    def test_serializer_and_mapper(self):
+        report = []
+        for size in PAGE_SIZES:
+            serialized = measure_rows(
+                lambda: GoalSerializer(self.get_page(size), many=True).data, size
+            )
+            mapped = measure_rows(
+                lambda: self.mapper.map_rows(
+                    self.get_page(size).values(*self.mapper.columns)
+                ),
+                size,
+            )
+            report.append(f"{size:>6}{serialized:>14,.0f}{mapped:>14,.0f}")
+
+        print_report(f"{'rows':>6}{'serializer':>14}{'mapper':>14}", report)
+
+    def test_renderers(self):
+        report = []
+        for size in PAGE_SIZES:
+            data = self.mapper.map_rows(
+                self.get_page(size).values(*self.mapper.columns)
+            )
+            results = [
+                measure_rows(lambda: renderer.render(data), size)
+                for renderer in (JSONRenderer(), ORJSONRenderer())
+            ]
+            report.append(f"{size:>6}{results[0]:>14,.0f}{results[1]:>14,.0f}")
+
+        print_report(f"{'rows':>6}{'json':>14}{'orjson':>14}", report)
@@ -17,4 +17,6 @@ urlpatterns = [
     path("board/create", views.BoardCreateView.as_view()),
     path("board/<int:pk>", views.BoardUpdateRetrieveDeleteView.as_view()),
     path("board/list", views.BoardListView.as_view()),
+    path("board/<int:pk>/export", views.BoardExportView.as_view()),
+    path("board/<int:pk>/import", views.BoardImportView.as_view()),
 ]
@@ -1,18 +1,30 @@
 """This file contains CBVs for goals app"""
+import csv
+import io
 from django.db import transaction
-from django.utils import timezone
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.generics import (
     CreateAPIView,
+    GenericAPIView,
     ListAPIView,
     RetrieveUpdateDestroyAPIView,
 )
 from rest_framework.permissions import IsAuthenticated
-from goals.filters import GoalListFilter
-from goals.models import Category, Goal, Comment, Status, Board
+from rest_framework.response import Response
+from goals.export import CONTENT_TYPES, export_board
+from goals.filters import GoalListFilter, GoalSearchFilter
+from goals.imports import INPUT_FORMATS, GoalImporter, open_text, read_rows
+from goals.mappers import FastListMixin, SparseFieldsMixin
+from goals.membership import get_board_ids
+from goals.models import Category, Goal, Comment, Status, Board, Participant
+from goals.pagination import OptionalKeysetPagination
 from goals import serializers
 from goals.permissions import (
+    BoardImportPermission,
     BoardPermission,
     CategoryPermission,
     CategoryCreatePermission,
@@ -37,9 +49,10 @@ class CategoryCreateView(CreateAPIView):
         )
 
 
-class CategoryListView(ListAPIView):
+class CategoryListView(FastListMixin, ListAPIView):
     """The CategoryListView provides logic to display a list of categories"""
 
+    pagination_class = OptionalKeysetPagination
     permission_classes = [IsAuthenticated, CategoryPermission]
     serializer_class = serializers.CategorySerializer
     filter_backends = (DjangoFilterBackend, OrderingFilter, SearchFilter)
@@ -49,21 +62,22 @@ class CategoryListView(ListAPIView):
     search_fields = ["title"]
 
     def get_queryset(self):
-        return Category.objects.select_related("board").filter(
-            board__participants__user=self.request.user,
+        return Category.objects.select_related("user").filter(
+            board_id__in=get_board_ids(self.request),
             is_deleted=False,
         )
 
 
-class CategoryUpdateRetrieveDeleteView(RetrieveUpdateDestroyAPIView):
+class CategoryUpdateRetrieveDeleteView(SparseFieldsMixin, RetrieveUpdateDestroyAPIView):
     """This view is used to show, update and delete a single category"""
 
     permission_classes = [IsAuthenticated, CategoryPermission]
+    only_fields = ("board",)
     serializer_class = serializers.CategorySerializer
 
     def get_queryset(self):
-        return Category.objects.select_related("board").filter(
-            board__participants__user=self.request.user,
+        return Category.objects.select_related("user").filter(
+            board_id__in=get_board_ids(self.request),
             is_deleted=False,
         )
 
@@ -75,25 +89,25 @@ class CategoryUpdateRetrieveDeleteView(RetrieveUpdateDestroyAPIView):
         return instance
 
 
-class GoalListView(ListAPIView):
+class GoalListView(FastListMixin, ListAPIView):
     """The GoalListView provides logic to display a list of goals"""
 
     serializer_class = serializers.GoalSerializer
+    pagination_class = OptionalKeysetPagination
     permission_classes = [IsAuthenticated, GoalPermission]
-    filter_backends = (DjangoFilterBackend, OrderingFilter, SearchFilter)
+    filter_backends = (DjangoFilterBackend, OrderingFilter, GoalSearchFilter)
     filterset_class = GoalListFilter
     ordering_fields = ["-priority", "due_date"]
     ordering = ["priority"]
     search_fields = ["title", "description"]
 
     def get_queryset(self):
-        Goal.objects.filter(due_date__lt=timezone.now().date()).update(
-            status=Status.archived
-        )
-
-        goals = Goal.objects.select_related("category").filter(
-            category__board__participants__user=self.request.user,
-            status__lt=Status.archived,
+        goals = (
+            Goal.objects.active()
+            .select_related("user")
+            .filter(
+                board_id__in=get_board_ids(self.request),
+            )
         )
         return goals
 
@@ -107,21 +121,25 @@ class GoalCreateView(CreateAPIView):
     def get_queryset(self):
         return Goal.objects.select_related("category").filter(
             category=self.request.data.get("category"),
-            category__board__participants__user=self.request.user,
+            board_id__in=get_board_ids(self.request),
             category__is_deleted=False,
         )
 
 
-class GoalUpdateRetrieveDeleteView(RetrieveUpdateDestroyAPIView):
+class GoalUpdateRetrieveDeleteView(SparseFieldsMixin, RetrieveUpdateDestroyAPIView):
     """This view is used to show, update and delete a single goal"""
 
     serializer_class = serializers.GoalSerializer
     permission_classes = [IsAuthenticated, GoalPermission]
+    only_fields = ("board",)
 
     def get_queryset(self):
-        return Goal.objects.select_related("category").filter(
-            category__board__participants__user=self.request.user,
-            status__lt=Status.archived,
+        return (
+            Goal.objects.active()
+            .select_related("user")
+            .filter(
+                board_id__in=get_board_ids(self.request),
+            )
         )
 
     def perform_destroy(self, instance):
@@ -132,19 +150,20 @@ class GoalUpdateRetrieveDeleteView(RetrieveUpdateDestroyAPIView):
         return instance
 
 
-class CommentListView(ListAPIView):
+class CommentListView(FastListMixin, ListAPIView):
     """The CommentListView provides logic to display a list of comments"""
 
     serializer_class = serializers.CommentSerializer
+    pagination_class = OptionalKeysetPagination
     permission_classes = [IsAuthenticated, CommentPermission]
     filter_backends = (OrderingFilter,)
     ordering_fields = ["created", "updated"]
     ordering = ["-created"]
 
     def get_queryset(self):
-        return Comment.objects.select_related("goal").filter(
+        return Comment.objects.select_related("user").filter(
             goal=self.request.GET.get("goal"),
-            goal__category__board__participants__user=self.request.user,
+            board_id__in=get_board_ids(self.request),
             goal__status__lt=Status.archived,
         )
 
@@ -157,20 +176,21 @@ class CommentCreateView(CreateAPIView):
 
     def get_queryset(self):
         return Comment.objects.select_related("goal").filter(
-            goal__category__board__participants__user=self.request.user,
+            board_id__in=get_board_ids(self.request),
             goal__status__lt=Status.archived,
         )
 
 
-class CommentUpdateRetrieveDeleteView(RetrieveUpdateDestroyAPIView):
+class CommentUpdateRetrieveDeleteView(SparseFieldsMixin, RetrieveUpdateDestroyAPIView):
     """This view is used to show, update and delete a single comment"""
 
     serializer_class = serializers.CommentSerializer
     permission_classes = [IsAuthenticated, CommentPermission]
+    only_fields = ("board", "user")
 
     def get_queryset(self):
-        return Comment.objects.select_related("goal").filter(
-            goal__category__board__participants__user=self.request.user,
+        return Comment.objects.select_related("user").filter(
+            board_id__in=get_board_ids(self.request),
             goal__status__lt=Status.archived,
         )
 
@@ -183,11 +203,12 @@ class BoardCreateView(CreateAPIView):
     serializer_class = serializers.BoardCreateSerializer
 
 
-class BoardListView(ListAPIView):
+class BoardListView(SparseFieldsMixin, ListAPIView):
     """The BoardListView provides logic to display a list of all available
     boards"""
 
     serializer_class = serializers.BoardListSerializer
+    pagination_class = OptionalKeysetPagination
     permission_classes = [IsAuthenticated]
     filter_backends = [OrderingFilter]
     ordering_fields = ["title"]
@@ -195,18 +216,23 @@ class BoardListView(ListAPIView):
 
     def get_queryset(self):
         return Board.objects.filter(
-            participants__user=self.request.user, is_deleted=False
+            id__in=get_board_ids(self.request), is_deleted=False
         )
 
 
-class BoardUpdateRetrieveDeleteView(RetrieveUpdateDestroyAPIView):
+class BoardUpdateRetrieveDeleteView(SparseFieldsMixin, RetrieveUpdateDestroyAPIView):
     """This view is used to show, update and delete a single board"""
 
     serializer_class = serializers.BoardSerializer
     permission_classes = [IsAuthenticated, BoardPermission]
 
     def get_queryset(self):
-        return Board.objects.filter(
+        return Board.objects.prefetch_related(
+            Prefetch(
+                "participants",
+                queryset=Participant.objects.select_related("user"),
+            )
+        ).filter(
             is_deleted=False,
         )
 
@@ -214,8 +240,70 @@ class BoardUpdateRetrieveDeleteView(RetrieveUpdateDestroyAPIView):
         with transaction.atomic():
             instance.is_deleted = True
             instance.categories.update(is_deleted=True)
-            Goal.objects.filter(category__board=instance).update(status=Status.archived)
+            instance.goals.update(status=Status.archived)
 
             instance.save()
 
         return instance
+
+
+class BoardExportView(GenericAPIView):
+    """This view is used to download goals of a board and optionally their
+    comments as a stream of NDJSON or CSV. The format is chosen by the output
+    parameter, comments are added by comments=1"""
+
+    permission_classes = [IsAuthenticated, BoardPermission]
+
+    def get_queryset(self):
+        return Board.objects.filter(is_deleted=False).only("id")
+
+    def get(self, request, *args, **kwargs):
+        board = self.get_object()
+        output = request.query_params.get("output", "ndjson")
+        if output not in CONTENT_TYPES:
+            raise ValidationError(
+                {"output": f"Choose one of {', '.join(CONTENT_TYPES)}"}
+            )
+
+        comments = request.query_params.get("comments") in ("1", "true", "True")
+        response = StreamingHttpResponse(
+            export_board(board.id, output, comments),
+            content_type=CONTENT_TYPES[output],
+        )
+        filename = f"board-{board.id}.{output}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class BoardImportView(GenericAPIView):
+    """This view is used to create goals of a board from a CSV or NDJSON
+    request body. The format is chosen by the input parameter or the content
+    type. Nothing is created if some rows are invalid unless partial=1 is
+    passed, the response reports errors of rows"""
+
+    permission_classes = [IsAuthenticated, BoardImportPermission]
+
+    def get_queryset(self):
+        return Board.objects.filter(is_deleted=False).only("id")
+
+    def post(self, request, *args, **kwargs):
+        board = self.get_object()
+        input_format = request.query_params.get("input") or (
+            "csv" if request.content_type.startswith("text/csv") else "ndjson"
+        )
+        if input_format not in INPUT_FORMATS:
+            raise ValidationError(
+                {"input": f"Choose one of {', '.join(INPUT_FORMATS)}"}
+            )
+
+        partial = request.query_params.get("partial") in ("1", "true", "True")
+        stream = open_text(request.stream or io.BytesIO())
+        try:
+            report = GoalImporter(board, request.user, partial=partial).run(
+                read_rows(stream, input_format)
+            )
+        except (UnicodeDecodeError, csv.Error) as error:
+            raise ValidationError({"input": f"Unable to read the body: {error}"})
+
+        rejected = report["invalid"] and not partial
+        return Response(report, status=400 if rejected else 201)
@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "social_django",
     "django_filters",
@@ -57,6 +58,13 @@ MIDDLEWARE = [
     "social_django.middleware.SocialAuthExceptionMiddleware",
 ]
 
+# Requests running the same query this number of times are reported as N+1
+N_PLUS_ONE_THRESHOLD = int(environment.get("N_PLUS_ONE_THRESHOLD", 5))
+N_PLUS_ONE_RAISE = environment.get("N_PLUS_ONE_RAISE") in ("True", True)
+
+if DEBUG or N_PLUS_ONE_RAISE:
+    MIDDLEWARE.append("core.middleware.QueryCountMiddleware")
+
 ROOT_URLCONF = "task_manager.urls"
 
 TEMPLATES = [
@@ -128,10 +136,50 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# orjson renderer and parser of the API, False restores the DRF ones
+FAST_JSON = environment.get("FAST_JSON", "True") in ("True", True)
+
 REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination"
 }
 
+if FAST_JSON:
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = [
+        "core.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ]
+    REST_FRAMEWORK["DEFAULT_PARSER_CLASSES"] = [
+        "core.renderers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ]
+
+# Telegram bot webhook, it is used when the bot is started in webhook mode
+TG_WEBHOOK_URL = environment.get(
+    "TG_WEBHOOK_URL", f"{environment.get('WEB_HOST')}/bot/webhook"
+)
+TG_WEBHOOK_SECRET = environment.get("TG_WEBHOOK_SECRET")
+TG_WEBHOOK_WORKERS = int(environment.get("TG_WEBHOOK_WORKERS", 2))
+
+# Storage of telegram bot dialogs, bot.tg.state.CacheStateStore keeps them in
+# the cache with TG_STATE_CACHE_ALIAS alias instead of the database
+TG_STATE_STORE = environment.get("TG_STATE_STORE", "bot.tg.state.DatabaseStateStore")
+TG_STATE_CACHE_ALIAS = environment.get("TG_STATE_CACHE_ALIAS", "default")
+TG_STATE_CACHE_TIMEOUT = int(environment.get("TG_STATE_CACHE_TIMEOUT", 86400))
+
+# Port of metrics of the telegram bot (0 disables them) and the share of
+# info records about updates to log
+TG_METRICS_PORT = int(environment.get("TG_METRICS_PORT", 0))
+TG_LOG_SAMPLE_RATE = float(environment.get("TG_LOG_SAMPLE_RATE", 0.1))
+
+# Hours to keep ids of processed telegram updates to skip repeated ones
+TG_PROCESSED_UPDATES_RETENTION = int(
+    environment.get("TG_PROCESSED_UPDATES_RETENTION", 48)
+)
+
+# Seconds to cache board roles of a user between requests, 0 disables the cache
+BOARD_ROLES_CACHE_TTL = int(environment.get("BOARD_ROLES_CACHE_TTL", 0))
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.1/topics/i18n/
 
@@ -155,5 +203,6 @@ STATIC_URL = "/static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 AUTH_USER_MODEL = "core.User"
+TEST_RUNNER = "core.runner.TestRunner"
 APPEND_SLASH = False
 SOCIAL_AUTH_TRAILING_SLASH = False